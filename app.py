@@ -28,6 +28,12 @@ except ImportError as e:
     print(f"导入AI预测器失败: {e}")
     AIFootballPredictor = None
 
+try:
+    from scripts.feature_store import feature_json
+except ImportError as e:
+    print(f"导入特征存储失败: {e}")
+    feature_json = None
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production') # 在生产环境中务必设置一个强随机 SECRET_KEY
 # Session/Cookie 配置，确保登录态可用
@@ -663,9 +669,25 @@ def health():
 
 @app.route('/data/<filename>')
 def serve_data_files(filename):
-    """提供数据文件访问"""
+    """
+    提供数据文件访问
+
+    features_*.json 在能导入特征存储（需要 numpy）时按需从存储生成；
+    线上部署不安装 numpy，直接返回随存储一起导出提交的静态文件
+    """
     try:
         from flask import send_from_directory
+        if feature_json and filename.startswith('features_') and filename.endswith('.json'):
+            generated = feature_json(os.path.join('data', filename))
+            if generated is not None:
+                payload, version = generated
+                etag = f'"{os.path.splitext(filename)[0]}-v{version}"'
+                if request.headers.get('If-None-Match') == etag:
+                    return '', 304
+                response = make_response(payload)
+                response.headers['Content-Type'] = 'application/json; charset=utf-8'
+                response.headers['ETag'] = etag
+                return response
         return send_from_directory('data', filename)
     except Exception as e:
         app.logger.error(f"提供数据文件失败: {e}")
@@ -0,0 +1,477 @@
+"""
+逐轮前推（walk-forward）回测
+按时间顺序回放 matches_data_*.csv，并与 odds_data_*.csv 的胜平负赔率关联，
+每个比赛日只用此前的信息给出预测，比较以下预测器:
+
+    implied  - app.simple_predict_match: 赔率隐含概率归一化
+    parlay   - ParlayPredictor 的预期进球 + 泊松模型（使用赛前时点特征）
+    js       - js/prediction.js 中 predictMatch 的胜平负概率（NumPy 移植）
+    model    - models.py 的分类器，按扩展窗口每隔若干比赛日重新训练
+
+指标（全部以数组计算）: 对数损失、Brier 分数、校准分箱、平注 ROI 和 Kelly ROI。
+各联赛赛季在进程池中并行回测
+
+用法（在项目根目录运行）:
+    python scripts/backtest.py --data_dir data
+    python scripts/backtest.py --leagues PL SA --predictors implied parlay --calibration
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+PREDICTORS = ['implied', 'parlay', 'js', 'model']
+OUTCOMES = ['H', 'D', 'A']
+
+# 参与评估的比赛要求两队赛前都至少有这么多场比赛
+DEFAULT_MIN_HISTORY = 5
+# model 预测器每隔多少个比赛日重新训练一次，以及训练所需的最少比赛数
+DEFAULT_RETRAIN_EVERY = 7
+MIN_TRAIN_MATCHES = 60
+MODEL_PARAMS = {'n_estimators': 100, 'max_depth': 10}
+
+# Kelly 投注比例的折扣系数，以及单注占资金的上限
+KELLY_FRACTION = 0.25
+MAX_STAKE = 0.05
+CALIBRATION_BINS = 10
+
+# js/prediction.js 中的联赛参数
+JS_HOME_ADVANTAGE = {'PL': 1.02, 'PD': 1.00, 'SA': 1.02, 'BL1': 1.04, 'FL1': 1.0}
+JS_HIGH_SCORING = {'PL': 1.15, 'PD': 1.15, 'SA': 0.95, 'BL1': 1.25, 'FL1': 1.10}
+JS_MAX_GOALS = 10
+
+# 关联赔率时忽略的球队名通用词
+_NAME_STOPWORDS = {'fc', 'cf', 'ac', 'as', 'sc', 'ssc', 'afc', 'cfc', 'ud', 'sd', 'rc', 'rcd', 'ca', 'cd',
+                   'sv', 'vfl', 'vfb', 'tsg', 'fsv', 'bc', 'us', 'club', 'de', 'calcio', 'balompie'}
+
+
+def match_files(data_dir, leagues=None, seasons=None):
+    """
+    列出 data_dir 中的联赛赛季
+
+    返回:
+        [(联赛, 赛季, 比赛 CSV, 赔率 CSV 或 None)]
+    """
+    jobs = []
+    for matches_path in sorted(glob.glob(os.path.join(data_dir, "matches_data_*.csv"))):
+        found = re.match(r'matches_data_([A-Z0-9]+?)(\d{4})\.csv$', os.path.basename(matches_path))
+        if not found:
+            continue
+        league, season = found.group(1), int(found.group(2))
+        if (leagues and league not in leagues) or (seasons and season not in seasons):
+            continue
+        odds_path = os.path.join(data_dir, f"odds_data_{league}{season}.csv")
+        jobs.append((league, season, matches_path, odds_path if os.path.exists(odds_path) else None))
+    return jobs
+
+
+def _name_tokens(team_name):
+    text = unicodedata.normalize('NFKD', str(team_name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    tokens = re.sub(r'[^0-9a-z]+', ' ', text).split()
+    return frozenset(token for token in tokens if token not in _NAME_STOPWORDS and not token.isdigit())
+
+
+def _same_team(a, b):
+    """球队名去掉通用词后，一方的词是另一方的子集（如 Augsburg / FC Augsburg）"""
+    a, b = _name_tokens(a), _name_tokens(b)
+    return bool(a) and bool(b) and (a <= b or b <= a)
+
+
+def load_h2h_odds(odds_path, price='mean'):
+    """
+    读取胜平负（h2h）赔率，每场比赛一行
+
+    从赔率宽表（odds_table.py）中取列；已保存的宽表不存在或已过期时在内存中由赔率 CSV 构建，
+    回测（在工作进程中）不写入数据目录
+
+    参数:
+        price: 'mean' 为各博彩公司的平均赔率，'median' 为中位数，'best' 为最高赔率
+    返回:
+        DataFrame: home_team, away_team, commence_time, home_odds, draw_odds, away_odds
+    """
+    from odds_table import build_odds_table, load_odds_table
+
+    table = load_odds_table(odds_path, rebuild=False)
+    if table is None:
+        if not os.path.exists(odds_path):
+            return None
+        table = build_odds_table(odds_path)
+    odds = table[['home_team', 'away_team', 'commence_time']].assign(
+        **{f"{side}_odds": table[f"h2h_{side}_{price}"] for side in ('home', 'draw', 'away')})
+    return odds.dropna().reset_index(drop=True)
+
+
+def attach_odds(matches_df, odds_df):
+    """
+    按开赛日期和球队名把赔率关联到比赛上，没有赔率的比赛为 NaN
+
+    赔率数据的球队名与比赛数据不同（如 Augsburg / FC Augsburg），先按日期取候选，再比较去掉通用词后的名称
+    """
+    matches_df = matches_df.copy()
+    for col in ('home_odds', 'draw_odds', 'away_odds'):
+        matches_df[col] = np.nan
+    if odds_df is None or odds_df.empty:
+        return matches_df
+
+    left = pd.DataFrame({'row': np.arange(len(matches_df)),
+                         'day': matches_df['match_date'].str[:10].to_numpy(),
+                         'home': matches_df['home_team'].to_numpy(),
+                         'away': matches_df['away_team'].to_numpy()})
+    right = odds_df.assign(day=odds_df['commence_time'].str[:10])
+    candidates = left.merge(right, on='day')
+    if candidates.empty:
+        return matches_df
+    same = [_same_team(a, b) and _same_team(c, d) for a, b, c, d in
+            zip(candidates['home'], candidates['home_team'], candidates['away'], candidates['away_team'])]
+    linked = candidates[same].drop_duplicates('row')
+    rows = linked['row'].to_numpy()
+    for col in ('home_odds', 'draw_odds', 'away_odds'):
+        matches_df.iloc[rows, matches_df.columns.get_loc(col)] = linked[col].to_numpy()
+    return matches_df
+
+
+def implied_probs(odds):
+    """simple_predict_match: 1/赔率 归一化，odds 为 (N, 3)"""
+    inverse = 1.0 / odds
+    return inverse / inverse.sum(axis=1, keepdims=True)
+
+
+def parlay_probs(home_features, away_features):
+    """ParlayPredictor 的预期进球公式 + 泊松比分矩阵，返回 (N, 3)"""
+    from parlay_predictor import expected_goals
+    from poisson_engine import DEFAULT_MAX_GOALS, predict_batch
+
+    home_xg, away_xg = expected_goals(home_features, away_features)
+    priced = predict_batch(home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS)
+    probs = np.column_stack([priced['home_win'], priced['draw'], priced['away_win']])
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def _js_or(values, default):
+    """JavaScript 的 (x || default): 0 和缺失值都取默认值"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values) & (values != 0), values, default)
+
+
+def js_probs(home_features, away_features, odds, league_code):
+    """
+    js/prediction.js predictMatch 的胜平负概率，逐元素与前端实现一致
+
+    home_features / away_features 为按 rolling_features.FEATURE_COLUMNS 排列的 (N, F) 矩阵
+    """
+    from rolling_features import FEATURE_COLUMNS
+
+    col = {name: j for j, name in enumerate(FEATURE_COLUMNS)}
+    home_odds, draw_odds, away_odds = odds[:, 0], odds[:, 1], odds[:, 2]
+
+    # calculateExpectedGoals（前端特征中没有 attack / xG / form 等字段，取默认值）
+    home_attack = _js_or(home_features[:, col['home_goals_scored_avg']], 1.3) * 0.4 + 1.3 * 0.3 + 1.2 * 0.2 + 1.2 * 0.1
+    home_defense = _js_or(home_features[:, col['home_goals_conceded_avg']], 1.1) * 0.4 + 1.2 * 0.3 + 1.1 * 0.2 + 1.1 * 0.1
+    away_attack = _js_or(away_features[:, col['away_goals_scored_avg']], 1.1) * 0.4 + 1.3 * 0.3 + 1.2 * 0.2 + 1.2 * 0.1
+    away_defense = _js_or(away_features[:, col['away_goals_conceded_avg']], 1.3) * 0.4 + 1.2 * 0.3 + 1.1 * 0.2 + 1.1 * 0.1
+    high_scoring = JS_HIGH_SCORING.get(league_code, 1.0)
+
+    home_xg = (home_attack * 0.5 + away_defense * 0.3 + 1.0 * 0.1) * JS_HOME_ADVANTAGE.get(league_code, 1.02)
+    away_xg = away_attack * 0.5 + home_defense * 0.3 + 1.0 * 0.1
+    ratio = home_odds / away_odds
+    home_strong = ratio < 0.5
+    away_strong = ratio > 2.0
+    diff = np.where(home_strong, (0.5 / ratio) ** 0.7, np.where(away_strong, (ratio / 2.0) ** 0.7, 1.0)) - 1
+    home_xg = home_xg * np.where(home_strong, 1 + diff * 0.7, np.where(away_strong, 1 - diff * 0.4, 1.0))
+    away_xg = away_xg * np.where(home_strong, 1 - diff * 0.4, np.where(away_strong, 1 + diff * 0.7, 1.0))
+    home_xg = np.maximum(home_xg * high_scoring, 0.3)
+    away_xg = np.maximum(away_xg * high_scoring, 0.2)
+
+    # predictMatch: 最大进球数随赔率差距调整，比分网格不归一化
+    favourite = np.minimum(home_odds, away_odds)
+    underdog = np.maximum(home_odds, away_odds)
+    odds_ratio = underdog / favourite
+    base = int(np.ceil(5 * high_scoring))
+    max_goals = np.select([odds_ratio > 5, odds_ratio > 3, odds_ratio > 2, odds_ratio > 1.5],
+                          [max(9, base + 3), max(8, base + 2), max(7, base + 1), max(6, base)], base)
+    max_goals = np.maximum(max_goals, 6)
+
+    goals = np.arange(JS_MAX_GOALS + 1)
+    log_factorial = np.cumsum(np.log(np.maximum(goals, 1)))
+    home_pmf = np.exp(-home_xg[:, None] + goals * np.log(home_xg[:, None]) - log_factorial)
+    away_pmf = np.exp(-away_xg[:, None] + goals * np.log(away_xg[:, None]) - log_factorial)
+    in_grid = goals[None, :] <= max_goals[:, None]
+    grid = (home_pmf * in_grid)[:, :, None] * (away_pmf * in_grid)[:, None, :]
+    home_win = np.tril(np.ones((JS_MAX_GOALS + 1,) * 2), -1)
+    raw = np.column_stack([(grid * home_win).sum(axis=(1, 2)),
+                           np.trace(grid, axis1=1, axis2=2),
+                           (grid * home_win.T).sum(axis=(1, 2))])
+
+    # 与赔率隐含概率按 0.7 / 0.3 混合后归一化
+    margin = (1 / odds).sum(axis=1, keepdims=True) - 1
+    blended = raw * 0.7 + (1 / odds) / (1 + margin) * 0.3
+    return blended / blended.sum(axis=1, keepdims=True)
+
+
+def model_feature_columns(features_df):
+    """与 models.prepare_training_data 相同的特征列选择"""
+    return [col for col in features_df.columns
+            if col.startswith(('home_', 'away_'))
+            and col not in ['home_team', 'away_team', 'home_score', 'away_score', 'home_odds', 'away_odds']]
+
+
+def model_probs(features_df, day_index, finished, retrain_every=DEFAULT_RETRAIN_EVERY):
+    """
+    扩展窗口的分类器预测: 每 retrain_every 个比赛日用此前全部已完成的比赛重新训练，
+    预测之后 retrain_every 个比赛日；训练数据不足时为 NaN
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    from model_search import build_estimator
+
+    feature_cols = model_feature_columns(features_df)
+    X = features_df[feature_cols].fillna(0).to_numpy(dtype=np.float64)
+    y = features_df['result'].to_numpy()
+    probs = np.full((len(X), 3), np.nan)
+
+    for start_day in range(0, int(day_index.max()) + 1, retrain_every):
+        train = finished & (day_index < start_day)
+        block = (day_index >= start_day) & (day_index < start_day + retrain_every)
+        if train.sum() < MIN_TRAIN_MATCHES or not block.any():
+            continue
+        scaler = StandardScaler().fit(X[train])
+        model = build_estimator('rf', MODEL_PARAMS).fit(scaler.transform(X[train]), y[train])
+        proba = model.predict_proba(scaler.transform(X[block]))
+        classes = list(model.classes_)
+        probs[block] = np.column_stack([
+            proba[:, classes.index(outcome)] if outcome in classes else np.zeros(block.sum())
+            for outcome in OUTCOMES
+        ])
+    return probs
+
+
+def score_predictions(probs, outcomes, odds=None, day_index=None, bins=CALIBRATION_BINS,
+                      kelly_fraction=KELLY_FRACTION, max_stake=MAX_STAKE):
+    """
+    计算预测指标
+
+    参数:
+        probs: (N, 3) 主胜/平/客胜概率，outcomes: (N,) 结果下标（0 主胜, 1 平, 2 客胜）
+        odds: (N, 3) 赔率，没有赔率的行为 NaN；day_index: (N,) 比赛日编号（Kelly 资金按比赛日复利）
+    返回:
+        字典 n / log_loss / brier / calibration / bets / flat_roi / kelly_roi / kelly_bankroll
+    """
+    n = len(outcomes)
+    rows = np.arange(n)
+    onehot = np.zeros((n, 3))
+    onehot[rows, outcomes] = 1.0
+
+    clipped = np.clip(probs, 1e-15, 1.0)
+    result = {
+        'n': n,
+        'log_loss': float(-np.log(clipped[rows, outcomes]).mean()) if n else float('nan'),
+        'brier': float(((probs - onehot) ** 2).sum(axis=1).mean()) if n else float('nan')
+    }
+
+    # 校准: 三个结果的概率放在一起分箱，比较平均预测概率与实际发生频率
+    flat_probs = probs.ravel()
+    flat_hits = onehot.ravel()
+    bin_index = np.minimum((flat_probs * bins).astype(int), bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['calibration'] = {
+            'edges': np.linspace(0, 1, bins + 1).tolist(),
+            'count': counts.tolist(),
+            'predicted': (np.bincount(bin_index, weights=flat_probs, minlength=bins) / counts).tolist(),
+            'observed': (np.bincount(bin_index, weights=flat_hits, minlength=bins) / counts).tolist()
+        }
+
+    result.update({'bets': 0, 'flat_roi': float('nan'), 'kelly_roi': float('nan'), 'kelly_bankroll': float('nan')})
+    if odds is None:
+        return result
+
+    # 每场选期望值最高的结果，期望值为正才投注
+    has_odds = np.isfinite(odds).all(axis=1)
+    ev = np.where(has_odds[:, None], probs * odds - 1, -np.inf)
+    pick = ev.argmax(axis=1)
+    best_ev = ev[rows, pick]
+    bet = best_ev > 0
+    if not bet.any():
+        return result
+
+    pick_odds = odds[rows, pick]
+    won = pick == outcomes
+    returns = np.where(won, pick_odds - 1, -1.0)
+
+    # 折扣 Kelly: f = kelly_fraction * ev / (赔率 - 1)，单注不超过 max_stake
+    stakes = np.where(bet, np.minimum(kelly_fraction * best_ev / (pick_odds - 1), max_stake), 0.0)
+    result['bets'] = int(bet.sum())
+    result['flat_roi'] = float(returns[bet].mean())
+    result['kelly_roi'] = float((stakes * returns).sum() / stakes.sum())
+    if day_index is not None:
+        day_return = np.bincount(day_index, weights=stakes * returns)
+        result['kelly_bankroll'] = float(np.prod(1 + day_return))
+    return result
+
+
+def build_backtest_frame(matches_path, odds_path=None, price='mean'):
+    """比赛按时间排序，附上赛前时点特征、Elo 和赔率，并编号比赛日"""
+    from elo import add_elo_features
+    from rolling_features import build_point_in_time_features
+
+    matches_df = pd.read_csv(matches_path)
+    features_df, _ = add_elo_features(build_point_in_time_features(matches_df))
+    features_df = features_df.sort_values('match_date', kind='stable').reset_index(drop=True)
+    features_df = attach_odds(features_df, load_h2h_odds(odds_path, price) if odds_path else None)
+    features_df['day_index'] = pd.factorize(features_df['match_date'].str[:10], sort=True)[0]
+    return features_df
+
+
+def run_backtest_job(job):
+    """
+    在工作进程中回测一个联赛赛季
+
+    返回:
+        字典 league / season / arrays {预测器: (probs, outcomes, odds, day_index)} / timings / coverage
+    """
+    from rolling_features import FEATURE_COLUMNS
+
+    timings = {}
+    start = time.perf_counter()
+    frame = build_backtest_frame(job['matches_path'], job['odds_path'], job['price'])
+    timings['load'] = time.perf_counter() - start
+
+    finished = (frame['status'] == 'FINISHED').to_numpy()
+    day_index = frame['day_index'].to_numpy()
+    home = frame[[f'home_{col}' for col in FEATURE_COLUMNS]].to_numpy(dtype=np.float64)
+    away = frame[[f'away_{col}' for col in FEATURE_COLUMNS]].to_numpy(dtype=np.float64)
+    odds = frame[['home_odds', 'draw_odds', 'away_odds']].to_numpy(dtype=np.float64)
+    has_odds = np.isfinite(odds).all(axis=1)
+    outcomes = pd.Categorical(frame['result'], categories=OUTCOMES).codes.astype(np.int64)
+
+    history = np.minimum(frame['home_total_matches_played'].to_numpy(),
+                         frame['away_total_matches_played'].to_numpy())
+    evaluated = finished & (history >= job['min_history']) & (outcomes >= 0)
+
+    arrays = {}
+    for predictor in job['predictors']:
+        start = time.perf_counter()
+        probs = np.full((len(frame), 3), np.nan)
+        if predictor == 'implied':
+            probs[has_odds] = implied_probs(odds[has_odds])
+        elif predictor == 'parlay':
+            probs = parlay_probs(home, away)
+        elif predictor == 'js':
+            probs[has_odds] = js_probs(home[has_odds], away[has_odds], odds[has_odds], job['league'])
+        elif predictor == 'model':
+            probs = model_probs(frame, day_index, finished, job['retrain_every'])
+        keep = evaluated & np.isfinite(probs).all(axis=1)
+        arrays[predictor] = (probs[keep], outcomes[keep], odds[keep], day_index[keep])
+        timings[predictor] = time.perf_counter() - start
+
+    return {
+        'league': job['league'],
+        'season': job['season'],
+        'arrays': arrays,
+        'timings': timings,
+        'coverage': {'matches': int(finished.sum()), 'evaluated': int(evaluated.sum()),
+                     'with_odds': int((evaluated & has_odds).sum())}
+    }
+
+
+def run_backtest(jobs, predictors=PREDICTORS, workers=None, price='mean', min_history=DEFAULT_MIN_HISTORY,
+                 retrain_every=DEFAULT_RETRAIN_EVERY):
+    """
+    并行回测所有联赛赛季
+
+    参数:
+        jobs: match_files 的返回值
+    返回:
+        (各联赛赛季的结果列表, 总耗时秒数)
+    """
+    tasks = [{'league': league, 'season': season, 'matches_path': matches_path, 'odds_path': odds_path,
+              'predictors': list(predictors), 'price': price, 'min_history': min_history,
+              'retrain_every': retrain_every}
+             for league, season, matches_path, odds_path in jobs]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(run_backtest_job, task) for task in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+    order = {(task['league'], task['season']): i for i, task in enumerate(tasks)}
+    results.sort(key=lambda result: order[(result['league'], result['season'])])
+    return results, time.perf_counter() - start
+
+
+def pooled_scores(results, predictor):
+    """把所有联赛赛季的预测合并后计算指标（Kelly 资金不跨联赛复利）"""
+    parts = [result['arrays'][predictor] for result in results if predictor in result['arrays']]
+    if not parts:
+        return None
+    probs, outcomes, odds, _ = (np.concatenate(values) for values in zip(*parts))
+    return score_predictions(probs, outcomes, odds)
+
+
+def _format_row(label, scores):
+    return (f"{label:<16}{scores['n']:>6}{scores['log_loss']:>10.4f}{scores['brier']:>9.4f}"
+            f"{scores['bets']:>7}{scores['flat_roi']:>10.3f}{scores['kelly_roi']:>10.3f}")
+
+
+def print_report(results, predictors, wall_time, calibration=False):
+    header = f"{'联赛/预测器':<13}{'场数':>4}{'对数损失':>6}{'Brier':>9}{'投注':>5}{'平注ROI':>7}{'KellyROI':>10}"
+    for result in results:
+        coverage = result['coverage']
+        print(f"\n{result['league']} {result['season']}: 完赛 {coverage['matches']} 场, "
+              f"参与评估 {coverage['evaluated']} 场, 有赔率 {coverage['with_odds']} 场")
+        print(header)
+        for predictor in predictors:
+            scores = score_predictions(*result['arrays'][predictor])
+            print(_format_row(predictor, scores) +
+                  (f"  资金 x{scores['kelly_bankroll']:.3f}" if scores['bets'] else ""))
+
+    print("\n全部联赛合并")
+    print(header)
+    for predictor in predictors:
+        scores = pooled_scores(results, predictor)
+        print(_format_row(predictor, scores))
+        if calibration:
+            bins = scores['calibration']
+            for k in range(len(bins['count'])):
+                if bins['count'][k]:
+                    print(f"    [{bins['edges'][k]:.1f}, {bins['edges'][k + 1]:.1f}) {bins['count'][k]:>6} 个, "
+                          f"预测 {bins['predicted'][k]:.3f}, 实际 {bins['observed'][k]:.3f}")
+
+    serial_time = sum(sum(result['timings'].values()) for result in results)
+    print(f"\n各任务耗时之和 {serial_time:.2f} 秒, 实际耗时 {wall_time:.2f} 秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='逐轮前推回测')
+    parser.add_argument('--data_dir', type=str, default='data', help='比赛与赔率 CSV 所在目录')
+    parser.add_argument('--leagues', type=str, nargs='+', default=None, help='联赛代码（默认全部）')
+    parser.add_argument('--seasons', type=int, nargs='+', default=None, help='赛季（默认全部）')
+    parser.add_argument('--predictors', type=str, nargs='+', default=PREDICTORS, choices=PREDICTORS, help='预测器')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认为 CPU 核数）')
+    parser.add_argument('--price', type=str, default='mean', choices=['mean', 'median', 'best'],
+                        help='多家赔率取平均、中位数或最高')
+    parser.add_argument('--min_history', type=int, default=DEFAULT_MIN_HISTORY, help='两队赛前最少比赛场数')
+    parser.add_argument('--retrain_every', type=int, default=DEFAULT_RETRAIN_EVERY, help='model 重新训练间隔（比赛日）')
+    parser.add_argument('--calibration', action='store_true', help='打印合并后的校准分箱')
+    args = parser.parse_args()
+
+    jobs = match_files(args.data_dir, args.leagues, args.seasons)
+    if not jobs:
+        print(f"{args.data_dir} 中没有比赛数据")
+        return
+    results, wall_time = run_backtest(jobs, args.predictors, args.workers, args.price, args.min_history,
+                                      args.retrain_every)
+    print_report(results, args.predictors, wall_time, args.calibration)
+
+
+if __name__ == "__main__":
+    main()
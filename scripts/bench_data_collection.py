@@ -0,0 +1,209 @@
+"""
+基准测试：数据收集，逐个 requests.get（原实现）vs 并发 + 连接复用 + 条件请求（DataCollector）
+
+在本机启动一个模拟 Football-Data.org / The Odds API 的 HTTP 服务器（每个请求固定延迟，
+响应带 ETag / Last-Modified，支持 304），依次运行:
+    1. 原实现: 每个联赛赛季、每个接口依次调用 requests.get
+    2. DataCollector 首次运行（空缓存）
+    3. DataCollector 再次运行（数据没有变化，比赛和球队数据返回 304）
+    4. 修改一个联赛的数据后再次运行（只有该联赛重新下载）
+记录耗时、新建 TCP 连接数和各状态的请求数，并核对写出的原始文件与服务器数据一致
+
+需要 config.py（与 data_collection 相同），请求只发送到本机的模拟服务器
+
+用法（在项目根目录运行）:
+    python scripts/bench_data_collection.py --leagues PL PD SA BL1 FL1 --seasons 2023 2024 --latency 0.2
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StubApi:
+    """模拟 API 的数据: 每个联赛赛季若干场比赛，每个联赛 20 支球队，一份赔率"""
+
+    def __init__(self, leagues, seasons, n_matches=380):
+        self.lock = threading.Lock()
+        self.versions = {}
+        self.bodies = {}
+        self.n_matches = n_matches
+        self.connections = 0
+        self.requests = 0
+        for league in leagues:
+            for season in seasons:
+                self.set(f"/competitions/{league}/matches?season={season}", self._matches(league, season, 0))
+            self.set(f"/competitions/{league}/teams", {
+                'count': 20,
+                'teams': [{'id': i, 'name': f"{league} Team {i:02d}", 'tla': f"T{i:02d}"} for i in range(20)]
+            })
+        self.set("/sports/soccer/odds", [{'id': f"odds{i}", 'sport_key': 'soccer_epl', 'home_team': f"H{i}",
+                                           'away_team': f"A{i}", 'commence_time': '2025-03-02T13:45:00Z',
+                                           'bookmakers': []} for i in range(50)])
+
+    def _matches(self, league, season, revision):
+        matches = []
+        for i in range(self.n_matches):
+            finished = i < self.n_matches - revision - 10
+            matches.append({
+                'id': season * 10000 + i,
+                'utcDate': f"{season}-08-{1 + i % 28:02d}T15:00:00Z",
+                'status': 'FINISHED' if finished else 'TIMED',
+                'competition': {'name': league},
+                'homeTeam': {'name': f"{league} Team {i % 20:02d}"},
+                'awayTeam': {'name': f"{league} Team {(i + 7) % 20:02d}"},
+                'score': {'fullTime': {'home': i % 4 if finished else None, 'away': i % 3 if finished else None},
+                          'halfTime': {'home': i % 2 if finished else None, 'away': 0 if finished else None}}
+            })
+        return {'count': len(matches), 'matches': matches}
+
+    def set(self, path, data):
+        body = json.dumps(data).encode('utf-8')
+        with self.lock:
+            self.versions[path] = self.versions.get(path, 0) + 1
+            self.bodies[path] = (body, f'"{hashlib.sha1(body).hexdigest()}"', formatdate(usegmt=True))
+
+    def update_league(self, league, season):
+        """模拟一轮比赛结束后比赛数据发生变化"""
+        self.set(f"/competitions/{league}/matches?season={season}", self._matches(league, season, 5))
+
+    def get(self, path):
+        with self.lock:
+            self.requests += 1
+            return self.bodies.get(path)
+
+
+def make_handler(api, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            with api.lock:
+                api.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+            path = parsed.path + (f"?season={query['season']}" if 'season' in query else '')
+            time.sleep(latency)
+            entry = api.get(path)
+            if entry is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body, etag, last_modified = entry
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def sequential_fetch(base_url, leagues, seasons, data_dir):
+    """原 data_collection 的方式: 逐个 requests.get，每次写出原始文件"""
+    for league in leagues:
+        for season in seasons:
+            response = requests.get(f"{base_url}/competitions/{league}/matches?season={season}")
+            with open(os.path.join(data_dir, f"raw_matches_{league}_{season}.json"), 'w') as f:
+                json.dump(response.json(), f)
+    for league in leagues:
+        response = requests.get(f"{base_url}/competitions/{league}/teams")
+        with open(os.path.join(data_dir, f"raw_teams_{league}.json"), 'w') as f:
+            json.dump(response.json(), f)
+    response = requests.get(f"{base_url}/sports/soccer/odds")
+    with open(os.path.join(data_dir, "raw_odds_sequential.json"), 'w') as f:
+        json.dump(response.json(), f)
+
+
+def verify_raw_files(api, data_dir, leagues, seasons):
+    """核对写出的原始比赛文件与服务器当前数据一致"""
+    for league in leagues:
+        for season in seasons:
+            with open(os.path.join(data_dir, f"raw_matches_{league}_{season}.json")) as f:
+                if json.load(f) != json.loads(api.get(f"/competitions/{league}/matches?season={season}")[0]):
+                    return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据收集基准测试（本机模拟服务器）')
+    parser.add_argument('--leagues', type=str, nargs='+', default=['PL', 'PD', 'SA', 'BL1', 'FL1'], help='联赛代码')
+    parser.add_argument('--seasons', type=int, nargs='+', default=[2023, 2024], help='赛季')
+    parser.add_argument('--latency', type=float, default=0.2, help='模拟服务器每个请求的延迟（秒）')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发请求数')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    from data_collection import DataCollector
+
+    api = StubApi(args.leagues, args.seasons)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(api, args.latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def measure(label, func):
+        connections, n_requests = api.connections, api.requests
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            collected = func()
+        wall = time.perf_counter() - start
+        statuses = {}
+        for item in (collected or {}).get('report', []):
+            statuses[item['status']] = statuses.get(item['status'], 0) + 1
+        print(f"{label:<22}{wall:>9.2f}{api.requests - n_requests:>8}{api.connections - connections:>8}  "
+              f"{' '.join(f'{k}={v}' for k, v in sorted(statuses.items())) or '-'}")
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sequential_dir = os.path.join(temp_dir, 'sequential')
+            os.makedirs(sequential_dir)
+            collector = DataCollector(data_dir=os.path.join(temp_dir, 'collector'), concurrency=args.concurrency,
+                                      football_data_url=base_url, odds_api_url=base_url)
+            run = lambda: collector.collect(args.leagues, args.seasons)
+
+            print(f"{len(args.leagues)} 个联赛 x {len(args.seasons)} 个赛季, 每个请求延迟 {args.latency * 1000:.0f} ms, "
+                  f"并发 {args.concurrency}")
+            print(f"{'方式':<20}{'耗时(秒)':>9}{'请求数':>8}{'新连接':>8}  状态")
+            measure('原实现（逐个请求）', lambda: sequential_fetch(base_url, args.leagues, args.seasons, sequential_dir))
+            measure('并发 + 空缓存', run)
+            measure('并发 + 数据未变化', run)
+            api.update_league(args.leagues[0], args.seasons[-1])
+            measure(f'并发 + {args.leagues[0]} 数据更新', run)
+            print(f"原始比赛文件与服务器数据{'一致' if verify_raw_files(api, collector.data_dir, args.leagues, args.seasons) else '不一致'}")
+            collector.client.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+基准测试：预测器冷启动耗时，列式特征存储 vs CSV
+
+每次在新的 Python 进程中导入 ParlayPredictor、加载全部联赛并预测一场比赛，
+模拟 Vercel 函数冷启动；CSV 基线由列式存储导出到临时目录
+
+用法（在项目根目录运行）:
+    python scripts/bench_feature_store.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+COLD_START_CODE = """
+import time
+start = time.perf_counter()
+from parlay_predictor import ParlayPredictor
+predictor = ParlayPredictor(data_dir={data_dir!r}, use_store={use_store})
+predictor.predict_match('Arsenal FC', 'Chelsea FC', 1.8, 3.5, 4.2, 'PL')
+predictor.get_team_vector('__missing__')
+print(time.perf_counter() - start)
+"""
+
+
+def export_csv(data_dir, output_dir):
+    """把 data_dir 中的列式存储导出为 features_*.csv"""
+    from feature_store import STORE_EXTENSION, load_feature_frame
+
+    for filename in sorted(os.listdir(data_dir)):
+        if filename.startswith('features_') and filename.endswith(STORE_EXTENSION):
+            csv_name = filename[:-len(STORE_EXTENSION)] + '.csv'
+            load_feature_frame(os.path.join(data_dir, csv_name)).to_csv(os.path.join(output_dir, csv_name))
+
+
+def cold_start(data_dir, use_store):
+    """在子进程中测量一次冷启动，返回 (进程总耗时, 进程内导入+加载耗时)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SCRIPTS_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START_CODE.format(data_dir=data_dir, use_store=use_store)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    wall = time.perf_counter() - start
+    return wall, float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='特征存储冷启动基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式的冷启动次数')
+    parser.add_argument('--data_dir', type=str, default='data', help='列式特征存储所在目录')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    with tempfile.TemporaryDirectory() as csv_dir:
+        export_csv(args.data_dir, csv_dir)
+        for label, data_dir, use_store in (('CSV + pandas', csv_dir, False),
+                                           ('列式存储', args.data_dir, True)):
+            runs = [cold_start(data_dir, use_store) for _ in range(args.repeat)]
+            wall = statistics.median(run[0] for run in runs)
+            inner = statistics.median(run[1] for run in runs)
+            print(f"{label}: 进程总耗时 {wall * 1000:.1f} ms, 导入+加载+预测 {inner * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
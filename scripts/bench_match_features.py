@@ -0,0 +1,92 @@
+"""
+基准测试：prepare_match_features 的合并实现 vs 原 iterrows 实现
+
+在合成数据集上（默认 10 万场比赛）为每场比赛附加主客队特征，比较耗时并检查结果完全一致
+
+用法（在项目根目录运行）:
+    python scripts/bench_match_features.py --matches 100000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from bench_team_features import synthetic_matches
+from feature_engineering import build_team_features, prepare_match_features
+
+
+def legacy_match_features(matches_df, features_df):
+    """原 iterrows 实现，作为基准和正确性参照"""
+    match_features = []
+    
+    for _, match in matches_df.iterrows():
+        home_team = match['home_team']
+        away_team = match['away_team']
+        
+        if home_team not in features_df.index or away_team not in features_df.index:
+            continue
+        
+        match_data = {
+            'match_id': match['match_id'],
+            'home_team': home_team,
+            'away_team': away_team,
+            'match_date': match['match_date'],
+            'status': match['status']
+        }
+        
+        for col in features_df.columns:
+            match_data[f'home_{col}'] = features_df.loc[home_team, col]
+        
+        for col in features_df.columns:
+            match_data[f'away_{col}'] = features_df.loc[away_team, col]
+        
+        if match['status'] == 'FINISHED':
+            match_data['home_score'] = match['home_score']
+            match_data['away_score'] = match['away_score']
+            match_data['result'] = match['result']
+            if 'half_time_home' in match and 'half_time_away' in match:
+                match_data['half_time_home'] = match['half_time_home']
+                match_data['half_time_away'] = match['half_time_away']
+                if 'half_full_result' in match:
+                    match_data['half_full_result'] = match['half_full_result']
+        
+        match_features.append(match_data)
+    
+    return pd.DataFrame(match_features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比赛特征构建基准测试')
+    parser.add_argument('--matches', type=int, default=100000, help='比赛场数')
+    args = parser.parse_args()
+
+    # 每个联赛赛季 380 场，按需生成足够的赛季后截取
+    seasons = -(-args.matches // (50 * 380))
+    matches_df = synthetic_matches(leagues=50, seasons=seasons).head(args.matches)
+    features_df = build_team_features(matches_df)
+    # 去掉部分球队的特征，覆盖跳过比赛的分支
+    features_df = features_df.iloc[5:]
+    print(f"合成数据: {len(matches_df)}场比赛, {len(features_df)}支球队有特征")
+
+    start = time.perf_counter()
+    result = prepare_match_features(matches_df, features_df)
+    fast = time.perf_counter() - start
+    print(f"合并实现: {fast:.3f} 秒")
+
+    start = time.perf_counter()
+    expected = legacy_match_features(matches_df, features_df)
+    slow = time.perf_counter() - start
+    print(f"原 iterrows 实现: {slow:.3f} 秒 (加速 {slow / fast:.1f} 倍)")
+
+    try:
+        pd.testing.assert_frame_equal(result, expected)
+        same = True
+    except AssertionError as e:
+        print(e)
+        same = False
+    print(f"结果一致: {'是' if same else '否'}")
+
+
+if __name__ == "__main__":
+    main()
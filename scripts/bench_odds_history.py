@@ -0,0 +1,110 @@
+"""
+基准测试：本地赔率历史存储
+
+模拟多次同步（每次每场比赛的赔率以一定概率变化），记录:
+    1. 每次同步的追加耗时，只追加变化的快照后的存储大小（与每次同步全量写一行 CSV 对比）
+    2. 一次查询全部比赛在某一时刻的赔率（as_of）和初盘 / 终盘的耗时，
+       与 pandas 在全量快照表上筛选 + 分组取首尾行的结果核对
+
+用法（在项目根目录运行）:
+    python scripts/bench_odds_history.py --matches 5000 --syncs 48
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def simulate_syncs(n_matches, n_syncs, change_rate, seed=0):
+    """每次同步的比赛数据列表（体彩格式），比赛分布在 14 个比赛日"""
+    rng = np.random.default_rng(seed)
+    dates = [f"2025-09-{day:02d}" for day in range(15, 29)]
+    match_dates = rng.choice(dates, n_matches)
+    prices = rng.uniform(1.2, 8.0, (n_matches, 3)).round(2)
+    start = pd.Timestamp('2025-09-14 08:00:00')
+    for sync in range(n_syncs):
+        changed = rng.random(n_matches) < change_rate
+        prices[changed] = (prices[changed] * rng.uniform(0.95, 1.05, (changed.sum(), 3))).clip(1.01).round(2)
+        matches = [{
+            'match_id': f"lottery_{i}",
+            'match_date': match_dates[i],
+            'odds': {'hhad': {'h': f"{prices[i, 0]:.2f}", 'd': f"{prices[i, 1]:.2f}", 'a': f"{prices[i, 2]:.2f}"},
+                     'type': 'had'}
+        } for i in range(n_matches)]
+        yield start + pd.Timedelta(minutes=30 * sync), matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='赔率历史存储基准测试')
+    parser.add_argument('--matches', type=int, default=5000, help='比赛数')
+    parser.add_argument('--syncs', type=int, default=48, help='同步次数（每 30 分钟一次）')
+    parser.add_argument('--change_rate', type=float, default=0.1, help='每次同步赔率变化的比赛比例')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    from odds_history import LocalOddsHistory
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = LocalOddsHistory(os.path.join(temp_dir, 'odds_history'))
+        full_rows = []
+        append_times = []
+        appended = 0
+        for captured_at, matches in simulate_syncs(args.matches, args.syncs, args.change_rate):
+            start = time.perf_counter()
+            appended += store.append(matches, captured_at=captured_at)['appended']
+            append_times.append(time.perf_counter() - start)
+            full_rows.extend((match['match_id'], captured_at, float(match['odds']['hhad']['h']),
+                              float(match['odds']['hhad']['d']), float(match['odds']['hhad']['a']))
+                             for match in matches)
+
+        full = pd.DataFrame(full_rows, columns=['match_id', 'captured_at', 'home_odds', 'draw_odds', 'away_odds'])
+        csv_path = os.path.join(temp_dir, 'full.csv')
+        full.to_csv(csv_path, index=False)
+        info = store.info()
+        store_bytes = sum(p['bytes'] for p in info['partitions']) + os.path.getsize(
+            os.path.join(store.root, 'matches.tsv'))
+        print(f"{args.matches} 场比赛 x {args.syncs} 次同步: 全量 {len(full)} 行, 追加快照 {appended} 条, "
+              f"{len(info['partitions'])} 个分区")
+        print(f"存储大小: 全量 CSV {os.path.getsize(csv_path) / 1024:.0f} KB, 赔率历史 {store_bytes / 1024:.0f} KB")
+        print(f"每次同步追加耗时: 中位数 {np.median(append_times) * 1000:.1f} ms, 最大 {max(append_times) * 1000:.1f} ms")
+
+        match_ids = [f"lottery_{i}" for i in range(args.matches)]
+        at = full['captured_at'].iloc[len(full) // 2]
+
+        fresh = LocalOddsHistory(store.root)
+        start = time.perf_counter()
+        fresh.as_of(match_ids, at)
+        cold_time = time.perf_counter() - start
+        start = time.perf_counter()
+        as_of = fresh.as_of(match_ids, at)
+        as_of_time = time.perf_counter() - start
+        start = time.perf_counter()
+        opening_closing = fresh.opening_closing(match_ids)
+        opening_closing_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = full[full['captured_at'] <= at].groupby('match_id').last().reindex(match_ids)
+        grouped = full.groupby('match_id')
+        expected_opening, expected_closing = grouped.first().reindex(match_ids), grouped.last().reindex(match_ids)
+        pandas_time = time.perf_counter() - start
+
+        columns = ['home_odds', 'draw_odds', 'away_odds']
+        ok = (np.allclose(as_of[columns].to_numpy(), expected[columns].to_numpy())
+              and np.allclose(opening_closing[[f"opening_{c}" for c in columns]].to_numpy(),
+                              expected_opening[columns].to_numpy())
+              and np.allclose(opening_closing[[f"closing_{c}" for c in columns]].to_numpy(),
+                              expected_closing[columns].to_numpy()))
+        print(f"as_of {args.matches} 场: 首次（含建立索引）{cold_time * 1000:.1f} ms, 之后 {as_of_time * 1000:.1f} ms")
+        print(f"初盘/终盘 {args.matches} 场: {opening_closing_time * 1000:.1f} ms")
+        print(f"pandas 全量快照表筛选分组: {pandas_time * 1000:.1f} ms, 结果{'一致' if ok else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
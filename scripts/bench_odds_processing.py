@@ -0,0 +1,174 @@
+"""
+基准测试：赔率数据处理，逐行字典（原 process_odds_data）vs 列式缓冲区
+
+生成与 The Odds API 结构相同的合成赔率 JSON，在新的 Python 进程中分别运行:
+    1. 原实现: json.load 整个文件，每条赔率一个字典，再构造 DataFrame 写出 CSV
+    2. 列式: 逐场增量解析，追加到类型化列缓冲区，构造 DataFrame 写出 CSV（process_odds_data）
+    3. 列式流式: 每批行数写出一次 CSV 并清空缓冲区（odds_columns.write_odds_csv）
+记录耗时与进程峰值内存，并核对三者输出的 CSV 完全一致
+
+用法（在项目根目录运行）:
+    python scripts/bench_odds_processing.py --matches 500 2000 8000
+"""
+
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RUN_CODE = """
+import resource
+import time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+METHODS = {
+    '原实现（逐行字典）': """
+import json
+from bench_odds_processing import legacy_process_odds_data
+with open({input_path!r}, 'r', encoding='utf-8') as f:
+    legacy_process_odds_data(json.load(f), {output_path!r})
+""",
+    '列式缓冲区': """
+from odds_columns import read_odds_columns
+read_odds_columns({input_path!r}).to_csv({output_path!r})
+""",
+    '列式流式写出': """
+from odds_columns import write_odds_csv
+write_odds_csv({input_path!r}, {output_path!r})
+"""
+}
+
+BOOKMAKERS = ['bet365', 'betfair', 'betway', 'bovada', 'draftkings', 'fanduel', 'marathonbet', 'matchbook',
+              'mybookieag', 'nordicbet', 'paddypower', 'pinnacle', 'sport888', 'unibet', 'williamhill']
+
+
+def legacy_process_odds_data(odds_data, output_path):
+    """原 data_processing.process_odds_data 的处理方式（作为基线，另外保留 point 列以便与列式输出比较）"""
+    import pandas as pd
+
+    processed_data = []
+    for match in odds_data:
+        match_info = {
+            'match_id': match['id'],
+            'home_team': match['home_team'],
+            'away_team': match['away_team'],
+            'commence_time': match['commence_time'],
+            'sport': match['sport_key']
+        }
+        for bookmaker in match['bookmakers']:
+            for market in bookmaker['markets']:
+                for outcome in market['outcomes']:
+                    odds_record = match_info.copy()
+                    odds_record['bookmaker'] = bookmaker['key']
+                    odds_record['market'] = market['key']
+                    odds_record['outcome'] = outcome['name']
+                    odds_record['price'] = outcome['price']
+                    odds_record['point'] = outcome.get('point')
+                    processed_data.append(odds_record)
+
+    df = pd.DataFrame(processed_data)
+    df['commence_time'] = pd.to_datetime(df['commence_time'])
+    df.to_csv(output_path, index=False)
+    return df
+
+
+def generate_odds_feed(path, n_matches, seed=0):
+    """写出 n_matches 场比赛的合成赔率 JSON（h2h / spreads / totals，每场比赛约 15 家博彩公司）"""
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {i:03d}" for i in range(200)]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i in range(n_matches):
+            home, away = rng.choice(teams, 2, replace=False)
+            day = 1 + i % 28
+            hour = 12 + i % 9
+            bookmakers = []
+            for key in rng.choice(BOOKMAKERS, rng.integers(8, len(BOOKMAKERS) + 1), replace=False):
+                prices = np.round(rng.uniform(1.2, 9.0, 7), 2).tolist()
+                bookmakers.append({
+                    'key': key,
+                    'title': key.title(),
+                    'last_update': f"2025-03-{day:02d}T10:00:00Z",
+                    'markets': [
+                        {'key': 'h2h', 'last_update': f"2025-03-{day:02d}T10:00:00Z", 'outcomes': [
+                            {'name': home, 'price': prices[0]},
+                            {'name': away, 'price': prices[1]},
+                            {'name': 'Draw', 'price': prices[2]}]},
+                        {'key': 'spreads', 'last_update': f"2025-03-{day:02d}T10:00:00Z", 'outcomes': [
+                            {'name': home, 'price': prices[3], 'point': -0.5},
+                            {'name': away, 'price': prices[4], 'point': 0.5}]},
+                        {'key': 'totals', 'last_update': f"2025-03-{day:02d}T10:00:00Z", 'outcomes': [
+                            {'name': 'Over', 'price': prices[5], 'point': 2.5},
+                            {'name': 'Under', 'price': prices[6], 'point': 2.5}]}
+                    ]
+                })
+            match = {
+                'id': f"{seed:04d}{i:028x}",
+                'sport_key': 'soccer_epl',
+                'sport_title': 'EPL',
+                'commence_time': f"2025-03-{day:02d}T{hour:02d}:00:00Z",
+                'home_team': str(home),
+                'away_team': str(away),
+                'bookmakers': bookmakers
+            }
+            if i:
+                f.write(',')
+            json.dump(match, f)
+        f.write(']')
+
+
+def run_method(code, input_path, output_path):
+    """在子进程中运行一种处理方式，返回 (耗时秒, 峰值内存 MB)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SCRIPTS_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    body = code.format(input_path=input_path, output_path=output_path)
+    output = subprocess.run([sys.executable, '-c', RUN_CODE.format(body=body)], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    elapsed, max_rss = output.strip().splitlines()[-1].split()
+    # Linux 上 ru_maxrss 的单位为 KB
+    return float(elapsed), int(max_rss) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='赔率数据处理基准测试')
+    parser.add_argument('--matches', type=int, nargs='+', default=[500, 2000, 8000], help='合成数据的比赛数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'比赛数':>8}{'JSON(MB)':>10}{'赔率行数':>10}  {'方式':<12}{'耗时(秒)':>10}{'峰值内存(MB)':>14}")
+        for n_matches in args.matches:
+            input_path = os.path.join(temp_dir, f"odds_{n_matches}.json")
+            start = time.perf_counter()
+            generate_odds_feed(input_path, n_matches)
+            generate_time = time.perf_counter() - start
+            size_mb = os.path.getsize(input_path) / 1024 / 1024
+
+            outputs = []
+            for i, (label, code) in enumerate(METHODS.items()):
+                output_path = os.path.join(temp_dir, f"odds_{n_matches}_{i}.csv")
+                elapsed, max_rss = run_method(code, input_path, output_path)
+                outputs.append(output_path)
+                with open(output_path, 'rb') as f:
+                    n_rows = sum(1 for _ in f) - 1
+                print(f"{n_matches:>8}{size_mb:>10.1f}{n_rows:>10}  {label:<12}{elapsed:>10.2f}{max_rss:>14.1f}")
+
+            identical = all(filecmp.cmp(outputs[0], path, shallow=False) for path in outputs[1:])
+            print(f"{'':>8}输出 CSV {'一致' if identical else '不一致'}（生成数据 {generate_time:.1f} 秒）")
+            for path in outputs + [input_path]:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
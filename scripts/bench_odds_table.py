@@ -0,0 +1,155 @@
+"""
+基准测试：赔率宽表，每次对长表分组透视（原 backtest.load_h2h_odds）vs 一次构建、之后按场读取
+
+生成一份长格式赔率 CSV（比赛 × 博彩公司 × h2h / spreads / totals，部分博彩公司报其他盘口线），记录:
+    1. 原方式: 读取长表 CSV，pivot_table 得到 h2h 平均赔率（每次回测都要执行）
+    2. pandas 分组: 读取长表 CSV，选出主盘口线后对全部盘口选项 groupby 计算最高、中位数、平均和报价数
+    3. build_odds_table: 数组方式构建宽表并保存（长表变化后执行一次）
+    4. load_odds_table: 读取已保存的宽表
+并核对宽表与 pandas 分组的结果一致
+
+用法（在项目根目录运行）:
+    python scripts/bench_odds_table.py --matches 10000 --bookmakers 40
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_long_odds(path, n_matches, n_bookmakers, quote_rate=0.8, alt_rate=0.3, seed=0):
+    """
+    写出长格式赔率 CSV，每家博彩公司以 quote_rate 的概率为每场比赛的每个盘口报价，
+    spreads / totals 以 alt_rate 的概率报另一条盘口线（主线 ±0.5）
+    """
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"Team {i:03d}" for i in range(200)])
+    home = rng.integers(0, 200, n_matches)
+    away = (home + rng.integers(1, 200, n_matches)) % 200
+    outcomes = [('h2h', 'home'), ('h2h', 'Draw'), ('h2h', 'away'), ('spreads', 'home'), ('spreads', 'away'),
+                ('totals', 'Over'), ('totals', 'Under')]
+    market_of = np.array([m for m, _ in outcomes])
+
+    match = np.repeat(np.arange(n_matches), n_bookmakers * len(outcomes))
+    book = np.tile(np.repeat(np.arange(n_bookmakers), len(outcomes)), n_matches)
+    k = np.tile(np.arange(len(outcomes)), n_matches * n_bookmakers)
+    quoted = {market: rng.random((n_matches, n_bookmakers)) < quote_rate for market in ('h2h', 'spreads', 'totals')}
+    keep = np.select([market_of[k] == market for market in quoted],
+                     [quoted[market][match, book] for market in quoted], False)
+    match, book, k = match[keep], book[keep], k[keep]
+
+    # 每场比赛的主线，以及每家博彩公司在该盘口上的偏移（同一公司两个选项的线相同）
+    main_total = rng.choice([2.25, 2.5, 2.75], n_matches)
+    main_spread = rng.choice([-1.0, -0.5, 0.0, 0.5], n_matches)
+    shift = np.where(rng.random((n_matches, n_bookmakers)) < alt_rate,
+                     rng.choice([-0.5, 0.5], (n_matches, n_bookmakers)), 0.0)[match, book]
+    point = np.select([market_of[k] == 'totals', k == 3, k == 4],
+                      [main_total[match] + shift, main_spread[match] + shift, -(main_spread[match] + shift)], np.nan)
+
+    outcome = np.array([o for _, o in outcomes], dtype=object)[k]
+    outcome = np.where(outcome == 'home', teams[home[match]], outcome)
+    outcome = np.where(outcome == 'away', teams[away[match]], outcome)
+    days = pd.Timestamp('2025-03-01', tz='UTC') + pd.to_timedelta(np.arange(n_matches) % 60, unit='D')
+    pd.DataFrame({
+        'match_id': np.char.mod('%032x', match),
+        'home_team': teams[home[match]],
+        'away_team': teams[away[match]],
+        'commence_time': days[match].astype(str),
+        'sport': 'soccer_epl',
+        'bookmaker': np.char.mod('book%02d', book),
+        'market': market_of[k],
+        'outcome': outcome,
+        'price': rng.uniform(1.05, 8.0, len(k)).round(2),
+        'point': point,
+    }).to_csv(path, index=False)
+    return len(k)
+
+
+def pivot_h2h(odds_path):
+    """原 backtest.load_h2h_odds 的方式"""
+    odds = pd.read_csv(odds_path)
+    odds = odds[odds['market'] == 'h2h']
+    side = np.select([odds['outcome'] == odds['home_team'], odds['outcome'] == 'Draw',
+                      odds['outcome'] == odds['away_team']], ['home_odds', 'draw_odds', 'away_odds'], '')
+    odds = odds.assign(side=side)
+    odds = odds[odds['side'] != '']
+    table = odds.pivot_table(index=['match_id', 'home_team', 'away_team', 'commence_time'], columns='side',
+                             values='price', aggfunc='mean')
+    return table.reindex(columns=['home_odds', 'draw_odds', 'away_odds']).dropna().reset_index()
+
+
+def pandas_groupby(odds_path):
+    """
+    pandas 对全部盘口选项分组，结果为 {(盘口, 选项): 以 match_id 为索引的 DataFrame}
+
+    spreads / totals 先选出每场比赛报价最多的盘口线（相同时取较小的线），只统计该线的报价
+    """
+    odds = pd.read_csv(odds_path)
+    side = np.select([odds['outcome'] == odds['home_team'], odds['outcome'] == odds['away_team'],
+                      odds['outcome'] == 'Draw', odds['outcome'] == 'Over', odds['outcome'] == 'Under'],
+                     ['home', 'away', 'draw', 'over', 'under'], '')
+    odds = odds.assign(side=side)
+    odds['line'] = np.where((odds['market'] == 'spreads') & (odds['side'] == 'away'), -odds['point'], odds['point'])
+    sizes = odds[odds['market'] != 'h2h'].groupby(['match_id', 'market', 'line']).size().reset_index(name='n')
+    main = sizes.sort_values(['match_id', 'market', 'n', 'line'], ascending=[True, True, False, True])
+    main = main.drop_duplicates(['match_id', 'market'])[['match_id', 'market', 'line']]
+    odds = pd.concat([odds[odds['market'] == 'h2h'], odds.merge(main, on=['match_id', 'market', 'line'])])
+    grouped = odds.groupby(['market', 'side', 'match_id'])['price']
+    stats = grouped.agg(['max', 'median', 'mean', 'count'])
+    return {key: stats.xs(key, level=(0, 1)) for key in stats.index.droplevel(2).unique()}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='赔率宽表基准测试')
+    parser.add_argument('--matches', type=int, default=10000, help='比赛数')
+    parser.add_argument('--bookmakers', type=int, default=40, help='博彩公司数')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    from odds_table import SIDES, build_odds_table, load_odds_table, save_odds_table, table_path
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        odds_path = os.path.join(temp_dir, 'odds_data_BENCH2025.csv')
+        n_rows = generate_long_odds(odds_path, args.matches, args.bookmakers)
+        print(f"{args.matches} 场比赛 x {args.bookmakers} 家博彩公司: 长表 {n_rows} 行, "
+              f"{os.path.getsize(odds_path) / 1024 / 1024:.1f} MB")
+
+        _, pivot_time = timed(pivot_h2h, odds_path)
+        expected, groupby_time = timed(pandas_groupby, odds_path)
+        table, build_time = timed(build_odds_table, odds_path)
+        _, save_time = timed(save_odds_table, table, odds_path)
+        loaded, load_time = timed(load_odds_table, odds_path)
+
+        ok = True
+        for market, side in SIDES:
+            reference = expected[(market, side)].reindex(table.index)
+            for stat, col in zip(('best', 'median', 'mean', 'n'), ('max', 'median', 'mean', 'count')):
+                ok &= np.allclose(table[f"{market}_{side}_{stat}"], reference[col].fillna(0 if stat == 'n' else np.nan),
+                                  equal_nan=True)
+        numeric = table.columns[3:]
+        ok &= np.allclose(loaded[numeric].to_numpy(), table[numeric].to_numpy(), rtol=1e-6, equal_nan=True)
+
+        print(f"{'方式':<28}{'耗时(秒)':>10}")
+        print(f"{'原方式（h2h pivot_table）':<28}{pivot_time:>10.3f}")
+        print(f"{'pandas 全盘口 groupby':<28}{groupby_time:>10.3f}")
+        print(f"{'build_odds_table + 保存':<28}{build_time + save_time:>10.3f}")
+        print(f"{'load_odds_table':<28}{load_time:>10.3f}")
+        print(f"宽表 {table.shape[0]} 行 x {table.shape[1]} 列, {os.path.getsize(table_path(odds_path)) / 1024:.0f} KB, "
+              f"与 pandas 分组结果{'一致' if ok else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
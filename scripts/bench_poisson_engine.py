@@ -0,0 +1,74 @@
+"""
+基准测试：逐场 scipy 泊松循环 vs 批量向量化比分矩阵引擎
+
+用法:
+    python scripts/bench_poisson_engine.py --matches 120 --repeat 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy.stats import poisson
+
+from poisson_engine import predict_batch
+
+
+def legacy_predict(home_expected_goals, away_expected_goals, max_goals=5):
+    """原 ParlayPredictor.predict_match 中的逐场计算方式"""
+    score_probs = {}
+    for i in range(max_goals + 1):
+        for j in range(max_goals + 1):
+            score_probs[(i, j)] = (poisson.pmf(i, home_expected_goals) *
+                                  poisson.pmf(j, away_expected_goals))
+
+    home_win_prob = sum(prob for (i, j), prob in score_probs.items() if i > j)
+    draw_prob = sum(prob for (i, j), prob in score_probs.items() if i == j)
+    away_win_prob = sum(prob for (i, j), prob in score_probs.items() if i < j)
+    return home_win_prob, draw_prob, away_win_prob
+
+
+def best_time(func, repeat):
+    """多次运行取最短耗时"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='泊松比分矩阵引擎基准测试')
+    parser.add_argument('--matches', type=int, default=120, help='每张赛程的比赛数量')
+    parser.add_argument('--repeat', type=int, default=20, help='重复次数')
+    parser.add_argument('--max_goals', type=int, default=5, help='最大进球数')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    home_xg = rng.uniform(0.3, 3.0, args.matches)
+    away_xg = rng.uniform(0.2, 2.5, args.matches)
+
+    legacy_time, legacy_result = best_time(
+        lambda: [legacy_predict(h, a, args.max_goals) for h, a in zip(home_xg, away_xg)],
+        max(1, args.repeat // 10)
+    )
+    batch_time, batch_result = best_time(
+        lambda: predict_batch(home_xg, away_xg, args.max_goals),
+        args.repeat
+    )
+
+    legacy = np.array(legacy_result)
+    batch = np.column_stack([batch_result['home_win'], batch_result['draw'], batch_result['away_win']])
+    max_diff = np.abs(legacy - batch).max()
+
+    print(f"比赛数量: {args.matches}, 比分网格: {args.max_goals + 1}x{args.max_goals + 1}")
+    print(f"逐场循环: {legacy_time * 1000:.2f} ms")
+    print(f"批量引擎: {batch_time * 1000:.3f} ms")
+    print(f"加速比: {legacy_time / batch_time:.1f}x")
+    print(f"最大概率差异: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+基准测试：create_team_features 的 groupby 实现 vs 原逐队循环实现
+
+在合成的多联赛、多赛季数据集上（默认 50 个联赛 × 20 个赛季，每个联赛 20 支球队双循环）
+分别计算球队特征，比较耗时并检查两者结果完全一致
+
+用法（在项目根目录运行）:
+    python scripts/bench_team_features.py --leagues 50 --seasons 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import build_team_features
+
+
+def legacy_team_features(matches_df, lookback_matches=10):
+    """原逐队循环实现（去掉了写文件部分），作为基准和正确性参照"""
+    if 'match_date' in matches_df.columns:
+        matches_df = matches_df.sort_values('match_date')
+    
+    completed_matches = matches_df[matches_df['status'] == 'FINISHED'].copy()
+    all_teams = list(set(completed_matches['home_team'].unique()) | set(completed_matches['away_team'].unique()))
+    features = pd.DataFrame(index=all_teams)
+    
+    for team in all_teams:
+        team_home_matches = completed_matches[completed_matches['home_team'] == team].copy()
+        team_away_matches = completed_matches[completed_matches['away_team'] == team].copy()
+        
+        recent_home_matches = team_home_matches.tail(lookback_matches)
+        recent_away_matches = team_away_matches.tail(lookback_matches)
+        
+        if not recent_home_matches.empty:
+            features.loc[team, 'home_matches_played'] = len(recent_home_matches)
+            features.loc[team, 'home_goals_scored_avg'] = recent_home_matches['home_score'].mean()
+            features.loc[team, 'home_goals_conceded_avg'] = recent_home_matches['away_score'].mean()
+            features.loc[team, 'home_win_rate'] = (recent_home_matches['result'] == 'H').mean()
+            features.loc[team, 'home_draw_rate'] = (recent_home_matches['result'] == 'D').mean()
+            features.loc[team, 'home_loss_rate'] = (recent_home_matches['result'] == 'A').mean()
+        else:
+            for col in ['home_matches_played', 'home_goals_scored_avg', 'home_goals_conceded_avg',
+                        'home_win_rate', 'home_draw_rate', 'home_loss_rate']:
+                features.loc[team, col] = 0
+        
+        if not recent_away_matches.empty:
+            features.loc[team, 'away_matches_played'] = len(recent_away_matches)
+            features.loc[team, 'away_goals_scored_avg'] = recent_away_matches['away_score'].mean()
+            features.loc[team, 'away_goals_conceded_avg'] = recent_away_matches['home_score'].mean()
+            features.loc[team, 'away_win_rate'] = (recent_away_matches['result'] == 'A').mean()
+            features.loc[team, 'away_draw_rate'] = (recent_away_matches['result'] == 'D').mean()
+            features.loc[team, 'away_loss_rate'] = (recent_away_matches['result'] == 'H').mean()
+        else:
+            for col in ['away_matches_played', 'away_goals_scored_avg', 'away_goals_conceded_avg',
+                        'away_win_rate', 'away_draw_rate', 'away_loss_rate']:
+                features.loc[team, col] = 0
+        
+        all_team_matches = pd.concat([
+            team_home_matches[['match_date', 'home_score', 'away_score', 'result']].rename(
+                columns={'home_score': 'team_score', 'away_score': 'opponent_score'}
+            ).assign(is_home=True),
+            team_away_matches[['match_date', 'home_score', 'away_score', 'result']].rename(
+                columns={'away_score': 'team_score', 'home_score': 'opponent_score'}
+            ).assign(is_home=False)
+        ]).sort_values('match_date')
+        
+        recent_matches = all_team_matches.tail(lookback_matches)
+        
+        if not recent_matches.empty:
+            features.loc[team, 'total_matches_played'] = len(recent_matches)
+            features.loc[team, 'total_goals_scored_avg'] = recent_matches['team_score'].mean()
+            features.loc[team, 'total_goals_conceded_avg'] = recent_matches['opponent_score'].mean()
+            
+            home_wins = sum((recent_matches['is_home'] == True) & (recent_matches['result'] == 'H'))
+            away_wins = sum((recent_matches['is_home'] == False) & (recent_matches['result'] == 'A'))
+            features.loc[team, 'overall_win_rate'] = (home_wins + away_wins) / len(recent_matches)
+            
+            last_5_matches = recent_matches.tail(5)
+            points = 0
+            for _, match in last_5_matches.iterrows():
+                if (match['is_home'] and match['result'] == 'H') or (not match['is_home'] and match['result'] == 'A'):
+                    points += 3
+                elif match['result'] == 'D':
+                    points += 1
+            features.loc[team, 'recent_form'] = points / (len(last_5_matches) * 3)
+        else:
+            for col in ['total_matches_played', 'total_goals_scored_avg', 'total_goals_conceded_avg',
+                        'overall_win_rate', 'recent_form']:
+                features.loc[team, col] = 0
+    
+    return features
+
+
+def synthetic_matches(leagues=50, seasons=20, teams_per_league=20, unfinished_rate=0.02, seed=0):
+    """
+    生成合成比赛数据：每个联赛每个赛季双循环，每轮一个比赛日，进球数按泊松分布抽样
+
+    列与 process_match_data 的输出一致
+    """
+    rng = np.random.default_rng(seed)
+    
+    # 双循环赛程（圆圈法），每轮每支球队恰好一场比赛
+    half = []
+    ring = list(range(teams_per_league))
+    for _ in range(teams_per_league - 1):
+        half.append([(ring[i], ring[-1 - i]) for i in range(teams_per_league // 2)])
+        ring = [ring[0]] + [ring[-1]] + ring[1:-1]
+    rounds = half + [[(away, home) for home, away in fixtures] for fixtures in half]
+    round_home = np.array([[home for home, _ in fixtures] for fixtures in rounds]).ravel()
+    round_away = np.array([[away for _, away in fixtures] for fixtures in rounds]).ravel()
+    round_index = np.repeat(np.arange(len(rounds)), teams_per_league // 2)
+    
+    frames = []
+    match_id = 0
+    for league in range(leagues):
+        strength = rng.normal(0, 0.3, teams_per_league)
+        names = np.array([f"L{league:02d} Team {team:02d}" for team in range(teams_per_league)])
+        for season in range(seasons):
+            season_start = np.datetime64(f"{2000 + season}-08-01T15:00")
+            n = len(round_home)
+            home_goals = rng.poisson(np.exp(0.3 + strength[round_home] - strength[round_away]))
+            away_goals = rng.poisson(np.exp(0.1 + strength[round_away] - strength[round_home]))
+            finished = rng.random(n) >= unfinished_rate
+            result = np.where(home_goals > away_goals, 'H', np.where(home_goals == away_goals, 'D', 'A'))
+            frames.append(pd.DataFrame({
+                'match_id': np.arange(match_id, match_id + n),
+                'home_team': names[round_home],
+                'away_team': names[round_away],
+                'competition': f"League {league:02d}",
+                'match_date': (season_start + round_index * np.timedelta64(7, 'D')
+                               + np.timedelta64(league, 'm')).astype(str),
+                'status': np.where(finished, 'FINISHED', 'SCHEDULED'),
+                'home_score': np.where(finished, home_goals, np.nan),
+                'away_score': np.where(finished, away_goals, np.nan),
+                'result': np.where(finished, result, None)
+            }))
+            match_id += n
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='球队特征计算基准测试')
+    parser.add_argument('--leagues', type=int, default=50, help='联赛数')
+    parser.add_argument('--seasons', type=int, default=20, help='每个联赛的赛季数')
+    parser.add_argument('--skip_legacy', action='store_true', help='不运行原实现（只测新实现）')
+    args = parser.parse_args()
+
+    matches_df = synthetic_matches(args.leagues, args.seasons)
+    print(f"合成数据: {len(matches_df)}场比赛, "
+          f"{matches_df['home_team'].nunique()}支球队")
+
+    start = time.perf_counter()
+    features = build_team_features(matches_df)
+    fast = time.perf_counter() - start
+    print(f"groupby 实现: {fast:.3f} 秒")
+
+    if args.skip_legacy:
+        return
+
+    start = time.perf_counter()
+    expected = legacy_team_features(matches_df)
+    slow = time.perf_counter() - start
+    print(f"原逐队实现: {slow:.3f} 秒 (加速 {slow / fast:.1f} 倍)")
+
+    same = (list(features.columns) == list(expected.columns)
+            and list(features.index) == list(expected.index)
+            and np.array_equal(features.to_numpy(), expected.to_numpy(), equal_nan=True))
+    print(f"结果一致: {'是' if same else '否'}")
+
+
+if __name__ == "__main__":
+    main()
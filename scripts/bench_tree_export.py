@@ -0,0 +1,142 @@
+"""
+基准测试：sklearn pickle 模型 vs tree_export 导出的纯 NumPy 模型
+
+1. 冷启动：在新的 Python 进程中导入、加载模型并预测一批比赛，模拟 Vercel 函数冷启动
+2. 单批延迟：同一进程内不同批量大小的 predict_proba 耗时
+3. 核对两者的最大概率差
+
+用法（在项目根目录运行）:
+    python scripts/bench_tree_export.py --matches data/matches_data_PL2024.csv
+    python scripts/bench_tree_export.py --model data/models/match_model_PL2024.pkl --matches data/matches_data_PL2024.csv
+"""
+
+import argparse
+import os
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SKLEARN_CODE = """
+import time
+start = time.perf_counter()
+import pickle
+import numpy as np
+with open({model_path!r}, 'rb') as f:
+    model_data = pickle.load(f)
+X = np.load({rows_path!r})
+model_data['model'].predict_proba(model_data['scaler'].transform(X))
+print(time.perf_counter() - start)
+"""
+
+EXPORT_CODE = """
+import time
+start = time.perf_counter()
+import numpy as np
+from tree_export import load_exported_model
+model_data = load_exported_model({model_path!r})
+X = np.load({rows_path!r})
+model_data['model'].predict_proba(model_data['scaler'].transform(X))
+print(time.perf_counter() - start)
+"""
+
+BATCH_SIZES = [1, 32, 380, 10000]
+
+
+def cold_start(code):
+    """在子进程中测量一次冷启动，返回 (进程总耗时, 进程内导入+加载+预测耗时)"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SCRIPTS_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                            check=True).stdout
+    wall = time.perf_counter() - start
+    return wall, float(output.strip().splitlines()[-1])
+
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def train_default_model(matches_paths, model_path):
+    """没有指定模型时，用比赛数据训练一个默认参数的随机森林"""
+    from sklearn.preprocessing import StandardScaler
+
+    from model_search import build_estimator, load_training_frame
+
+    features_df = load_training_frame(matches_paths)
+    features_df = features_df[features_df['status'] == 'FINISHED']
+    feature_cols = [col for col in features_df.columns
+                    if col.startswith(('home_', 'away_'))
+                    and col not in ['home_team', 'away_team', 'home_score', 'away_score']]
+    X = features_df[feature_cols].fillna(0).to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    model = build_estimator('rf').fit(scaler.transform(X), features_df['result'].to_numpy())
+    with open(model_path, 'wb') as f:
+        pickle.dump({'model': model, 'feature_cols': feature_cols, 'scaler': scaler}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='树集成导出模型基准测试')
+    parser.add_argument('--model', type=str, default=None, help='train_match_result_model 保存的 .pkl（默认现场训练）')
+    parser.add_argument('--matches', type=str, nargs='+', required=True, help='比赛数据 CSV（生成测试特征）')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    from model_search import load_training_frame
+    from tree_export import check_export, export_tree_model, load_exported_model
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = args.model
+        if model_path is None:
+            model_path = os.path.join(temp_dir, 'model.pkl')
+            train_default_model(args.matches, model_path)
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
+        export_path = export_tree_model(model_data, os.path.join(temp_dir, 'model.npz'))
+        exported = load_exported_model(export_path)
+
+        features_df = load_training_frame(args.matches)
+        X = features_df[model_data['feature_cols']].fillna(0).to_numpy(dtype=np.float64)
+        rows_path = os.path.join(temp_dir, 'rows.npy')
+        np.save(rows_path, X)
+
+        print(f"模型文件: pickle {os.path.getsize(model_path) / 1024:.1f} KB, "
+              f"npz {os.path.getsize(export_path) / 1024:.1f} KB")
+        print(f"{len(X)} 场比赛上的最大概率差: {check_export(model_data, exported, X):.3e}")
+
+        print("\n冷启动（导入 + 加载 + 预测一批）")
+        for label, code in (('sklearn pickle', SKLEARN_CODE), ('NumPy 导出', EXPORT_CODE)):
+            runs = [cold_start(code.format(model_path=model_path if code is SKLEARN_CODE else export_path,
+                                           rows_path=rows_path))
+                    for _ in range(args.repeat)]
+            wall = statistics.median(run[0] for run in runs)
+            inner = statistics.median(run[1] for run in runs)
+            print(f"{label}: 进程总耗时 {wall * 1000:.1f} ms, 导入+加载+预测 {inner * 1000:.1f} ms")
+
+        print("\n单批 predict_proba 延迟 (ms)")
+        print(f"{'批量':>8}{'sklearn':>12}{'NumPy':>12}")
+        rng = np.random.default_rng(0)
+        for size in BATCH_SIZES:
+            batch = X[rng.integers(0, len(X), size)]
+            sklearn_time = time_call(
+                lambda: model_data['model'].predict_proba(model_data['scaler'].transform(batch)), args.repeat)
+            export_time = time_call(
+                lambda: exported['model'].predict_proba(exported['scaler'].transform(batch)), args.repeat)
+            print(f"{size:>8}{sklearn_time * 1000:>12.2f}{export_time * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,24 @@
 import pandas as pd
-import json
 import os
 
+from feature_store import export_feature_json, save_feature_store, store_path
+
 # 联赛代码
 leagues = ["PL", "PD", "SA", "BL1", "FL1"]
 
+# 前端读取的 data/features_*.json 由列式存储导出（线上部署不含 numpy，只能返回静态文件）；
+# 写入存储时会自动导出，本脚本用于重新导出全部联赛，只有旧 CSV 的联赛先迁移为列式存储
 for league in leagues:
     csv_file = f"data/features_{league}2024.csv"
     json_file = f"data/features_{league}2024.json"
     
-    if os.path.exists(csv_file):
-        # 读取CSV文件
-        df = pd.read_csv(csv_file, index_col=0)
-        
-        # 转换为JSON格式
-        data = {}
-        for team in df.index:
-            data[team] = df.loc[team].to_dict()
-        
-        # 保存为JSON文件
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
-        print(f"已转换 {csv_file} 到 {json_file}")
+    if not os.path.exists(store_path(csv_file)) and os.path.exists(csv_file):
+        save_feature_store(pd.read_csv(csv_file, index_col=0), csv_file)
+        print(f"已将 {csv_file} 迁移为 {store_path(csv_file)}")
+    
+    exported = export_feature_json(csv_file)
+    if exported is not None:
+        json_file, version = exported
+        print(f"已导出 {store_path(csv_file)}（版本 {version}）到 {json_file}")
     else:
-        print(f"文件不存在: {csv_file}") 
\ No newline at end of file
+        print(f"文件不存在: {store_path(csv_file)}")
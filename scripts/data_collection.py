@@ -4,95 +4,195 @@ import json
 import pandas as pd
 from datetime import datetime
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from config import *
+from http_cache import CachedSession
 
-def ensure_data_dir():
+# 同时进行的请求数（Football-Data.org 免费账户每分钟限 10 次请求，可按账户等级调整）
+DEFAULT_CONCURRENCY = 4
+
+def ensure_data_dir(data_dir=None):
     """确保数据目录存在"""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+    data_dir = data_dir or DATA_DIR
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+def save_raw_json(path, data):
+    """原子地写出原始 JSON（先写临时文件再替换）"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+class DataCollector:
+    """
+    并发、带缓存的数据收集器
+
+    所有请求共用一个保持连接的 Session（http_cache.CachedSession），响应缓存在 <data_dir>/http_cache（不提交），
+    再次请求时发送条件请求：数据没有变化时服务器返回 304，原始文件不重写
+
+    参数:
+        data_dir: 原始数据输出目录，默认为 config 中的 DATA_DIR
+        concurrency: 最大并发请求数
+        max_age: 缓存不超过 max_age 秒时不发送请求（默认每次都发送条件请求）
+        football_data_url / odds_api_url: API 地址，默认为 config 中的配置
+    """
+
+    def __init__(self, data_dir=None, concurrency=DEFAULT_CONCURRENCY, cache_dir=None, max_age=None,
+                 football_data_url=None, odds_api_url=None):
+        self.data_dir = data_dir or DATA_DIR
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self.football_data_url = football_data_url or FOOTBALL_DATA_BASE_URL
+        self.odds_api_url = odds_api_url or ODDS_API_BASE_URL
+        self.client = CachedSession(cache_dir=cache_dir or os.path.join(self.data_dir, 'http_cache'),
+                                    pool_size=concurrency)
+
+    def _fetch(self, url, params=None, headers=None, raw_path=None):
+        """请求一个接口；数据有变化（或原始文件不存在）时写出原始文件"""
+        result = self.client.get_json(url, params=params, headers=headers, max_age=self.max_age)
+        if result['data'] is not None and raw_path is not None:
+            if result['status'] == 'fetched' or not os.path.exists(raw_path):
+                ensure_data_dir(self.data_dir)
+                save_raw_json(raw_path, result['data'])
+        result['raw_path'] = raw_path
+        return result
+
+    def fetch_matches(self, league_id=DEFAULT_LEAGUE, season=DEFAULT_SEASON):
+        """从Football-Data.org获取比赛数据"""
+        result = self._fetch(f"{self.football_data_url}/competitions/{league_id}/matches",
+                             params={"season": season},
+                             headers={"X-Auth-Token": FOOTBALL_DATA_API_KEY},
+                             raw_path=os.path.join(self.data_dir, f"raw_matches_{league_id}_{season}.json"))
+        if result['data'] is not None:
+            print(f"{league_id}联赛{season}赛季: 获取{len(result['data']['matches'])}场比赛数据 ({result['status']})")
+        else:
+            print(f"获取{league_id}联赛{season}赛季比赛数据失败: {result['error']}")
+        return result
+
+    def fetch_odds(self, sport="soccer"):
+        """从Odds API获取赔率数据"""
+        params = {
+            "apiKey": ODDS_API_KEY,
+            "regions": "uk,eu,us",
+            "markets": "h2h,spreads,totals",
+            "oddsFormat": "decimal"
+        }
+        # 赔率快照按时间命名，数据没有变化时不写新快照
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        result = self.client.get_json(f"{self.odds_api_url}/sports/{sport}/odds", params=params,
+                                      max_age=self.max_age)
+        result['raw_path'] = None
+        if result['status'] == 'fetched':
+            ensure_data_dir(self.data_dir)
+            result['raw_path'] = os.path.join(self.data_dir, f"raw_odds_{timestamp}.json")
+            save_raw_json(result['raw_path'], result['data'])
+        if result['data'] is not None:
+            print(f"获取{len(result['data'])}场比赛的赔率数据 ({result['status']})")
+        else:
+            print(f"获取赔率数据失败: {result['error']}")
+        return result
+
+    def fetch_teams(self, league_id=DEFAULT_LEAGUE):
+        """获取球队详细信息"""
+        result = self._fetch(f"{self.football_data_url}/competitions/{league_id}/teams",
+                             headers={"X-Auth-Token": FOOTBALL_DATA_API_KEY},
+                             raw_path=os.path.join(self.data_dir, f"raw_teams_{league_id}.json"))
+        if result['data'] is not None:
+            print(f"{league_id}联赛: 获取{len(result['data']['teams'])}支球队数据 ({result['status']})")
+        else:
+            print(f"获取{league_id}联赛球队数据失败: {result['error']}")
+        return result
+
+    def collect(self, leagues, seasons, sport="soccer", teams=True):
+        """
+        并发获取多个联赛、赛季的数据
+
+        参数:
+            sport: 赔率的 sport 键，None 表示不获取赔率
+            teams: 是否获取各联赛的球队数据
+        返回:
+            字典 matches {(联赛, 赛季): 数据} / teams {联赛: 数据} / odds / report（每个请求的状态和耗时）
+        """
+        tasks = [('matches', (league, season)) for league in leagues for season in seasons]
+        if teams:
+            tasks += [('teams', league) for league in leagues]
+        if sport:
+            tasks.append(('odds', sport))
+
+        def run(task):
+            kind, key = task
+            if kind == 'matches':
+                return self.fetch_matches(*key)
+            if kind == 'teams':
+                return self.fetch_teams(key)
+            return self.fetch_odds(key)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(run, tasks))
+        wall_time = time.perf_counter() - start
+
+        collected = {"matches": {}, "teams": {}, "odds": None, "report": [], "wall_time": wall_time}
+        for (kind, key), result in zip(tasks, results):
+            if kind == 'odds':
+                collected['odds'] = result['data']
+            else:
+                collected[kind][key] = result['data']
+            collected['report'].append({'kind': kind, 'key': key, 'status': result['status'],
+                                        'elapsed': result['elapsed'], 'raw_path': result['raw_path']})
+        counts = {status: sum(1 for item in collected['report'] if item['status'] == status)
+                  for status in ('fetched', 'not_modified', 'cached', 'error')}
+        print(f"{len(tasks)} 个请求完成，耗时 {wall_time:.2f} 秒: 新数据 {counts['fetched']}, "
+              f"未变化 {counts['not_modified']}, 缓存 {counts['cached']}, 失败 {counts['error']}")
+        return collected
+
+# 进程内共享的收集器，首次使用时创建
+_default_collector = None
+
+def get_default_collector():
+    global _default_collector
+    if _default_collector is None:
+        _default_collector = DataCollector()
+    return _default_collector
 
 def fetch_matches_data(league_id=DEFAULT_LEAGUE, season=DEFAULT_SEASON):
     """从Football-Data.org获取比赛数据"""
-    url = f"{FOOTBALL_DATA_BASE_URL}/competitions/{league_id}/matches?season={season}"
-    headers = {"X-Auth-Token": FOOTBALL_DATA_API_KEY}
-    
-    print(f"正在获取{league_id}联赛{season}赛季的比赛数据...")
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        data = response.json()
-        # 保存原始数据
-        ensure_data_dir()
-        with open(f"{DATA_DIR}/raw_matches_{league_id}_{season}.json", "w") as f:
-            json.dump(data, f)
-        print(f"成功获取{len(data['matches'])}场比赛数据")
-        return data
-    else:
-        print(f"获取比赛数据失败: {response.status_code}")
-        print(response.text)
-        return None
+    return get_default_collector().fetch_matches(league_id, season)['data']
 
 def fetch_odds_data(sport="soccer"):
     """从Odds API获取赔率数据"""
-    url = f"{ODDS_API_BASE_URL}/sports/{sport}/odds"
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": "uk,eu,us",
-        "markets": "h2h,spreads,totals",
-        "oddsFormat": "decimal"
-    }
-    
-    print("正在获取最新赔率数据...")
-    response = requests.get(url, params=params)
-    
-    if response.status_code == 200:
-        data = response.json()
-        # 保存原始数据
-        ensure_data_dir()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(f"{DATA_DIR}/raw_odds_{timestamp}.json", "w") as f:
-            json.dump(data, f)
-        print(f"成功获取{len(data)}场比赛的赔率数据")
-        return data
-    else:
-        print(f"获取赔率数据失败: {response.status_code}")
-        print(response.text)
-        return None
+    return get_default_collector().fetch_odds(sport)['data']
 
 def fetch_team_data(league_id=DEFAULT_LEAGUE):
     """获取球队详细信息"""
-    url = f"{FOOTBALL_DATA_BASE_URL}/competitions/{league_id}/teams"
-    headers = {"X-Auth-Token": FOOTBALL_DATA_API_KEY}
-    
-    print(f"正在获取{league_id}联赛的球队数据...")
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        data = response.json()
-        # 保存原始数据
-        ensure_data_dir()
-        with open(f"{DATA_DIR}/raw_teams_{league_id}.json", "w") as f:
-            json.dump(data, f)
-        print(f"成功获取{len(data['teams'])}支球队数据")
-        return data
-    else:
-        print(f"获取球队数据失败: {response.status_code}")
-        print(response.text)
-        return None
+    return get_default_collector().fetch_teams(league_id)['data']
 
 def collect_all_data():
-    """收集所有需要的数据"""
-    matches_data = fetch_matches_data()
-    odds_data = fetch_odds_data()
-    team_data = fetch_team_data()
-    
+    """收集所有需要的数据（比赛、赔率、球队三个请求并发执行）"""
+    collected = get_default_collector().collect([DEFAULT_LEAGUE], [DEFAULT_SEASON])
+
     return {
-        "matches": matches_data,
-        "odds": odds_data,
-        "teams": team_data
+        "matches": collected['matches'][(DEFAULT_LEAGUE, DEFAULT_SEASON)],
+        "odds": collected['odds'],
+        "teams": collected['teams'][DEFAULT_LEAGUE]
     }
 
+def main():
+    parser = argparse.ArgumentParser(description='并发收集比赛、球队和赔率数据')
+    parser.add_argument('--leagues', type=str, nargs='+', default=[DEFAULT_LEAGUE], help='联赛代码')
+    parser.add_argument('--seasons', type=int, nargs='+', default=[DEFAULT_SEASON], help='赛季')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='最大并发请求数')
+    parser.add_argument('--max_age', type=float, default=None, help='缓存不超过该秒数时不发送请求')
+    parser.add_argument('--no_odds', action='store_true', help='不获取赔率数据')
+    parser.add_argument('--no_teams', action='store_true', help='不获取球队数据')
+    args = parser.parse_args()
+
+    collector = DataCollector(concurrency=args.concurrency, max_age=args.max_age)
+    collector.collect(args.leagues, args.seasons, sport=None if args.no_odds else "soccer",
+                      teams=not args.no_teams)
+    print("数据收集完成")
+
 if __name__ == "__main__":
-    # 测试数据收集功能
-    data = collect_all_data()
-    print("数据收集完成")
\ No newline at end of file
+    main()
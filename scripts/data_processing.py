@@ -4,8 +4,13 @@ import os
 from datetime import datetime
 from config import *
 
-def process_match_data(matches_data):
-    """处理比赛数据"""
+def process_match_data(matches_data, output_path=None):
+    """
+    处理比赛数据
+
+    参数:
+        output_path: 输出 CSV 路径，默认为 config 中的 MATCHES_DATA_FILE
+    """
     if not matches_data or 'matches' not in matches_data:
         print("无效的比赛数据")
         return None
@@ -62,66 +67,50 @@ def process_match_data(matches_data):
     df['match_date'] = pd.to_datetime(df['match_date'])
     
     # 保存处理后的数据
-    ensure_data_dir()
-    df.to_csv(MATCHES_DATA_FILE, index=False)
-    print(f"处理后的比赛数据已保存至 {MATCHES_DATA_FILE}")
+    output_path = output_path or MATCHES_DATA_FILE
+    ensure_data_dir(os.path.dirname(output_path))
+    df.to_csv(output_path, index=False)
+    print(f"处理后的比赛数据已保存至 {output_path}")
     
     return df
 
-def process_odds_data(odds_data):
-    """处理赔率数据"""
+def process_odds_data(odds_data, output_path=None):
+    """
+    处理赔率数据
+
+    参数:
+        odds_data: The Odds API 返回的比赛列表，或 raw_odds_*.json 文件路径（逐场流式解析）
+        output_path: 输出 CSV 路径，默认为 config 中的 ODDS_DATA_FILE
+    返回:
+        DataFrame，字符串列为 Categorical（见 odds_columns.py）
+    """
+    from odds_columns import read_odds_columns
+
     if not odds_data:
         print("无效的赔率数据")
         return None
-        
-    processed_data = []
-    
-    for match in odds_data:
-        # 基本比赛信息
-        match_info = {
-            'match_id': match['id'],
-            'home_team': match['home_team'],
-            'away_team': match['away_team'],
-            'commence_time': match['commence_time'],
-            'sport': match['sport_key']
-        }
-        
-        # 处理各个博彩公司的赔率
-        for bookmaker in match['bookmakers']:
-            bookmaker_name = bookmaker['key']
-            
-            for market in bookmaker['markets']:
-                market_type = market['key']
-                
-                for outcome in market['outcomes']:
-                    outcome_name = outcome['name']
-                    price = outcome['price']
-                    
-                    # 创建赔率记录
-                    odds_record = match_info.copy()
-                    odds_record['bookmaker'] = bookmaker_name
-                    odds_record['market'] = market_type
-                    odds_record['outcome'] = outcome_name
-                    odds_record['price'] = price
-                    
-                    processed_data.append(odds_record)
-    
-    df = pd.DataFrame(processed_data)
-    
-    # 转换日期格式
-    df['commence_time'] = pd.to_datetime(df['commence_time'])
+
+    columns = read_odds_columns(odds_data)
+    df = columns.to_frame()
     
     # 保存处理后的数据
-    ensure_data_dir()
-    df.to_csv(ODDS_DATA_FILE, index=False)
-    print(f"处理后的赔率数据已保存至 {ODDS_DATA_FILE}")
+    output_path = output_path or ODDS_DATA_FILE
+    ensure_data_dir(os.path.dirname(output_path))
+    columns.to_csv(output_path)
+    print(f"处理后的赔率数据已保存至 {output_path}")
+
+    # 同时保存每场比赛一行的赔率宽表，定价和回测直接读取
+    from odds_table import build_odds_table, save_odds_table
+    table_path, _ = save_odds_table(build_odds_table(df), output_path)
+    print(f"赔率宽表已保存至 {table_path}")
     
     return df
 
-def ensure_data_dir():
+def ensure_data_dir(data_dir=None):
     """确保数据目录存在"""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+    data_dir = data_dir or DATA_DIR
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
 
 def load_or_process_data(raw_data=None):
     """加载或处理数据"""
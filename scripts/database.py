@@ -14,6 +14,11 @@ from typing import Dict, Any, Optional, List
 import json
 import contextlib # 导入 contextlib
 
+try:
+    from scripts.odds_encoding import snapshots_from_matches, GOAL_LINE_NONE, MARKETS, PRICE_SCALE
+except ImportError:
+    from odds_encoding import snapshots_from_matches, GOAL_LINE_NONE, MARKETS, PRICE_SCALE
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -145,9 +150,25 @@ class PredictionDatabase:
             );
             """
             
+            # 创建赔率历史表（只追加，按比赛日期分区，分区由 _ensure_odds_partitions 按月创建）
+            # 赔率以 赔率 x 100 的整数保存，market 为 odds_encoding.MARKETS 中的序号
+            create_odds_history_table = """
+            CREATE TABLE IF NOT EXISTS odds_history (
+                match_id VARCHAR(100) NOT NULL,
+                match_date DATE NOT NULL,
+                captured_at TIMESTAMP NOT NULL,
+                market SMALLINT NOT NULL,
+                home_odds SMALLINT NOT NULL,
+                draw_odds SMALLINT NOT NULL,
+                away_odds SMALLINT NOT NULL,
+                goal_line SMALLINT
+            ) PARTITION BY RANGE (match_date);
+            """
+            
             cursor.execute(create_users_table)
             cursor.execute(create_predictions_table)
             cursor.execute(create_daily_matches_table)
+            cursor.execute(create_odds_history_table)
             
             # 创建索引
             create_index_sql = [
@@ -163,7 +184,10 @@ class PredictionDatabase:
                 "CREATE INDEX IF NOT EXISTS idx_daily_matches_league ON daily_matches(league_name);",
                 "CREATE INDEX IF NOT EXISTS idx_daily_matches_status ON daily_matches(match_status);",
                 "CREATE INDEX IF NOT EXISTS idx_daily_matches_active ON daily_matches(is_active);",
-                "CREATE INDEX IF NOT EXISTS idx_daily_matches_datetime ON daily_matches(match_datetime);"
+                "CREATE INDEX IF NOT EXISTS idx_daily_matches_datetime ON daily_matches(match_datetime);",
+                
+                # 赔率历史索引（自动建立在每个分区上）
+                "CREATE INDEX IF NOT EXISTS idx_odds_history_match_time ON odds_history(match_id, captured_at);"
             ]
             
             for sql in create_index_sql:
@@ -560,11 +584,21 @@ class PredictionDatabase:
                         stats['skipped'] += 1
                         continue
                 
+                # 记录赔率变动（失败时只回滚赔率历史，不影响比赛数据）
+                cursor.execute("SAVEPOINT odds_history")
+                try:
+                    stats['odds_snapshots'] = self.append_odds_history(cursor, matches_data)
+                    cursor.execute("RELEASE SAVEPOINT odds_history")
+                except Exception as history_error:
+                    cursor.execute("ROLLBACK TO SAVEPOINT odds_history")
+                    logger.warning(f"记录赔率历史失败: {history_error}")
+                
                 # conn.commit() # 由上下文管理器处理
                 cursor.close()
                 # conn.close() # 由上下文管理器处理
                 
-                logger.info(f"每日比赛数据保存完成 - 新增:{stats['inserted']}, 更新:{stats['updated']}, 跳过:{stats['skipped']}")
+                logger.info(f"每日比赛数据保存完成 - 新增:{stats['inserted']}, 更新:{stats['updated']}, 跳过:{stats['skipped']}, "
+                            f"赔率快照:{stats.get('odds_snapshots', 0)}")
                 return stats
                 
         except Exception as e:
@@ -574,6 +608,169 @@ class PredictionDatabase:
             #     conn.close()
             return stats
     
+    def _ensure_odds_partitions(self, cursor, match_dates: List[str]) -> None:
+        """为比赛日期所在的月份创建赔率历史分区"""
+        for month in sorted({date[:7] for date in match_dates}):
+            start = datetime.strptime(f"{month}-01", '%Y-%m-%d').date()
+            end = (start + timedelta(days=32)).replace(day=1)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS odds_history_{start:%Y_%m} PARTITION OF odds_history "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+    
+    def append_odds_history(self, cursor, matches_data: List[Dict[str, Any]],
+                            captured_at: Optional[datetime] = None) -> int:
+        """
+        追加赔率快照：一条 SQL 与每场比赛最近一次记录比较，只插入赔率有变化（或第一次出现）的比赛
+        
+        Args:
+            cursor: 当前事务的游标
+            matches_data: 比赛数据列表（与 save_daily_matches 相同）
+            captured_at: 记录时间，默认为当前时间
+            
+        Returns:
+            追加的快照数
+        """
+        snapshots, _ = snapshots_from_matches(matches_data)
+        if not snapshots['match_id']:
+            return 0
+        self._ensure_odds_partitions(cursor, snapshots['match_date'])
+        
+        append_sql = """
+        INSERT INTO odds_history (
+            match_id, match_date, captured_at, market, home_odds, draw_odds, away_odds, goal_line
+        )
+        SELECT s.match_id, s.match_date, %s, s.market, s.home_odds, s.draw_odds, s.away_odds, s.goal_line
+        FROM unnest(%s::varchar[], %s::date[], %s::smallint[], %s::smallint[], %s::smallint[],
+                    %s::smallint[], %s::smallint[])
+            AS s(match_id, match_date, market, home_odds, draw_odds, away_odds, goal_line)
+        LEFT JOIN LATERAL (
+            SELECT h.market, h.home_odds, h.draw_odds, h.away_odds, h.goal_line
+            FROM odds_history h
+            WHERE h.match_id = s.match_id AND h.match_date = s.match_date
+            ORDER BY h.captured_at DESC
+            LIMIT 1
+        ) latest ON TRUE
+        WHERE (latest.market, latest.home_odds, latest.draw_odds, latest.away_odds, latest.goal_line)
+            IS DISTINCT FROM (s.market, s.home_odds, s.draw_odds, s.away_odds, s.goal_line)
+        """
+        
+        cursor.execute(append_sql, (
+            captured_at or datetime.now(),
+            snapshots['match_id'],
+            snapshots['match_date'],
+            snapshots['market'],
+            snapshots['home'],
+            snapshots['draw'],
+            snapshots['away'],
+            [None if goal_line == GOAL_LINE_NONE else goal_line for goal_line in snapshots['goal_line']]
+        ))
+        return cursor.rowcount
+    
+    @staticmethod
+    def _decode_odds_row(row: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+        """把赔率历史查询结果中的整数赔率还原为浮点数"""
+        decoded = {}
+        for key in ('home_odds', 'draw_odds', 'away_odds'):
+            value = row.get(f"{prefix}{key}")
+            decoded[f"{prefix}{key}"] = value / PRICE_SCALE if value else None
+        market = row.get(f"{prefix}market")
+        decoded[f"{prefix}market"] = MARKETS[market] if market is not None else None
+        decoded[f"{prefix}captured_at"] = row.get(f"{prefix}captured_at")
+        decoded[f"{prefix}goal_line"] = row.get(f"{prefix}goal_line")
+        return decoded
+    
+    def get_odds_as_of(self, match_ids: List[str], at: datetime) -> List[Dict[str, Any]]:
+        """
+        一次查询多场比赛在某个时刻（含）的赔率
+        
+        Args:
+            match_ids: 比赛ID列表
+            at: 查询时刻
+            
+        Returns:
+            每场比赛一个字典（没有记录时赔率为 None）
+        """
+        query_sql = """
+        SELECT s.match_id, h.captured_at, h.market, h.home_odds, h.draw_odds, h.away_odds, h.goal_line
+        FROM unnest(%s::varchar[]) AS s(match_id)
+        LEFT JOIN LATERAL (
+            SELECT captured_at, market, home_odds, draw_odds, away_odds, goal_line
+            FROM odds_history
+            WHERE match_id = s.match_id AND captured_at <= %s
+            ORDER BY captured_at DESC
+            LIMIT 1
+        ) h ON TRUE
+        """
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+                cursor.execute(query_sql, (list(match_ids), at))
+                rows = cursor.fetchall()
+                cursor.close()
+                return [{'match_id': row['match_id'], **self._decode_odds_row(row)} for row in rows]
+        except Exception as e:
+            logger.error(f"查询历史赔率失败: {e}")
+            return []
+    
+    def get_opening_closing_odds(self, match_ids: List[str],
+                                 before: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        一次查询多场比赛的初盘和终盘
+        
+        Args:
+            match_ids: 比赛ID列表
+            before: 终盘取该时刻（含）之前的最后一条记录，默认取最后一条
+            
+        Returns:
+            每场比赛一个字典: opening_* / closing_* / n_snapshots
+        """
+        query_sql = """
+        SELECT s.match_id,
+            o.captured_at AS opening_captured_at, o.market AS opening_market,
+            o.home_odds AS opening_home_odds, o.draw_odds AS opening_draw_odds,
+            o.away_odds AS opening_away_odds, o.goal_line AS opening_goal_line,
+            c.captured_at AS closing_captured_at, c.market AS closing_market,
+            c.home_odds AS closing_home_odds, c.draw_odds AS closing_draw_odds,
+            c.away_odds AS closing_away_odds, c.goal_line AS closing_goal_line,
+            n.n_snapshots
+        FROM unnest(%(match_ids)s::varchar[]) AS s(match_id)
+        LEFT JOIN LATERAL (
+            SELECT captured_at, market, home_odds, draw_odds, away_odds, goal_line
+            FROM odds_history
+            WHERE match_id = s.match_id AND captured_at <= COALESCE(%(before)s::timestamp, 'infinity')
+            ORDER BY captured_at ASC
+            LIMIT 1
+        ) o ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT captured_at, market, home_odds, draw_odds, away_odds, goal_line
+            FROM odds_history
+            WHERE match_id = s.match_id AND captured_at <= COALESCE(%(before)s::timestamp, 'infinity')
+            ORDER BY captured_at DESC
+            LIMIT 1
+        ) c ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT COUNT(*) AS n_snapshots
+            FROM odds_history
+            WHERE match_id = s.match_id AND captured_at <= COALESCE(%(before)s::timestamp, 'infinity')
+        ) n ON TRUE
+        """
+        try:
+            with self.get_db_connection() as conn:
+                cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+                cursor.execute(query_sql, {'match_ids': list(match_ids), 'before': before})
+                rows = cursor.fetchall()
+                cursor.close()
+                return [{
+                    'match_id': row['match_id'],
+                    **self._decode_odds_row(row, 'opening_'),
+                    **self._decode_odds_row(row, 'closing_'),
+                    'n_snapshots': row['n_snapshots']
+                } for row in rows]
+        except Exception as e:
+            logger.error(f"查询初盘终盘失败: {e}")
+            return []
+    
     def get_daily_matches(self, days_ahead: int = 7) -> List[Dict[str, Any]]:
         """
         从数据库获取每日比赛数据
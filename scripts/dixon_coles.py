@@ -0,0 +1,343 @@
+"""
+Dixon-Coles 比分模型
+以进攻/防守/主场优势参数和低比分修正系数 ρ 拟合 data/matches_data_*.csv，
+对数似然及梯度对所有比赛完全向量化，可作为 ParlayPredictor 的预期进球（λ）来源
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+import numpy as np
+from scipy.optimize import minimize
+
+from poisson_engine import ScoreMatrixCache, score_matrix_batch
+
+# ρ 的取值范围，保证常见 λ 下修正因子为正
+RHO_BOUNDS = (-0.3, 0.3)
+
+# 修正因子的下限，避免 log(0)
+_MIN_TAU = 1e-10
+
+
+def dixon_coles_matrix_batch(home_xg, away_xg, rho, max_goals=10):
+    """
+    批量计算带 Dixon-Coles 低比分修正的比分概率矩阵
+
+    返回:
+        (N, G, G) 张量
+    """
+    home_xg = np.asarray(home_xg, dtype=np.float64).reshape(-1)
+    away_xg = np.asarray(away_xg, dtype=np.float64).reshape(-1)
+    matrices = score_matrix_batch(home_xg, away_xg, max_goals)
+    matrices[:, 0, 0] *= 1.0 - home_xg * away_xg * rho
+    matrices[:, 0, 1] *= 1.0 + home_xg * rho
+    matrices[:, 1, 0] *= 1.0 + away_xg * rho
+    matrices[:, 1, 1] *= 1.0 - rho
+    return np.maximum(matrices, 0.0)
+
+
+def _negative_log_likelihood(params, home_idx, away_idx, home_goals, away_goals, weights, n_teams):
+    """
+    负对数似然及其梯度（按权重归一化）
+
+    参数向量为 [attack(n), defence(n), home_advantage, rho]，
+    λ = exp(home + attack[主] + defence[客])，μ = exp(attack[客] + defence[主])
+    """
+    attack = params[:n_teams]
+    defence = params[n_teams:2 * n_teams]
+    home_adv = params[-2]
+    rho = params[-1]
+
+    lam = np.exp(home_adv + attack[home_idx] + defence[away_idx])
+    mu = np.exp(attack[away_idx] + defence[home_idx])
+
+    m00 = (home_goals == 0) & (away_goals == 0)
+    m01 = (home_goals == 0) & (away_goals == 1)
+    m10 = (home_goals == 1) & (away_goals == 0)
+    m11 = (home_goals == 1) & (away_goals == 1)
+
+    tau = np.ones_like(lam)
+    tau[m00] = 1.0 - lam[m00] * mu[m00] * rho
+    tau[m01] = 1.0 + lam[m01] * rho
+    tau[m10] = 1.0 + mu[m10] * rho
+    tau[m11] = 1.0 - rho
+    tau = np.maximum(tau, _MIN_TAU)
+
+    log_lik = np.log(tau) + home_goals * np.log(lam) - lam + away_goals * np.log(mu) - mu
+    total_weight = weights.sum()
+    value = -np.dot(weights, log_lik) / total_weight
+
+    # ∂log τ / ∂λ, ∂μ, ∂ρ
+    dtau_lam = np.zeros_like(lam)
+    dtau_mu = np.zeros_like(lam)
+    dtau_rho = np.zeros_like(lam)
+    dtau_lam[m00] = -mu[m00] * rho / tau[m00]
+    dtau_mu[m00] = -lam[m00] * rho / tau[m00]
+    dtau_rho[m00] = -lam[m00] * mu[m00] / tau[m00]
+    dtau_lam[m01] = rho / tau[m01]
+    dtau_rho[m01] = lam[m01] / tau[m01]
+    dtau_mu[m10] = rho / tau[m10]
+    dtau_rho[m10] = mu[m10] / tau[m10]
+    dtau_rho[m11] = -1.0 / tau[m11]
+
+    # 对线性预测子 log λ、log μ 的梯度
+    g_lam = weights * (home_goals - lam + lam * dtau_lam)
+    g_mu = weights * (away_goals - mu + mu * dtau_mu)
+
+    grad = np.empty_like(params)
+    grad[:n_teams] = np.bincount(home_idx, g_lam, n_teams) + np.bincount(away_idx, g_mu, n_teams)
+    grad[n_teams:2 * n_teams] = np.bincount(away_idx, g_lam, n_teams) + np.bincount(home_idx, g_mu, n_teams)
+    grad[-2] = g_lam.sum()
+    grad[-1] = np.dot(weights, dtau_rho)
+    grad = -grad / total_weight
+
+    # 约束 Σattack = 0，消除进攻/防守参数的平移自由度
+    attack_sum = attack.sum()
+    value += attack_sum ** 2
+    grad[:n_teams] += 2.0 * attack_sum
+
+    return value, grad
+
+
+class DixonColesModel:
+    """Dixon-Coles 进攻/防守/主场优势模型"""
+
+    def __init__(self, xi=0.0, max_goals=10):
+        """
+        参数:
+            xi: 时间衰减系数（每天），权重为 exp(-xi * 距最近一场比赛的天数)；0 表示不衰减
+            max_goals: 比分矩阵的最大进球数
+        """
+        self.xi = xi
+        self.max_goals = max_goals
+        self.teams = []
+        self.team_index = {}
+        self.attack = np.zeros(0)
+        self.defence = np.zeros(0)
+        self.home_advantage = 0.0
+        self.rho = 0.0
+        self.fit_info = {}
+
+    @property
+    def is_fitted(self):
+        return len(self.teams) > 0
+
+    def _initial_params(self, teams, init):
+        """初始参数：有上一次拟合结果时按球队名热启动，新球队从 0 开始"""
+        n = len(teams)
+        params = np.zeros(2 * n + 2)
+        params[-2] = 0.25
+        if init is None or not init.is_fitted:
+            return params
+
+        for i, team in enumerate(teams):
+            j = init.team_index.get(team)
+            if j is not None:
+                params[i] = init.attack[j]
+                params[n + i] = init.defence[j]
+        params[-2] = init.home_advantage
+        params[-1] = init.rho
+        return params
+
+    def fit(self, matches_df, init=None):
+        """
+        拟合模型
+
+        参数:
+            matches_df: 含 home_team, away_team, home_score, away_score（以及可选的 status, match_date）的比赛数据
+            init: 热启动的模型；默认使用本模型上一次的拟合结果
+
+        返回:
+            self
+        """
+        completed = matches_df
+        if 'status' in completed.columns:
+            completed = completed[completed['status'] == 'FINISHED']
+        completed = completed.dropna(subset=['home_score', 'away_score'])
+        if completed.empty:
+            raise ValueError("没有可用于拟合的已完成比赛")
+
+        teams = sorted(set(completed['home_team']) | set(completed['away_team']))
+        team_index = {team: i for i, team in enumerate(teams)}
+        home_idx = completed['home_team'].map(team_index).to_numpy(dtype=np.intp)
+        away_idx = completed['away_team'].map(team_index).to_numpy(dtype=np.intp)
+        home_goals = completed['home_score'].to_numpy(dtype=np.float64)
+        away_goals = completed['away_score'].to_numpy(dtype=np.float64)
+
+        weights = np.ones(len(completed))
+        if self.xi > 0 and 'match_date' in completed.columns:
+            import pandas as pd
+            dates = pd.to_datetime(completed['match_date'], utc=True)
+            days = (dates.max() - dates).dt.total_seconds().to_numpy() / 86400.0
+            weights = np.exp(-self.xi * days)
+
+        if init is None:
+            init = self
+        warm_start = init.is_fitted
+        x0 = self._initial_params(teams, init)
+        n = len(teams)
+        bounds = [(None, None)] * (2 * n + 1) + [RHO_BOUNDS]
+
+        start = time.perf_counter()
+        result = minimize(
+            _negative_log_likelihood, x0,
+            args=(home_idx, away_idx, home_goals, away_goals, weights, n),
+            jac=True, method='L-BFGS-B', bounds=bounds
+        )
+        elapsed = time.perf_counter() - start
+
+        self.teams = teams
+        self.team_index = team_index
+        self.attack = result.x[:n].copy()
+        self.defence = result.x[n:2 * n].copy()
+        self.home_advantage = float(result.x[-2])
+        self.rho = float(result.x[-1])
+        self.fit_info = {
+            'matches': int(len(completed)),
+            'converged': bool(result.success),
+            'iterations': int(result.nit),
+            'neg_log_likelihood': float(result.fun),
+            'seconds': elapsed,
+            'warm_start': warm_start
+        }
+        return self
+
+    def expected_goals(self, home_teams, away_teams):
+        """
+        批量计算预期进球
+
+        返回:
+            (主队 λ 数组, 客队 μ 数组)；未知球队对应 NaN
+        """
+        home_idx = np.array([self.team_index.get(team, -1) for team in np.atleast_1d(home_teams)])
+        away_idx = np.array([self.team_index.get(team, -1) for team in np.atleast_1d(away_teams)])
+        known = (home_idx >= 0) & (away_idx >= 0)
+        h = np.where(known, home_idx, 0)
+        a = np.where(known, away_idx, 0)
+        lam = np.exp(self.home_advantage + self.attack[h] + self.defence[a])
+        mu = np.exp(self.attack[a] + self.defence[h])
+        return np.where(known, lam, np.nan), np.where(known, mu, np.nan)
+
+    def __call__(self, home_team, away_team, league_code=None):
+        """λ 提供者接口：返回 (λ, μ)，未知球队返回 None"""
+        if home_team not in self.team_index or away_team not in self.team_index:
+            return None
+        lam, mu = self.expected_goals([home_team], [away_team])
+        return float(lam[0]), float(mu[0])
+
+    def score_matrices(self, home_xg, away_xg, max_goals=None):
+        """按本模型的 ρ 批量构建比分矩阵"""
+        return dixon_coles_matrix_batch(home_xg, away_xg, self.rho,
+                                        self.max_goals if max_goals is None else max_goals)
+
+    def score_cache(self, **kwargs):
+        """创建使用本模型低比分修正的比分矩阵缓存，可传给 ParlayPredictor(score_cache=...)"""
+        return ScoreMatrixCache(builder=self.score_matrices, **kwargs)
+
+    def to_dict(self):
+        return {
+            'xi': self.xi,
+            'max_goals': self.max_goals,
+            'teams': self.teams,
+            'attack': self.attack.tolist(),
+            'defence': self.defence.tolist(),
+            'home_advantage': self.home_advantage,
+            'rho': self.rho,
+            'fit_info': self.fit_info
+        }
+
+    def save(self, path):
+        """保存模型参数为 JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 加载模型参数"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        model = cls(xi=data.get('xi', 0.0), max_goals=data.get('max_goals', 10))
+        model.teams = data['teams']
+        model.team_index = {team: i for i, team in enumerate(model.teams)}
+        model.attack = np.array(data['attack'], dtype=np.float64)
+        model.defence = np.array(data['defence'], dtype=np.float64)
+        model.home_advantage = float(data['home_advantage'])
+        model.rho = float(data['rho'])
+        model.fit_info = data.get('fit_info', {})
+        return model
+
+
+class LeagueModelProvider:
+    """多联赛 λ 提供者：优先使用指定联赛的模型，否则依次尝试其他联赛"""
+
+    def __init__(self, models):
+        self.models = dict(models)
+
+    def __call__(self, home_team, away_team, league_code=None):
+        if league_code in self.models:
+            result = self.models[league_code](home_team, away_team)
+            if result is not None:
+                return result
+        for code, model in self.models.items():
+            if code == league_code:
+                continue
+            result = model(home_team, away_team)
+            if result is not None:
+                return result
+        return None
+
+
+def model_path_for(matches_path):
+    """data/matches_data_PL2024.csv -> data/dixon_coles_PL2024.json"""
+    directory, filename = os.path.split(matches_path)
+    return os.path.join(directory, filename.replace('matches_data_', 'dixon_coles_').replace('.csv', '.json'))
+
+
+def load_league_models(data_dir="data"):
+    """加载 data 目录下所有已保存的联赛模型，返回 LeagueModelProvider"""
+    models = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "dixon_coles_*.json"))):
+        match = re.match(r"dixon_coles_([A-Z0-9]+?)(\d{4})\.json$", os.path.basename(path))
+        if match:
+            models[match.group(1)] = DixonColesModel.load(path)
+    return LeagueModelProvider(models)
+
+
+def fit_league_file(matches_path, xi=0.0, warm_start=True):
+    """拟合单个联赛文件；已有保存的参数时从其热启动，并写回参数文件"""
+    import pandas as pd
+
+    output_path = model_path_for(matches_path)
+    init = None
+    if warm_start and os.path.exists(output_path):
+        init = DixonColesModel.load(output_path)
+
+    matches_df = pd.read_csv(matches_path)
+    model = DixonColesModel(xi=xi).fit(matches_df, init=init)
+    model.save(output_path)
+    return model, output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='拟合 Dixon-Coles 比分模型')
+    parser.add_argument('--data_dir', type=str, default='data', help='数据目录')
+    parser.add_argument('--xi', type=float, default=0.0, help='时间衰减系数（每天）')
+    parser.add_argument('--cold', action='store_true', help='不使用已保存参数热启动')
+    args = parser.parse_args()
+
+    for matches_path in sorted(glob.glob(os.path.join(args.data_dir, "matches_data_*.csv"))):
+        model, output_path = fit_league_file(matches_path, xi=args.xi, warm_start=not args.cold)
+        info = model.fit_info
+        print(f"{os.path.basename(matches_path)}: {info['matches']}场比赛, {len(model.teams)}支球队, "
+              f"迭代{info['iterations']}次, 耗时{info['seconds'] * 1000:.1f}ms, "
+              f"{'热启动' if info['warm_start'] else '冷启动'}, "
+              f"主场优势={model.home_advantage:.3f}, rho={model.rho:.3f}")
+        print(f"  参数已保存至 {output_path}")
+
+
+if __name__ == "__main__":
+    main()
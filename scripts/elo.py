@@ -0,0 +1,401 @@
+"""
+流式 Elo 评分引擎
+按日期顺序逐场更新（每场 O(1)），按净胜球加权并考虑主场优势。
+评分保存在以球队 ID 为下标的紧凑数组中，每次更新追加到变更日志，可查询任意日期的评分快照。
+
+用途:
+    - add_elo_features: 为 models.py 的训练数据添加赛前评分列 home_elo / away_elo
+    - EloLambdaAdjuster: 作为 ParlayPredictor 的 lambda_adjuster，按评分差调整预期进球
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import math
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+from rolling_features import iter_matches
+
+DEFAULT_RATING = 1500.0
+DEFAULT_K = 20.0
+# 主场优势（评分点）
+DEFAULT_HOME_ADVANTAGE = 60.0
+# 评分差对预期进球的影响系数，λ_home × 10^(w·Δ/800)，λ_away ÷ 同一因子（2024 赛季四大联赛拟合约 0.31，见 --fit_weight）
+DEFAULT_LAMBDA_WEIGHT = 0.3
+
+
+def goal_difference_multiplier(goal_difference):
+    """净胜球权重（World Football Elo）：1 球及以下 1，2 球 1.5，3 球及以上 (11+N)/8"""
+    goal_difference = abs(goal_difference)
+    if goal_difference <= 1:
+        return 1.0
+    if goal_difference == 2:
+        return 1.5
+    return (11.0 + goal_difference) / 8.0
+
+
+def to_timestamp(value):
+    """比赛时间（ISO 字符串、datetime 或 pandas Timestamp）转为 UTC 秒数"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class EloEngine:
+    """
+    Elo 评分引擎
+
+    ratings 为 float64 数组，下标为球队 ID（team_ids 中的映射）；
+    每次更新在日志中追加 (时间, 球队 ID, 更新后评分)，快照查询通过日志二分完成。
+    """
+
+    def __init__(self, k=DEFAULT_K, home_advantage=DEFAULT_HOME_ADVANTAGE,
+                 initial_rating=DEFAULT_RATING, capacity=64):
+        self.k = k
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+        self.team_ids = {}
+        self.team_names = []
+        self.ratings = np.full(capacity, initial_rating, dtype=np.float64)
+        self.games = np.zeros(capacity, dtype=np.int32)
+        self._log_times = array('q')
+        self._log_teams = array('i')
+        self._log_ratings = array('d')
+        self.last_time = None
+        # 同一比赛日的比赛共享开球时间字符串，缓存最近一次的解析结果
+        self._last_time_key = None
+
+    def _timestamp(self, match_time):
+        if match_time != self._last_time_key:
+            self._last_time_key = match_time
+            self._last_timestamp = to_timestamp(match_time)
+        return self._last_timestamp
+
+    def team_id(self, team):
+        """球队 ID，首次出现时分配，数组容量不足时翻倍"""
+        team_id = self.team_ids.get(team)
+        if team_id is None:
+            team_id = len(self.team_names)
+            self.team_ids[team] = team_id
+            self.team_names.append(team)
+            if team_id >= len(self.ratings):
+                grow = len(self.ratings)
+                self.ratings = np.concatenate([self.ratings, np.full(grow, self.initial_rating)])
+                self.games = np.concatenate([self.games, np.zeros(grow, dtype=np.int32)])
+        return team_id
+
+    def expected_home_score(self, home_rating, away_rating):
+        """主队的期望得分（胜 1、平 0.5、负 0）"""
+        return 1.0 / (1.0 + 10.0 ** ((away_rating - home_rating - self.home_advantage) / 400.0))
+
+    def update(self, home_team, away_team, home_goals, away_goals, match_time):
+        """
+        用一场比赛的结果更新两队评分
+
+        返回:
+            (主队赛前评分, 客队赛前评分)
+        """
+        timestamp = self._timestamp(match_time)
+        if self.last_time is not None and timestamp < self.last_time:
+            raise ValueError(f"比赛未按日期排序: {match_time}")
+        self.last_time = timestamp
+
+        home_id = self.team_id(home_team)
+        away_id = self.team_id(away_team)
+        ratings = self.ratings
+        home_rating = float(ratings[home_id])
+        away_rating = float(ratings[away_id])
+
+        if home_goals > away_goals:
+            score = 1.0
+        elif home_goals == away_goals:
+            score = 0.5
+        else:
+            score = 0.0
+        delta = (self.k * goal_difference_multiplier(home_goals - away_goals) *
+                 (score - self.expected_home_score(home_rating, away_rating)))
+
+        ratings[home_id] = home_rating + delta
+        ratings[away_id] = away_rating - delta
+        self.games[home_id] += 1
+        self.games[away_id] += 1
+        self._log_times.extend((timestamp, timestamp))
+        self._log_teams.extend((home_id, away_id))
+        self._log_ratings.extend((home_rating + delta, away_rating - delta))
+        return home_rating, away_rating
+
+    def update_match(self, match):
+        """
+        用比赛记录（matches_data CSV 行或等价字典）更新评分，未完成或缺少比分的比赛跳过
+
+        返回:
+            (主队赛前评分, 客队赛前评分)；未更新时返回 None
+        """
+        if match.get('status') != 'FINISHED':
+            return None
+        try:
+            home_goals = float(match['home_score'])
+            away_goals = float(match['away_score'])
+        except (TypeError, ValueError):
+            return None
+        if math.isnan(home_goals) or math.isnan(away_goals):
+            return None
+        return self.update(match['home_team'], match['away_team'], home_goals, away_goals, match['match_date'])
+
+    def process(self, matches):
+        """按日期顺序处理比赛流，返回更新的比赛数"""
+        count = 0
+        for match in matches:
+            if self.update_match(match) is not None:
+                count += 1
+        return count
+
+    def rating(self, team):
+        """球队当前评分，未出现过的球队为初始评分"""
+        team_id = self.team_ids.get(team)
+        return self.initial_rating if team_id is None else float(self.ratings[team_id])
+
+    def ratings_for(self, teams):
+        """批量获取当前评分，未知球队为 NaN"""
+        ids = np.array([self.team_ids.get(team, -1) for team in teams], dtype=np.int64)
+        values = self.ratings[np.maximum(ids, 0)]
+        return np.where(ids >= 0, values, np.nan)
+
+    def snapshot(self, as_of=None):
+        """
+        某一时刻之前（不含该时刻开球的比赛）的评分快照
+
+        返回:
+            与 team_names 对齐的评分数组；as_of 为 None 时为当前评分
+        """
+        if as_of is None:
+            return self.ratings[:len(self.team_names)].copy()
+        if not self._log_times and self.games[:len(self.team_names)].any():
+            raise ValueError("没有评分变更日志（由不含日志的旧文件加载），无法计算历史时刻的快照")
+        times = np.frombuffer(self._log_times, dtype=np.int64)
+        end = int(np.searchsorted(times, to_timestamp(as_of), side='left'))
+        teams = np.frombuffer(self._log_teams, dtype=np.int32)[:end]
+        values = np.frombuffer(self._log_ratings, dtype=np.float64)[:end]
+
+        snapshot = np.full(len(self.team_names), self.initial_rating)
+        # 每支球队取 as_of 之前的最后一次更新
+        last_teams, first_in_reversed = np.unique(teams[::-1], return_index=True)
+        snapshot[last_teams] = values[::-1][first_in_reversed]
+        return snapshot
+
+    def snapshot_dict(self, as_of=None):
+        """{球队: 评分} 形式的快照"""
+        return dict(zip(self.team_names, self.snapshot(as_of).tolist()))
+
+    def to_dict(self):
+        """保存当前评分和变更日志（load 之后 snapshot(as_of) 仍可用）"""
+        return {
+            'k': self.k,
+            'home_advantage': self.home_advantage,
+            'initial_rating': self.initial_rating,
+            'last_time': self.last_time,
+            'teams': self.team_names,
+            'ratings': self.ratings[:len(self.team_names)].tolist(),
+            'games': self.games[:len(self.team_names)].tolist(),
+            'log': {
+                'times': self._log_times.tolist(),
+                'teams': self._log_teams.tolist(),
+                'ratings': self._log_ratings.tolist()
+            }
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        engine = cls(data['k'], data['home_advantage'], data['initial_rating'],
+                     capacity=max(len(data['teams']), 1))
+        for team, rating, games in zip(data['teams'], data['ratings'], data['games']):
+            team_id = engine.team_id(team)
+            engine.ratings[team_id] = rating
+            engine.games[team_id] = games
+        engine.last_time = data['last_time']
+        log = data.get('log') or {}
+        engine._log_times.extend(log.get('times', []))
+        engine._log_teams.extend(log.get('teams', []))
+        engine._log_ratings.extend(log.get('ratings', []))
+        return engine
+
+
+def iter_raw_matches(path):
+    """
+    读取 football-data 原始比赛 JSON（raw_matches_*.json），转换为与 matches_data CSV 相同字段的记录
+
+    JSON 无法逐条解析，整个文件一次读入内存，按比赛时间排序后以列表返回（单个赛季文件只有几百场比赛）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    rows = []
+    for match in raw.get('matches', []):
+        full_time = match.get('score', {}).get('fullTime') or {}
+        rows.append({
+            'match_id': match['id'],
+            'home_team': match['homeTeam']['name'],
+            'away_team': match['awayTeam']['name'],
+            'match_date': match['utcDate'],
+            'status': match['status'],
+            'home_score': full_time.get('home', full_time.get('homeTeam')),
+            'away_score': full_time.get('away', full_time.get('awayTeam'))
+        })
+    rows.sort(key=lambda row: to_timestamp(row['match_date']))
+    return rows
+
+
+def iter_match_files(paths):
+    """
+    按时间顺序合并比赛文件：matches_data_*.csv 逐行流式读取，raw_matches_*.json 每个文件整体读入后排序
+    """
+    csv_paths = [path for path in paths if path.endswith('.csv')]
+    streams = [iter_raw_matches(path) for path in paths if path.endswith('.json')]
+    if csv_paths:
+        streams.append(iter_matches(csv_paths))
+    return heapq.merge(*streams, key=lambda row: to_timestamp(row['match_date']))
+
+
+def add_elo_features(matches_df, engine=None, **engine_kwargs):
+    """
+    为比赛表添加赛前 Elo 评分列 home_elo / away_elo（按日期顺序流式计算，不含未来信息）
+
+    列名以 home_ / away_ 开头，models.prepare_training_data 会自动将其作为特征
+
+    返回:
+        (添加了评分列的 DataFrame（行顺序不变）, 处理完所有比赛后的引擎)
+    """
+    engine = engine or EloEngine(**engine_kwargs)
+    order = np.argsort(matches_df['match_date'].map(to_timestamp).to_numpy(), kind='stable')
+    records = matches_df.to_dict('records')
+
+    home_elo = np.empty(len(records))
+    away_elo = np.empty(len(records))
+    for position in order:
+        match = records[position]
+        home_elo[position] = engine.rating(match['home_team'])
+        away_elo[position] = engine.rating(match['away_team'])
+        engine.update_match(match)
+
+    result = matches_df.copy()
+    result['home_elo'] = home_elo
+    result['away_elo'] = away_elo
+    return result, engine
+
+
+class EloLambdaAdjuster:
+    """
+    按 Elo 评分差调整预期进球，用作 ParlayPredictor 的 lambda_adjuster
+
+    Δ = 主队评分 - 客队评分（不含主场优势，基础 λ 中已包含），
+    λ_home × 10^(w·Δ/800)，λ_away ÷ 10^(w·Δ/800)；任一球队没有评分时不调整
+    """
+
+    def __init__(self, engine, weight=DEFAULT_LAMBDA_WEIGHT):
+        self.engine = engine
+        self.weight = weight
+
+    def factors(self, home_teams, away_teams):
+        difference = self.engine.ratings_for(home_teams) - self.engine.ratings_for(away_teams)
+        return np.where(np.isnan(difference), 1.0, 10.0 ** (self.weight * np.nan_to_num(difference) / 800.0))
+
+    def __call__(self, home_teams, away_teams, home_xg, away_xg):
+        factor = self.factors(home_teams, away_teams)
+        return np.asarray(home_xg) * factor, np.asarray(away_xg) / factor
+
+
+def fit_lambda_weight(matches_df, **engine_kwargs):
+    """
+    在历史比赛上拟合 EloLambdaAdjuster 的系数 w
+
+    基础 λ 使用 parlay_predictor.expected_goals 的特征公式作用于赛前时点特征，评分差使用赛前 Elo，
+    以实际进球的泊松对数似然最大为准则；只使用双方都已有 5 场以上历史的比赛
+
+    返回:
+        (w, 参与拟合的比赛数)
+    """
+    from scipy.optimize import minimize_scalar
+
+    from parlay_predictor import expected_goals
+    from rolling_features import FEATURE_COLUMNS, build_point_in_time_features
+
+    features_df = build_point_in_time_features(matches_df)
+    features_df, _ = add_elo_features(features_df, **engine_kwargs)
+    features_df = features_df[(features_df['status'] == 'FINISHED') &
+                              (features_df['home_total_matches_played'] >= 5) &
+                              (features_df['away_total_matches_played'] >= 5)]
+
+    home_matrix = features_df[[f'home_{col}' for col in FEATURE_COLUMNS]].to_numpy(dtype=np.float64)
+    away_matrix = features_df[[f'away_{col}' for col in FEATURE_COLUMNS]].to_numpy(dtype=np.float64)
+    base_home, base_away = expected_goals(home_matrix, away_matrix)
+    log_base_home = np.log(np.maximum(base_home, 0.05))
+    log_base_away = np.log(np.maximum(base_away, 0.05))
+    scaled = (features_df['home_elo'] - features_df['away_elo']).to_numpy() / 800.0 * math.log(10.0)
+    home_goals = features_df['home_score'].to_numpy(dtype=np.float64)
+    away_goals = features_df['away_score'].to_numpy(dtype=np.float64)
+
+    def negative_log_likelihood(weight):
+        log_home = log_base_home + weight * scaled
+        log_away = log_base_away - weight * scaled
+        return float(np.sum(np.exp(log_home) - home_goals * log_home) +
+                     np.sum(np.exp(log_away) - away_goals * log_away))
+
+    fitted = minimize_scalar(negative_log_likelihood, bounds=(-2.0, 2.0), method='bounded')
+    return float(fitted.x), len(features_df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式计算 Elo 评分')
+    parser.add_argument('--files', type=str, nargs='+', default=None,
+                        help='比赛文件（matches_data_*.csv 或 raw_matches_*.json，默认 data/matches_data_*.csv）')
+    parser.add_argument('--k', type=float, default=DEFAULT_K, help='K 系数')
+    parser.add_argument('--home_advantage', type=float, default=DEFAULT_HOME_ADVANTAGE, help='主场优势（评分点）')
+    parser.add_argument('--as_of', type=str, default=None, help='输出该时刻之前的评分快照')
+    parser.add_argument('--output', type=str, default='data/elo_ratings.json', help='评分保存路径')
+    parser.add_argument('--fit_weight', action='store_true', help='拟合 λ 调整系数')
+    args = parser.parse_args()
+
+    paths = args.files or sorted(glob.glob(os.path.join('data', 'matches_data_*.csv')))
+    if not paths:
+        print("没有找到比赛数据")
+        return
+
+    engine = EloEngine(args.k, args.home_advantage)
+    start = time.perf_counter()
+    count = engine.process(iter_match_files(paths))
+    elapsed = time.perf_counter() - start
+    print(f"已处理 {count} 场比赛, {len(engine.team_names)} 支球队, 耗时 {elapsed * 1000:.1f}ms")
+
+    ratings = engine.snapshot_dict(args.as_of)
+    print(f"评分前十{'（' + args.as_of + ' 之前）' if args.as_of else ''}:")
+    for team, rating in sorted(ratings.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {team}: {rating:.1f}")
+
+    engine.save(args.output)
+    print(f"评分已保存至 {args.output}")
+
+    if args.fit_weight:
+        import pandas as pd
+
+        matches_df = pd.concat([pd.read_csv(path) for path in paths if path.endswith('.csv')], ignore_index=True)
+        weight, n = fit_lambda_weight(matches_df, k=args.k, home_advantage=args.home_advantage)
+        print(f"λ 调整系数 w = {weight:.3f}（{n} 场比赛拟合）")
+
+
+if __name__ == "__main__":
+    main()
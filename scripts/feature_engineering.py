@@ -2,9 +2,68 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from config import *
+from feature_store import export_feature_json, load_feature_frame, save_feature_store
 
-def create_team_features(matches_df, lookback_matches=10):
-    """为每支球队创建特征"""
+from rolling_features import AWAY_FEATURE_COLUMNS, HOME_FEATURE_COLUMNS, TOTAL_FEATURE_COLUMNS
+from rolling_features import FEATURE_COLUMNS as TEAM_FEATURE_COLUMNS
+
+# 近期状态使用的比赛场数
+RECENT_FORM_MATCHES = 5
+
+def team_perspective_frame(completed_matches):
+    """
+    将比赛表展开为球队视角的长表：每场比赛对应主队、客队各一行
+
+    列: team, match_date, team_score, opponent_score, is_home, win, draw, loss,
+        order（比赛在输入中的位置，同一球队的行按 order 排列即为时间顺序）
+    """
+    order = np.arange(len(completed_matches))
+    result = completed_matches['result']
+    home = pd.DataFrame({
+        'team': completed_matches['home_team'].to_numpy(),
+        'match_date': completed_matches['match_date'].to_numpy(),
+        'team_score': completed_matches['home_score'].to_numpy(),
+        'opponent_score': completed_matches['away_score'].to_numpy(),
+        'is_home': True,
+        'win': (result == 'H').to_numpy(),
+        'draw': (result == 'D').to_numpy(),
+        'loss': (result == 'A').to_numpy(),
+        'order': order
+    })
+    away = pd.DataFrame({
+        'team': completed_matches['away_team'].to_numpy(),
+        'match_date': home['match_date'].to_numpy(),
+        'team_score': completed_matches['away_score'].to_numpy(),
+        'opponent_score': completed_matches['home_score'].to_numpy(),
+        'is_home': False,
+        'win': home['loss'].to_numpy(),
+        'draw': home['draw'].to_numpy(),
+        'loss': home['win'].to_numpy(),
+        'order': order
+    })
+    return pd.concat([home, away], ignore_index=True).sort_values('order', kind='stable', ignore_index=True)
+
+def _window_stats(long_df, lookback_matches, columns):
+    """每支球队最近 lookback_matches 场比赛的场次、进失球均值和胜平负比例"""
+    recent = long_df.groupby('team', sort=False).tail(lookback_matches)
+    grouped = recent.groupby('team', sort=False)
+    stats = pd.DataFrame({
+        columns[0]: grouped.size(),
+        columns[1]: grouped['team_score'].mean(),
+        columns[2]: grouped['opponent_score'].mean(),
+        columns[3]: grouped['win'].mean(),
+        columns[4]: grouped['draw'].mean(),
+        columns[5]: grouped['loss'].mean()
+    })
+    return stats
+
+def build_team_features(matches_df, lookback_matches=10):
+    """
+    计算每支球队的特征（不写文件）
+
+    先把已完成的比赛展开为球队视角的长表，再用 groupby().tail() 一次性取出每支球队
+    最近的主场、客场和全部比赛，分组聚合后一次构建特征表
+    """
     if matches_df is None or matches_df.empty:
         print("无效的比赛数据")
         return None
@@ -14,154 +73,99 @@ def create_team_features(matches_df, lookback_matches=10):
         matches_df = matches_df.sort_values('match_date')
     
     # 只使用已完成的比赛
-    completed_matches = matches_df[matches_df['status'] == 'FINISHED'].copy()
+    completed_matches = matches_df[matches_df['status'] == 'FINISHED']
     
-    # 获取所有球队并转换为列表
+    # 获取所有球队并转换为列表（与原实现相同的集合顺序）
     all_teams = list(set(completed_matches['home_team'].unique()) | set(completed_matches['away_team'].unique()))
     
-    # 创建特征数据框
-    features = pd.DataFrame(index=all_teams)
-    
-    # 计算每支球队的特征
-    for team in all_teams:
-        # 获取球队的所有比赛
-        team_home_matches = completed_matches[completed_matches['home_team'] == team].copy()
-        team_away_matches = completed_matches[completed_matches['away_team'] == team].copy()
-        
-        # 最近的比赛
-        recent_home_matches = team_home_matches.tail(lookback_matches)
-        recent_away_matches = team_away_matches.tail(lookback_matches)
-        
-        # 计算主场特征
-        if not recent_home_matches.empty:
-            features.loc[team, 'home_matches_played'] = len(recent_home_matches)
-            features.loc[team, 'home_goals_scored_avg'] = recent_home_matches['home_score'].mean()
-            features.loc[team, 'home_goals_conceded_avg'] = recent_home_matches['away_score'].mean()
-            features.loc[team, 'home_win_rate'] = (recent_home_matches['result'] == 'H').mean()
-            features.loc[team, 'home_draw_rate'] = (recent_home_matches['result'] == 'D').mean()
-            features.loc[team, 'home_loss_rate'] = (recent_home_matches['result'] == 'A').mean()
-        else:
-            features.loc[team, 'home_matches_played'] = 0
-            features.loc[team, 'home_goals_scored_avg'] = 0
-            features.loc[team, 'home_goals_conceded_avg'] = 0
-            features.loc[team, 'home_win_rate'] = 0
-            features.loc[team, 'home_draw_rate'] = 0
-            features.loc[team, 'home_loss_rate'] = 0
-        
-        # 计算客场特征
-        if not recent_away_matches.empty:
-            features.loc[team, 'away_matches_played'] = len(recent_away_matches)
-            features.loc[team, 'away_goals_scored_avg'] = recent_away_matches['away_score'].mean()
-            features.loc[team, 'away_goals_conceded_avg'] = recent_away_matches['home_score'].mean()
-            features.loc[team, 'away_win_rate'] = (recent_away_matches['result'] == 'A').mean()
-            features.loc[team, 'away_draw_rate'] = (recent_away_matches['result'] == 'D').mean()
-            features.loc[team, 'away_loss_rate'] = (recent_away_matches['result'] == 'H').mean()
-        else:
-            features.loc[team, 'away_matches_played'] = 0
-            features.loc[team, 'away_goals_scored_avg'] = 0
-            features.loc[team, 'away_goals_conceded_avg'] = 0
-            features.loc[team, 'away_win_rate'] = 0
-            features.loc[team, 'away_draw_rate'] = 0
-            features.loc[team, 'away_loss_rate'] = 0
-        
-        # 计算总体特征
-        all_team_matches = pd.concat([
-            team_home_matches[['match_date', 'home_score', 'away_score', 'result']].rename(
-                columns={'home_score': 'team_score', 'away_score': 'opponent_score'}
-            ).assign(is_home=True),
-            team_away_matches[['match_date', 'home_score', 'away_score', 'result']].rename(
-                columns={'away_score': 'team_score', 'home_score': 'opponent_score'}
-            ).assign(is_home=False)
-        ]).sort_values('match_date')
-        
-        recent_matches = all_team_matches.tail(lookback_matches)
-        
-        if not recent_matches.empty:
-            # 计算最近的表现
-            features.loc[team, 'total_matches_played'] = len(recent_matches)
-            features.loc[team, 'total_goals_scored_avg'] = recent_matches['team_score'].mean()
-            features.loc[team, 'total_goals_conceded_avg'] = recent_matches['opponent_score'].mean()
-            
-            # 计算胜率
-            home_wins = sum((recent_matches['is_home'] == True) & (recent_matches['result'] == 'H'))
-            away_wins = sum((recent_matches['is_home'] == False) & (recent_matches['result'] == 'A'))
-            total_wins = home_wins + away_wins
-            
-            features.loc[team, 'overall_win_rate'] = total_wins / len(recent_matches)
-            
-            # 计算最近的趋势（最近5场比赛的得分）
-            last_5_matches = recent_matches.tail(5)
-            if len(last_5_matches) > 0:
-                points = 0
-                for _, match in last_5_matches.iterrows():
-                    if (match['is_home'] and match['result'] == 'H') or (not match['is_home'] and match['result'] == 'A'):
-                        points += 3  # 胜
-                    elif match['result'] == 'D':
-                        points += 1  # 平
-                
-                features.loc[team, 'recent_form'] = points / (len(last_5_matches) * 3)  # 归一化为0-1
-            else:
-                features.loc[team, 'recent_form'] = 0
-        else:
-            features.loc[team, 'total_matches_played'] = 0
-            features.loc[team, 'total_goals_scored_avg'] = 0
-            features.loc[team, 'total_goals_conceded_avg'] = 0
-            features.loc[team, 'overall_win_rate'] = 0
-            features.loc[team, 'recent_form'] = 0
+    long_df = team_perspective_frame(completed_matches)
+    
+    # 主场、客场特征；没有对应比赛的球队全部为 0
+    home_stats = _window_stats(long_df[long_df['is_home']], lookback_matches, HOME_FEATURE_COLUMNS)
+    away_stats = _window_stats(long_df[~long_df['is_home']], lookback_matches, AWAY_FEATURE_COLUMNS)
+    
+    # 总体特征：最近 lookback_matches 场比赛
+    recent = long_df.groupby('team', sort=False).tail(lookback_matches)
+    grouped = recent.groupby('team', sort=False)
+    played = grouped.size()
+    
+    # 最近的趋势（最近5场比赛的得分，胜3分平1分，归一化为0-1）
+    last_matches = recent.groupby('team', sort=False).tail(RECENT_FORM_MATCHES)
+    points = (last_matches['win'] * 3 + last_matches['draw']).groupby(last_matches['team'], sort=False)
     
-    # 保存特征数据
-    features.to_csv(FEATURES_DATA_FILE)
-    print(f"球队特征数据已保存至 {FEATURES_DATA_FILE}")
+    total_stats = pd.DataFrame({
+        'total_matches_played': played,
+        'total_goals_scored_avg': grouped['team_score'].mean(),
+        'total_goals_conceded_avg': grouped['opponent_score'].mean(),
+        'overall_win_rate': grouped['win'].sum() / played,
+        'recent_form': points.sum() / (points.size() * 3)
+    })
+    
+    features = pd.concat([
+        home_stats.reindex(all_teams, fill_value=0),
+        away_stats.reindex(all_teams, fill_value=0),
+        total_stats.reindex(all_teams, fill_value=0)
+    ], axis=1).astype(np.float64)
+    return features[TEAM_FEATURE_COLUMNS]
+
+def create_team_features(matches_df, lookback_matches=10, features_path=None):
+    """
+    为每支球队创建特征
+
+    参数:
+        features_path: 特征路径，默认为 config 中的 FEATURES_DATA_FILE；
+                       特征保存为同名的 .fstore 列式存储（例如 features_PL2024.fstore）
+    """
+    features = build_team_features(matches_df, lookback_matches)
+    if features is None:
+        return None
+    
+    # 保存为列式特征存储，并导出前端使用的静态 JSON
+    features_path = features_path or FEATURES_DATA_FILE
+    store_file, version = save_feature_store(features, features_path)
+    json_file, _ = export_feature_json(features_path)
+    print(f"球队特征数据已保存至 {store_file}（版本 {version}），前端数据 {json_file}")
     
     return features
 
 def prepare_match_features(matches_df, features_df):
-    """为每场比赛准备特征"""
+    """
+    为每场比赛准备特征
+
+    按球队名把特征表以 home_ / away_ 前缀各合并一次，赛果列按比赛状态整列赋值；
+    输出的列和行顺序与逐行构建时相同，缺少任一球队特征的比赛被跳过
+    """
     if matches_df is None or features_df is None:
         print("无效的数据")
         return None
     
-    match_features = []
-    
-    for _, match in matches_df.iterrows():
-        home_team = match['home_team']
-        away_team = match['away_team']
-        
-        # 检查两队是否都有特征数据
-        if home_team not in features_df.index or away_team not in features_df.index:
-            continue
-        
-        # 提取特征
-        match_data = {
-            'match_id': match['match_id'],
-            'home_team': home_team,
-            'away_team': away_team,
-            'match_date': match['match_date'],
-            'status': match['status']
-        }
-        
-        # 添加主队特征
-        for col in features_df.columns:
-            match_data[f'home_{col}'] = features_df.loc[home_team, col]
-        
-        # 添加客队特征
-        for col in features_df.columns:
-            match_data[f'away_{col}'] = features_df.loc[away_team, col]
-        
-        # 如果比赛已完成，添加结果
-        if match['status'] == 'FINISHED':
-            match_data['home_score'] = match['home_score']
-            match_data['away_score'] = match['away_score']
-            match_data['result'] = match['result']
-            if 'half_time_home' in match and 'half_time_away' in match:
-                match_data['half_time_home'] = match['half_time_home']
-                match_data['half_time_away'] = match['half_time_away']
-                if 'half_full_result' in match:
-                    match_data['half_full_result'] = match['half_full_result']
-        
-        match_features.append(match_data)
-    
-    return pd.DataFrame(match_features)
+    # 检查两队是否都有特征数据
+    known = matches_df['home_team'].isin(features_df.index) & matches_df['away_team'].isin(features_df.index)
+    matches = matches_df[known].reset_index(drop=True)
+    if matches.empty:
+        return pd.DataFrame()
+    
+    match_features = matches[['match_id', 'home_team', 'away_team', 'match_date', 'status']]
+    
+    # 添加主队、客队特征
+    match_features = match_features.merge(features_df.add_prefix('home_'), how='left',
+                                          left_on='home_team', right_index=True)
+    match_features = match_features.merge(features_df.add_prefix('away_'), how='left',
+                                          left_on='away_team', right_index=True)
+    match_features = match_features.reset_index(drop=True)
+    
+    # 如果比赛已完成，添加结果（未完成的比赛为空值）
+    finished = matches['status'] == 'FINISHED'
+    if finished.any():
+        result_cols = ['home_score', 'away_score', 'result']
+        if 'half_time_home' in matches.columns and 'half_time_away' in matches.columns:
+            result_cols += ['half_time_home', 'half_time_away']
+            if 'half_full_result' in matches.columns:
+                result_cols.append('half_full_result')
+        for col in result_cols:
+            match_features[col] = matches[col].where(finished)
+    
+    return match_features
 
 def load_or_create_features(matches_df=None):
     """加载或创建特征"""
@@ -169,13 +173,12 @@ def load_or_create_features(matches_df=None):
         # 创建新的特征
         features_df = create_team_features(matches_df)
     else:
-        # 尝试从文件加载
-        try:
-            features_df = pd.read_csv(FEATURES_DATA_FILE, index_col=0)
+        # 尝试从文件加载（列式存储优先，其次为旧的 CSV）
+        features_df = load_feature_frame(FEATURES_DATA_FILE)
+        if features_df is not None:
             print(f"从{FEATURES_DATA_FILE}加载了特征数据")
-        except:
+        else:
             print(f"无法加载{FEATURES_DATA_FILE}，请先创建特征")
-            features_df = None
     
     return features_df
 
@@ -0,0 +1,267 @@
+"""
+球队特征列式存储
+每个联赛的特征保存为一个 .fstore 文件，取代原来的 CSV + JSON 两份文本副本:
+
+    b'MPFS' | 格式版本 uint32 | 头部长度 uint32 | 头部 JSON | 填充到 64 字节对齐 | 数据区
+
+头部记录构建版本号（每次构建递增）、构建时间、球队名字典（行号 -> 球队名）和列名；
+数据区按列连续存放 float32，即形状为 (列数, 球队数) 的矩阵。
+加载时内存映射数据区，按列或转置后按行访问都不复制数据；
+前端使用的 JSON 按需从存储生成并缓存，存储重建后自动失效；
+写入存储的同时导出同名的静态 JSON（export_feature_json），供不安装 numpy 的线上部署直接返回
+"""
+
+import glob
+import json
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+STORE_MAGIC = b'MPFS'
+STORE_FORMAT_VERSION = 1
+STORE_DTYPE = np.dtype('<f4')
+STORE_ALIGNMENT = 64
+STORE_EXTENSION = '.fstore'
+
+_PREFIX = struct.Struct('<4sII')
+
+# 存储路径 -> (文件标识, 构建版本号, JSON 字节)
+_json_cache = {}
+
+
+def store_path(features_path):
+    """
+    根据特征路径得到列式存储路径
+
+    例如 data/features_PL2024.csv -> data/features_PL2024.fstore
+    """
+    return f"{os.path.splitext(features_path)[0]}{STORE_EXTENSION}"
+
+
+def _data_offset(header_length):
+    prefix_length = _PREFIX.size + header_length
+    return -(-prefix_length // STORE_ALIGNMENT) * STORE_ALIGNMENT
+
+
+def read_store_header(path):
+    """
+    只读取存储头部
+
+    返回:
+        (头部字典, 数据区偏移)
+    """
+    with open(path, 'rb') as f:
+        magic, format_version, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != STORE_MAGIC:
+            raise ValueError(f"{path} 不是特征存储文件")
+        if format_version != STORE_FORMAT_VERSION:
+            raise ValueError(f"不支持的特征存储格式版本 {format_version}: {path}")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    return header, _data_offset(header_length)
+
+
+def save_feature_store(features_df, features_path, metadata=None):
+    """
+    将特征 DataFrame 保存为列式存储
+
+    版本号在已有存储的基础上加一；先写临时文件再替换，已内存映射旧文件的读者不受影响
+
+    参数:
+        metadata: 可选，随头部保存的 JSON 对象（如每行的非数值信息），读取时为 header['metadata']
+
+    返回:
+        (存储路径, 构建版本号)
+    """
+    path = store_path(features_path)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    version = 1
+    if os.path.exists(path):
+        try:
+            version = read_store_header(path)[0]['version'] + 1
+        except (ValueError, KeyError, struct.error):
+            pass
+
+    columns = np.ascontiguousarray(features_df.to_numpy(dtype=STORE_DTYPE).T)
+    header = json.dumps({
+        'version': version,
+        'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'dtype': STORE_DTYPE.str,
+        'teams': [str(team) for team in features_df.index],
+        'columns': [str(col) for col in features_df.columns],
+        **({'metadata': metadata} if metadata is not None else {})
+    }, ensure_ascii=False).encode('utf-8')
+    padding = _data_offset(len(header)) - _PREFIX.size - len(header)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_PREFIX.pack(STORE_MAGIC, STORE_FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * padding)
+        f.write(columns.tobytes())
+    os.replace(temp_path, path)
+
+    return path, version
+
+
+def open_feature_store(path, mmap=True):
+    """
+    打开一个存储文件
+
+    返回:
+        (头部字典, 形状为 (列数, 球队数) 的 float32 列矩阵)
+    """
+    header, offset = read_store_header(path)
+    shape = (len(header['columns']), len(header['teams']))
+    dtype = np.dtype(header['dtype'])
+    if os.path.getsize(path) != offset + shape[0] * shape[1] * dtype.itemsize:
+        raise ValueError(f"特征存储 {path} 与头部不一致")
+
+    if shape[0] * shape[1] == 0:
+        columns = np.zeros(shape, dtype=dtype)
+    elif mmap:
+        columns = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    else:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            columns = np.fromfile(f, dtype=dtype, count=shape[0] * shape[1]).reshape(shape)
+    return header, columns
+
+
+def load_feature_store(features_path, mmap=True):
+    """
+    加载列式特征存储
+
+    返回:
+        (球队名列表, 列名列表, 特征矩阵)；特征矩阵为列矩阵的转置视图，形状为 (球队数, 列数)；
+        存储不存在时返回 None
+    """
+    path = store_path(features_path)
+    if not os.path.exists(path):
+        return None
+
+    header, columns = open_feature_store(path, mmap)
+    return header['teams'], header['columns'], columns.T
+
+
+def store_info(features_path):
+    """存储的构建版本号、构建时间和规模；存储不存在时返回 None"""
+    path = store_path(features_path)
+    if not os.path.exists(path):
+        return None
+    header, _ = read_store_header(path)
+    return {
+        'path': path,
+        'version': header['version'],
+        'built_at': header['built_at'],
+        'teams': len(header['teams']),
+        'columns': len(header['columns'])
+    }
+
+
+def widen_float32(values):
+    """
+    float32 -> float64，按 float32 的最短十进制表示转换
+
+    例如 1.4 存为 float32 后得到 1.4 而不是 1.399999976158142，与原 CSV / JSON 中的数值一致
+    """
+    return np.asarray(values).astype(str).astype(np.float64)
+
+
+def load_feature_frame(features_path):
+    """
+    以 DataFrame 形式加载特征（float64），优先使用列式存储，没有时读取 CSV
+
+    返回:
+        特征 DataFrame；两者都不存在时返回 None
+    """
+    import pandas as pd
+
+    stored = load_feature_store(features_path, mmap=False)
+    if stored is not None:
+        teams, columns, matrix = stored
+        return pd.DataFrame(widen_float32(matrix), index=teams, columns=columns)
+    if os.path.exists(features_path):
+        return pd.read_csv(features_path, index_col=0)
+    return None
+
+
+def feature_json(features_path):
+    """
+    生成前端（js/data.js）使用的 JSON: {球队: {列名: 值}}
+
+    结果按存储文件缓存，文件被替换（重建或增量更新）后重新生成
+
+    返回:
+        (UTF-8 JSON 字节, 构建版本号)；存储不存在时返回 None
+    """
+    path = store_path(features_path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _json_cache.pop(path, None)
+        return None
+
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _json_cache.get(path)
+    if cached is not None and cached[0] == identity:
+        return cached[2], cached[1]
+
+    header, columns = open_feature_store(path, mmap=False)
+    names = header['columns']
+    data = {
+        team: dict(zip(names, row))
+        for team, row in zip(header['teams'], widen_float32(columns.T).tolist())
+    }
+    payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    _json_cache[path] = (identity, header['version'], payload)
+    return payload, header['version']
+
+
+def json_path(features_path):
+    """data/features_PL2024.csv -> data/features_PL2024.json"""
+    return f"{os.path.splitext(features_path)[0]}.json"
+
+
+def export_feature_json(features_path):
+    """
+    将存储导出为前端使用的静态 JSON 文件（先写临时文件再替换）
+
+    线上部署（Vercel）不安装 numpy，app.py 的 /data/ 路由无法按需生成 JSON，直接返回该文件；
+    因此每次写入存储后都要同时导出，并随存储一起提交
+
+    返回:
+        (JSON 路径, 构建版本号)；存储不存在时返回 None
+    """
+    generated = feature_json(features_path)
+    if generated is None:
+        return None
+    payload, version = generated
+    path = json_path(features_path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(temp_path, path)
+    return path, version
+
+
+def build_stores_from_csv(data_dir="data"):
+    """为 data 目录下已有的 features_*.csv 生成列式存储"""
+    import pandas as pd
+
+    built = []
+    for csv_path in sorted(glob.glob(os.path.join(data_dir, "features_*.csv"))):
+        features_df = pd.read_csv(csv_path, index_col=0)
+        path, version = save_feature_store(features_df, csv_path)
+        export_feature_json(csv_path)
+        built.append(path)
+        print(f"已生成 {path}（版本 {version}）")
+    return built
+
+
+if __name__ == "__main__":
+    build_stores_from_csv()
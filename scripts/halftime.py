@@ -0,0 +1,212 @@
+"""
+半全场（hafu）联合分布
+将全场进球拆分为上下半场两个独立泊松过程，向量化计算 9 种半全场结果的联合概率，
+上半场进球占比由 process_match_data 保存的 half_time_home / half_time_away 校准
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from poisson_engine import poisson_pmf_rows
+
+# 未校准时的上半场进球占比（与 match.py 原有的 0.45×λ 一致）
+DEFAULT_HALF_SHARE = 0.45
+
+# 单个半场的最大进球数，网格外的概率通过归一化分摊
+HALF_MAX_GOALS = 8
+
+# 半全场结果标签，第 3*i+j 项为 半场i/全场j
+HAFU_LABELS = [f"{ht}/{ft}" for ht in 'HDA' for ft in 'HDA']
+
+CALIBRATION_FILE = 'halftime_calibration.json'
+
+
+def _diff_distribution(home_xg, away_xg, max_goals=HALF_MAX_GOALS):
+    """
+    两个独立泊松进球数之差的分布
+
+    返回:
+        (N, 2G-1) 矩阵，第 d+max_goals 列为 P(主队进球 - 客队进球 = d)，每行已归一化
+    """
+    home_rows = poisson_pmf_rows(home_xg, max_goals)
+    away_rows = poisson_pmf_rows(away_xg, max_goals)
+    home_rows /= home_rows.sum(axis=1, keepdims=True)
+    away_rows /= away_rows.sum(axis=1, keepdims=True)
+
+    # 差的分布 = 主队分布与翻转后的客队分布做卷积，逐行用 FFT 一次完成
+    size = 2 * max_goals + 1
+    n_fft = 1 << (size - 1).bit_length()
+    spectrum = np.fft.rfft(home_rows, n_fft, axis=1) * np.fft.rfft(away_rows[:, ::-1], n_fft, axis=1)
+    diff = np.fft.irfft(spectrum, n_fft, axis=1)[:, :size]
+    return np.maximum(diff, 0.0)
+
+
+def hafu_probs(home_xg, away_xg, home_share=DEFAULT_HALF_SHARE, away_share=None, max_goals=HALF_MAX_GOALS):
+    """
+    批量计算半全场 9 种结果的联合概率
+
+    上半场进球 ~ Poisson(share×λ)，下半场进球 ~ Poisson((1-share)×λ)，两者独立。
+    记上半场净胜球为 D1、下半场为 D2，则全场结果由 D1+D2 决定:
+        P(半场r1, 全场r2) = Σ_{d∈r1} P(D1=d) · P(d + D2 ∈ r2)
+    后者由 D2 分布的累计和一次性得到，无需逐比分循环。
+
+    参数:
+        home_xg / away_xg: 长度为 N 的全场预期进球
+        home_share / away_share: 主客队上半场进球占比，away_share 缺省时与主队相同
+
+    返回:
+        (N, 9) 矩阵，列顺序见 HAFU_LABELS
+    """
+    home_xg = np.maximum(np.asarray(home_xg, dtype=np.float64).reshape(-1), 0.0)
+    away_xg = np.maximum(np.asarray(away_xg, dtype=np.float64).reshape(-1), 0.0)
+    if home_xg.shape != away_xg.shape:
+        raise ValueError("主客队预期进球数组长度不一致")
+    if away_share is None:
+        away_share = home_share
+
+    first = _diff_distribution(home_xg * home_share, away_xg * away_share, max_goals)
+    second = _diff_distribution(home_xg * (1 - home_share), away_xg * (1 - away_share), max_goals)
+
+    # 对上半场净胜球 d（下标 d+m），所需的下半场概率为 P(D2 > -d)、P(D2 = -d)、P(D2 < -d)，
+    # 下标 m-d 恰为翻转后的位置
+    lower = np.concatenate([np.zeros((second.shape[0], 1)), np.cumsum(second, axis=1)[:, :-1]], axis=1)
+    behind = lower[:, ::-1]                       # P(D2 < -d)
+    level = second[:, ::-1]                       # P(D2 = -d)
+    ahead = second.sum(axis=1, keepdims=True) - behind - level
+    conditional = np.stack([ahead, level, behind], axis=-1)     # (N, 2G-1, 3)
+
+    diff_values = np.arange(-max_goals, max_goals + 1)
+    ht_masks = np.stack([diff_values > 0, diff_values == 0, diff_values < 0], axis=-1).astype(np.float64)
+
+    hafu = np.einsum('nk,kr,nkc->nrc', first, ht_masks, conditional)
+    hafu = np.maximum(hafu.reshape(len(home_xg), 9), 0.0)
+    return hafu / hafu.sum(axis=1, keepdims=True)
+
+
+def calibrate_half_shares(matches_df):
+    """
+    由已完赛比赛的半场比分校准上半场进球占比
+
+    在总进球给定时上半场进球服从二项分布，占比的极大似然估计即为
+    上半场进球总数 / 全场进球总数
+
+    返回:
+        字典 home_share / away_share / matches；数据不足时使用默认占比
+    """
+    columns = ['home_score', 'away_score', 'half_time_home', 'half_time_away']
+    finished = matches_df
+    if 'status' in finished.columns:
+        finished = finished[finished['status'] == 'FINISHED']
+    finished = finished.dropna(subset=columns)
+
+    home_total = finished['home_score'].sum()
+    away_total = finished['away_score'].sum()
+    return {
+        'home_share': float(finished['half_time_home'].sum() / home_total) if home_total > 0 else DEFAULT_HALF_SHARE,
+        'away_share': float(finished['half_time_away'].sum() / away_total) if away_total > 0 else DEFAULT_HALF_SHARE,
+        'matches': int(len(finished))
+    }
+
+
+def league_code_for(matches_path):
+    """data/matches_data_PL2024.csv -> PL2024"""
+    return os.path.splitext(os.path.basename(matches_path))[0].replace('matches_data_', '')
+
+
+def calibrate_data_dir(data_dir="data"):
+    """
+    为 data 目录下所有联赛校准上半场进球占比，并给出全部联赛合并的 ALL 项，
+    结果保存为 data/halftime_calibration.json
+    """
+    frames = {}
+    for matches_path in sorted(glob.glob(os.path.join(data_dir, "matches_data_*.csv"))):
+        frames[league_code_for(matches_path)] = pd.read_csv(matches_path)
+
+    calibration = {code: calibrate_half_shares(df) for code, df in frames.items()}
+    if frames:
+        calibration['ALL'] = calibrate_half_shares(pd.concat(frames.values(), ignore_index=True))
+
+    output_path = os.path.join(data_dir, CALIBRATION_FILE)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, ensure_ascii=False, indent=2)
+    return calibration, output_path
+
+
+def load_half_shares(data_dir="data", league_code='ALL'):
+    """
+    读取校准后的上半场进球占比
+
+    返回:
+        (home_share, away_share)；没有校准文件或联赛时使用默认占比
+    """
+    path = os.path.join(data_dir, CALIBRATION_FILE)
+    if not os.path.exists(path):
+        return DEFAULT_HALF_SHARE, DEFAULT_HALF_SHARE
+    with open(path, 'r', encoding='utf-8') as f:
+        calibration = json.load(f)
+    entry = calibration.get(league_code) or calibration.get('ALL')
+    if not entry:
+        return DEFAULT_HALF_SHARE, DEFAULT_HALF_SHARE
+    return entry['home_share'], entry['away_share']
+
+
+def evaluate_hafu(matches_df, home_xg, away_xg, home_share, away_share):
+    """
+    用已完赛比赛的半全场结果检验模型
+
+    返回:
+        (平均对数损失, 预测的平均分布, 实际频率)
+    """
+    probs = hafu_probs(home_xg, away_xg, home_share, away_share)
+    outcome = matches_df['half_full_result'].map({label: i for i, label in enumerate(HAFU_LABELS)})
+    valid = outcome.notna().to_numpy()
+    index = outcome[valid].astype(int).to_numpy()
+    picked = probs[valid][np.arange(len(index)), index]
+    log_loss = float(-np.mean(np.log(np.maximum(picked, 1e-15))))
+    observed = np.bincount(index, minlength=9) / max(len(index), 1)
+    return log_loss, probs[valid].mean(axis=0), observed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='校准并检验半全场模型')
+    parser.add_argument('--data_dir', type=str, default='data', help='数据目录')
+    args = parser.parse_args()
+
+    calibration, output_path = calibrate_data_dir(args.data_dir)
+    if not calibration:
+        print("没有找到比赛数据")
+        return
+
+    from dixon_coles import DixonColesModel, model_path_for
+
+    for code, entry in calibration.items():
+        print(f"{code}: {entry['matches']}场比赛, 主队上半场进球占比 {entry['home_share']:.3f}, "
+              f"客队 {entry['away_share']:.3f}")
+
+        # 用已拟合的 Dixon-Coles 模型给出每场比赛的预期进球，检验半全场分布
+        matches_path = os.path.join(args.data_dir, f"matches_data_{code}.csv")
+        model_path = model_path_for(matches_path)
+        if not os.path.exists(model_path):
+            continue
+        model = DixonColesModel.load(model_path)
+        matches_df = pd.read_csv(matches_path)
+        matches_df = matches_df[matches_df['status'] == 'FINISHED']
+        home_xg, away_xg = model.expected_goals(matches_df['home_team'], matches_df['away_team'])
+
+        for label, shares in (('默认占比', (DEFAULT_HALF_SHARE, DEFAULT_HALF_SHARE)),
+                              ('校准占比', (entry['home_share'], entry['away_share']))):
+            log_loss, predicted, observed = evaluate_hafu(matches_df, home_xg, away_xg, *shares)
+            print(f"  {label}: 半全场对数损失 {log_loss:.4f}")
+        print("  " + ", ".join(f"{label} {p:.3f}/{o:.3f}"
+                               for label, p, o in zip(HAFU_LABELS, predicted, observed)) + " (预测/实际)")
+
+    print(f"校准结果已保存至 {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+带连接池和磁盘缓存的 HTTP 客户端
+    1. 所有请求共用一个 requests.Session，连接池大小与并发数一致，连接保持复用（keep-alive）；
+    2. 每个 URL（含查询参数，不含密钥）的响应体和 ETag / Last-Modified 保存在缓存目录中，
+       再次请求时发送 If-None-Match / If-Modified-Since，服务器返回 304 时直接使用缓存的响应体；
+    3. 指定 max_age 时，缓存时间不超过 max_age 秒的响应不发送请求
+可在多个线程中同时调用 get_json
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 30
+
+# 不参与缓存键的查询参数
+SECRET_PARAMS = ('apiKey',)
+
+# get_json 返回的状态
+FETCH_STATUSES = ('fetched', 'not_modified', 'cached', 'error')
+
+
+class ResponseCache:
+    """响应缓存，每个 URL 两个文件: <key>.body（原始响应体）和 <key>.json（验证信息）"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def key(self, url, params=None):
+        params = sorted((name, str(value)) for name, value in (params or {}).items()
+                        if name not in SECRET_PARAMS)
+        payload = json.dumps([url, params])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.cache_dir, f"{key}{extension}")
+
+    def _write(self, path, content):
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def get(self, key):
+        """返回验证信息字典（url / etag / last_modified / fetched_at），没有缓存时为 None"""
+        try:
+            with open(self._path(key, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, key):
+        try:
+            with open(self._path(key, '.body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, meta, content=None):
+        """保存验证信息，content 不为 None 时同时替换响应体（先写响应体，再写验证信息）"""
+        if content is not None:
+            self._write(self._path(key, '.body'), content)
+        self._write(self._path(key, '.json'), json.dumps(meta).encode('utf-8'))
+
+
+class CachedSession:
+    """
+    连接池 + 条件请求 + 磁盘缓存
+
+    参数:
+        cache_dir: 缓存目录，None 表示不缓存（每次都完整请求）
+        pool_size: 每个主机的最大连接数，应不小于并发线程数
+        headers: 每个请求都带上的请求头
+    """
+
+    def __init__(self, cache_dir=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, headers=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.timeout = timeout
+        self.stats = dict.fromkeys(FETCH_STATUSES, 0)
+        self._lock = threading.Lock()
+
+    def _count(self, status):
+        with self._lock:
+            self.stats[status] += 1
+
+    def get_json(self, url, params=None, headers=None, max_age=None):
+        """
+        GET 并解析 JSON
+
+        返回:
+            字典 data（解析后的 JSON，失败时为 None）/ status（FETCH_STATUSES 之一）/
+            http_status / elapsed（秒）/ error（失败原因）
+        """
+        start = time.perf_counter()
+        key = meta = None
+        if self.cache is not None:
+            key = self.cache.key(url, params)
+            meta = self.cache.get(key)
+
+        result = {'data': None, 'status': 'error', 'http_status': None, 'error': None}
+        try:
+            if meta is not None and max_age is not None and time.time() - meta['fetched_at'] < max_age:
+                content = self.cache.body(key)
+                if content is not None:
+                    result.update(data=json.loads(content), status='cached')
+                    return result
+
+            request_headers = dict(headers or {})
+            if meta is not None:
+                if meta.get('etag'):
+                    request_headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    request_headers['If-Modified-Since'] = meta['last_modified']
+            response = self.session.get(url, params=params, headers=request_headers, timeout=self.timeout)
+            result['http_status'] = response.status_code
+
+            if response.status_code == 304 and meta is not None:
+                content = self.cache.body(key)
+                if content is None:
+                    # 响应体缓存丢失，重新完整请求
+                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                    result['http_status'] = response.status_code
+                else:
+                    self.cache.put(key, dict(meta, fetched_at=time.time()))
+                    result.update(data=json.loads(content), status='not_modified')
+                    return result
+
+            if response.status_code != 200:
+                result['error'] = f"{response.status_code}: {response.text[:200]}"
+                return result
+
+            data = response.json()
+            if self.cache is not None:
+                self.cache.put(key, {
+                    'url': url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'fetched_at': time.time()
+                }, response.content)
+            result.update(data=data, status='fetched')
+            return result
+        except (requests.RequestException, ValueError) as e:
+            result['error'] = str(e)
+            return result
+        finally:
+            result['elapsed'] = time.perf_counter() - start
+            self._count(result['status'])
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,211 @@
+"""
+球队特征增量更新
+为每个联赛保存球队的滚动状态（窗口内的进失球累计、胜平负计数和近期积分），
+有新的完赛结果时只应用新增的比赛，并只改写受影响球队在列式特征存储（以及仍存在的旧 CSV 副本）中的行，
+无需对整个联赛重新运行 create_team_features
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+import pandas as pd
+
+from feature_store import (export_feature_json, open_feature_store, save_feature_store, store_path,
+                           widen_float32)
+from rolling_features import DEFAULT_LOOKBACK, FEATURE_COLUMNS, RollingFeatureBuilder
+
+
+def state_path_for(features_path):
+    """data/features_PL2024.csv -> data/features_PL2024.state.json"""
+    return f"{os.path.splitext(features_path)[0]}.state.json"
+
+
+def _patch_store(features_path, rows, create=True):
+    """
+    改写列式特征存储中的指定球队行
+
+    存储只有几 KB，读出后合并并整体重写（版本号加一），
+    替换文件使已缓存的前端 JSON 失效，并重新导出静态 JSON
+    """
+    path = store_path(features_path)
+    if not os.path.exists(path):
+        if create:
+            save_feature_store(pd.DataFrame.from_dict(rows, orient='index', columns=FEATURE_COLUMNS), features_path)
+            export_feature_json(features_path)
+        return
+
+    header, columns = open_feature_store(path, mmap=False)
+    existing = pd.DataFrame(widen_float32(columns.T), index=header['teams'], columns=header['columns'])
+    save_feature_store(_merge_rows(existing, rows), features_path)
+    export_feature_json(features_path)
+
+
+def _merge_rows(features_df, rows):
+    """用 rows 更新已有球队的行，新球队追加在末尾"""
+    features_df = features_df.reindex(columns=FEATURE_COLUMNS)
+    updates = pd.DataFrame.from_dict(rows, orient='index', columns=FEATURE_COLUMNS)
+    existing = updates.index.isin(features_df.index)
+    features_df.loc[updates.index[existing]] = updates[existing].to_numpy()
+    return pd.concat([features_df, updates[~existing]])
+
+
+def _patch_csv(csv_path, rows, create=True):
+    if os.path.exists(csv_path):
+        # round_trip 保证未改动的行读回后原样写出
+        features_df = _merge_rows(pd.read_csv(csv_path, index_col=0, float_precision='round_trip'), rows)
+    elif create:
+        features_df = pd.DataFrame.from_dict(rows, orient='index', columns=FEATURE_COLUMNS)
+    else:
+        return
+    features_df.to_csv(csv_path)
+
+
+def patch_feature_files(features_path, rows, create=True):
+    """
+    将指定球队的特征写入 features_path 对应的列式存储；旧的 CSV 文件存在时一并改写
+
+    参数:
+        rows: {球队: 按 FEATURE_COLUMNS 顺序的特征列表}
+        create: 存储不存在时是否新建；为 False 时只改写已存在的文件（用于 features.csv 等副本）
+    """
+    _patch_store(features_path, rows, create)
+    _patch_csv(features_path, rows, create=False)
+
+
+def _read_matches(matches_path):
+    with open(matches_path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class IncrementalFeatureUpdater:
+    """
+    单个联赛的增量特征更新器
+
+    状态保存在 features_*.state.json 中：球队滚动状态、已应用的比赛 ID 和最后一场比赛的日期。
+    """
+
+    def __init__(self, features_path, lookback_matches=DEFAULT_LOOKBACK, mirror_paths=()):
+        self.features_path = features_path
+        self.state_path = state_path_for(features_path)
+        self.lookback_matches = lookback_matches
+        self.mirror_paths = list(mirror_paths)
+        self.builder = None
+        self.applied = set()
+        self.last_match_date = None
+        self.load_state()
+
+    def load_state(self):
+        """读取已保存的状态，窗口长度不一致时视为没有状态"""
+        if not os.path.exists(self.state_path):
+            return False
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['builder']['lookback_matches'] != self.lookback_matches:
+            return False
+        self.builder = RollingFeatureBuilder.from_dict(state['builder'])
+        self.applied = set(state['applied'])
+        self.last_match_date = state['last_match_date']
+        return True
+
+    def save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'builder': self.builder.to_dict(),
+                'applied': sorted(self.applied),
+                'last_match_date': self.last_match_date
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.state_path)
+
+    def rebuild(self, finished):
+        """从全部已完成比赛重建状态，返回所有球队"""
+        self.builder = RollingFeatureBuilder(self.lookback_matches)
+        self.applied = set()
+        self.last_match_date = None
+        return self._apply(sorted(finished, key=lambda match: match['match_date']))
+
+    def _apply(self, matches):
+        affected = set()
+        for match in matches:
+            self.builder.update(match)
+            self.applied.add(str(match['match_id']))
+            affected.update((match['home_team'], match['away_team']))
+            if self.last_match_date is None or match['match_date'] > self.last_match_date:
+                self.last_match_date = match['match_date']
+        return affected
+
+    def apply(self, matches):
+        """
+        应用比赛列表中尚未应用的已完成比赛
+
+        补录了比已应用比赛更早的比赛时（例如延期比赛的结果晚到），窗口无法按时间顺序插入，
+        此时从全部已完成比赛重建状态
+
+        返回:
+            (受影响的球队集合, 是否整体重建)
+        """
+        finished = [match for match in matches if match.get('status') == 'FINISHED']
+        new = sorted((match for match in finished if str(match['match_id']) not in self.applied),
+                     key=lambda match: match['match_date'])
+        if self.builder is None:
+            return self.rebuild(finished), True
+        if not new:
+            return set(), False
+        if self.last_match_date is not None and new[0]['match_date'] < self.last_match_date:
+            return self.rebuild(finished), True
+        return self._apply(new), False
+
+    def update(self, matches_path):
+        """
+        用比赛 CSV 更新特征文件，只改写受影响球队的行
+
+        返回:
+            (受影响的球队集合, 是否整体重建)
+        """
+        affected, rebuilt = self.apply(_read_matches(matches_path))
+        if affected:
+            rows = {team: self.builder.team_features(team) for team in affected}
+            patch_feature_files(self.features_path, rows)
+            for mirror_path in self.mirror_paths:
+                patch_feature_files(mirror_path, rows, create=False)
+            self.save_state()
+        return affected, rebuilt
+
+
+def features_path_for(matches_path):
+    """data/matches_data_PL2024.csv -> data/features_PL2024.csv"""
+    directory, filename = os.path.split(matches_path)
+    return os.path.join(directory, filename.replace('matches_data_', 'features_'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量更新球队特征')
+    parser.add_argument('--data_dir', type=str, default='data', help='数据目录')
+    parser.add_argument('--lookback', type=int, default=DEFAULT_LOOKBACK, help='窗口长度（比赛场数）')
+    parser.add_argument('--mirror', type=str, action='append', default=[],
+                        help='同时改写的特征文件副本（例如 data/features.csv），可重复')
+    args = parser.parse_args()
+
+    for matches_path in sorted(glob.glob(os.path.join(args.data_dir, "matches_data_*.csv"))):
+        features_path = features_path_for(matches_path)
+        start = time.perf_counter()
+        updater = IncrementalFeatureUpdater(features_path, args.lookback, args.mirror)
+        affected, rebuilt = updater.update(matches_path)
+        elapsed = (time.perf_counter() - start) * 1000
+        if rebuilt:
+            print(f"{features_path}: 重建状态, 写入 {len(affected)} 支球队, 耗时 {elapsed:.1f}ms")
+        elif affected:
+            print(f"{features_path}: 更新 {len(affected)} 支球队, 耗时 {elapsed:.1f}ms")
+        else:
+            print(f"{features_path}: 没有新完成的比赛")
+
+
+if __name__ == "__main__":
+    main()
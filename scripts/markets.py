@@ -0,0 +1,191 @@
+"""
+竞彩全玩法定价
+由一个比分概率矩阵一次性向量化计算胜平负(had)、让球胜平负(hhad)、比分(crs)、总进球(ttg)和大小球
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from poisson_engine import outcome_probs
+
+# 定价各玩法时使用的最大进球数，网格外的概率通过归一化分摊
+MARKET_MAX_GOALS = 10
+
+# 竞彩比分玩法的可选比分（主:客），其余归入“胜其他/平其他/负其他”
+CRS_HOME_WIN = [(1, 0), (2, 0), (2, 1), (3, 0), (3, 1), (3, 2),
+                (4, 0), (4, 1), (4, 2), (5, 0), (5, 1), (5, 2)]
+CRS_DRAW = [(0, 0), (1, 1), (2, 2), (3, 3)]
+CRS_AWAY_WIN = [(0, 1), (0, 2), (1, 2), (0, 3), (1, 3), (2, 3),
+                (0, 4), (1, 4), (2, 4), (0, 5), (1, 5), (2, 5)]
+CRS_LABELS = ([f"{h}:{a}" for h, a in CRS_HOME_WIN] + ["胜其他"] +
+              [f"{h}:{a}" for h, a in CRS_DRAW] + ["平其他"] +
+              [f"{h}:{a}" for h, a in CRS_AWAY_WIN] + ["负其他"])
+
+# 总进球玩法：0..6 球以及 7+ 球
+TTG_MAX = 7
+TTG_LABELS = [str(k) for k in range(TTG_MAX)] + [f"{TTG_MAX}+"]
+
+DEFAULT_TOTAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+
+
+@lru_cache(maxsize=16)
+def _projections(max_goals):
+    """
+    比分网格到净胜球、总进球的投影矩阵
+
+    返回 (净胜球投影 (G*G, 2G-1), 总进球投影 (G*G, 2G-1), 净胜球取值)
+    """
+    size = max_goals + 1
+    home, away = np.meshgrid(np.arange(size), np.arange(size), indexing='ij')
+    home, away = home.ravel(), away.ravel()
+    cells = np.arange(size * size)
+
+    diff_projection = np.zeros((size * size, 2 * size - 1))
+    diff_projection[cells, home - away + max_goals] = 1.0
+    total_projection = np.zeros((size * size, 2 * size - 1))
+    total_projection[cells, home + away] = 1.0
+
+    diff_values = np.arange(-max_goals, max_goals + 1, dtype=np.float64)
+    for array in (diff_projection, total_projection, diff_values):
+        array.setflags(write=False)
+    return diff_projection, total_projection, diff_values
+
+
+def _crs_cells(scores, max_goals):
+    """比分列表在展平网格中的下标"""
+    size = max_goals + 1
+    return np.array([h * size + a for h, a in scores if h <= max_goals and a <= max_goals], dtype=np.intp)
+
+
+def parse_goal_line(goal_line):
+    """解析竞彩让球数，例如 "-1"、"+2"；无法解析时返回 NaN"""
+    if goal_line is None:
+        return np.nan
+    try:
+        return float(str(goal_line).strip().replace('+', ''))
+    except ValueError:
+        return np.nan
+
+
+def price_markets(score_matrices, goal_lines=None, total_lines=DEFAULT_TOTAL_LINES, normalize=True):
+    """
+    一次向量化计算所有竞彩玩法的概率
+
+    参数:
+        score_matrices: (G, G) 或 (N, G, G) 的比分概率矩阵
+        goal_lines: 每场比赛的让球数（主队视角，如 -1 表示主让一球），长度为 N；缺失为 NaN
+        total_lines: 大小球盘口
+        normalize: 是否先将每个比分矩阵归一化为概率和为 1
+
+    返回:
+        字典，各项为以比赛为第一维的数组:
+            had (N, 3), hhad (N, 3), crs (N, len(CRS_LABELS)), ttg (N, 8),
+            over (N, L), under (N, L)，以及 goal_lines / total_lines
+    """
+    matrices = np.asarray(score_matrices, dtype=np.float64)
+    single = matrices.ndim == 2
+    if single:
+        matrices = matrices[None]
+
+    n = matrices.shape[0]
+    max_goals = matrices.shape[-1] - 1
+    if normalize:
+        totals = matrices.sum(axis=(1, 2), keepdims=True)
+        matrices = matrices / np.where(totals > 0, totals, 1.0)
+
+    flat = matrices.reshape(n, -1)
+    diff_projection, total_projection, diff_values = _projections(max_goals)
+    diff_dist = flat @ diff_projection       # (N, 2G-1) 净胜球分布
+    total_dist = flat @ total_projection     # (N, 2G-1) 总进球分布
+
+    # 胜平负
+    had = np.column_stack(outcome_probs(matrices))
+
+    # 让球胜平负：主队净胜球加上让球数后再判定胜平负
+    if goal_lines is None:
+        lines = np.full(n, np.nan)
+    else:
+        lines = np.array([parse_goal_line(line) for line in np.atleast_1d(goal_lines)], dtype=np.float64)
+        if lines.shape[0] != n:
+            raise ValueError("让球数数量与比赛数量不一致")
+    adjusted = diff_values[None, :] + np.nan_to_num(lines)[:, None]
+    hhad = np.stack([
+        (diff_dist * (adjusted > 0)).sum(axis=1),
+        (diff_dist * (adjusted == 0)).sum(axis=1),
+        (diff_dist * (adjusted < 0)).sum(axis=1)
+    ], axis=1)
+    hhad[np.isnan(lines)] = np.nan
+
+    # 比分，三个“其他”分别为对应赛果剩余的概率
+    home_cells = _crs_cells(CRS_HOME_WIN, max_goals)
+    draw_cells = _crs_cells(CRS_DRAW, max_goals)
+    away_cells = _crs_cells(CRS_AWAY_WIN, max_goals)
+    home_scores = flat[:, home_cells]
+    draw_scores = flat[:, draw_cells]
+    away_scores = flat[:, away_cells]
+    crs = np.concatenate([
+        home_scores, (had[:, 0] - home_scores.sum(axis=1))[:, None],
+        draw_scores, (had[:, 1] - draw_scores.sum(axis=1))[:, None],
+        away_scores, (had[:, 2] - away_scores.sum(axis=1))[:, None]
+    ], axis=1)
+    crs = np.maximum(crs, 0.0)
+
+    # 总进球
+    ttg = np.concatenate([
+        total_dist[:, :TTG_MAX],
+        total_dist[:, TTG_MAX:].sum(axis=1, keepdims=True)
+    ], axis=1)
+
+    # 大小球：总进球累计分布上取各盘口
+    total_lines = np.asarray(total_lines, dtype=np.float64)
+    goals = np.arange(total_dist.shape[1], dtype=np.float64)
+    over = total_dist @ (goals[:, None] > total_lines[None, :]).astype(np.float64)
+    under = total_dist @ (goals[:, None] < total_lines[None, :]).astype(np.float64)
+
+    priced = {
+        'had': had,
+        'hhad': hhad,
+        'crs': crs,
+        'ttg': ttg,
+        'over': over,
+        'under': under,
+        'goal_lines': lines,
+        'total_lines': total_lines
+    }
+    if single:
+        priced = {key: (value[0] if key != 'total_lines' else value) for key, value in priced.items()}
+    return priced
+
+
+def markets_to_dict(priced, index=None):
+    """
+    将 price_markets 的结果转换为便于 JSON 输出的字典
+
+    参数:
+        priced: price_markets 的返回值
+        index: 批量结果中的比赛下标；单场结果传 None
+    """
+    def pick(key):
+        value = priced[key]
+        return value if index is None else value[index]
+
+    had = pick('had')
+    hhad = pick('hhad')
+    goal_line = float(pick('goal_lines'))
+
+    result = {
+        'had': {'h': float(had[0]), 'd': float(had[1]), 'a': float(had[2])},
+        'crs': {label: float(p) for label, p in zip(CRS_LABELS, pick('crs'))},
+        'ttg': {label: float(p) for label, p in zip(TTG_LABELS, pick('ttg'))},
+        'over_under': {
+            f"{line:g}": {'over': float(o), 'under': float(u)}
+            for line, o, u in zip(priced['total_lines'], pick('over'), pick('under'))
+        }
+    }
+    if not np.isnan(goal_line):
+        result['hhad'] = {
+            'goal_line': goal_line,
+            'h': float(hhad[0]), 'd': float(hhad[1]), 'a': float(hhad[2])
+        }
+    return result
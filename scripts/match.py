@@ -1,7 +1,66 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import poisson
 import argparse
+import json
+import sys
+import time
+
+from poisson_engine import score_matrix_batch
+from markets import MARKET_MAX_GOALS, TTG_LABELS, price_markets
+from feature_store import load_feature_frame, load_feature_store
+from halftime import HAFU_LABELS, hafu_probs, load_half_shares
+
+FEATURES_FILE = 'data/features.csv'
+
+# 批量模式每次向量化处理的比赛数
+BATCH_CHUNK_SIZE = 2048
+
+# 未提供赔率时的默认值（与命令行模式一致）
+DEFAULT_ODDS = {'H': 2.0, 'D': 3.0, 'A': 4.0}
+
+def top_scores(score_matrix, n=5):
+    """返回概率最高的 n 个比分及其概率"""
+    flat = score_matrix.ravel()
+    size = score_matrix.shape[1]
+    order = np.argsort(-flat, kind='stable')[:n]
+    return [(f"{i // size}-{i % size}", float(flat[i])) for i in order]
+
+def win_draw_loss_probs(home_features, away_features):
+    """
+    根据胜率和近期状态计算胜平负概率
+
+    home_features / away_features 可以是单个球队的特征 Series，
+    也可以是列名到数组的映射（批量计算）
+    """
+    home_advantage = 0.1  # 主场优势
+    
+    home_win_prob = (home_features['home_win_rate'] * 0.4 + 
+                     home_features['overall_win_rate'] * 0.3 + 
+                     home_features['recent_form'] * 0.3 + 
+                     home_advantage)
+    
+    away_win_prob = (away_features['away_win_rate'] * 0.4 + 
+                     away_features['overall_win_rate'] * 0.3 + 
+                     away_features['recent_form'] * 0.3)
+    
+    # 主客胜率之和超过 1 时，按比例压缩到 0.9，平局固定为 0.1
+    draw_prob = 1 - home_win_prob - away_win_prob
+    overflow = draw_prob < 0
+    total = np.where(overflow, home_win_prob + away_win_prob, 1.0)
+    home_win_prob = np.where(overflow, home_win_prob / total * 0.9, home_win_prob)
+    away_win_prob = np.where(overflow, away_win_prob / total * 0.9, away_win_prob)
+    draw_prob = np.where(overflow, 0.1, draw_prob)
+    
+    # 归一化概率
+    total_prob = home_win_prob + draw_prob + away_win_prob
+    return home_win_prob / total_prob, draw_prob / total_prob, away_win_prob / total_prob
+
+def load_features_df(features_path=FEATURES_FILE):
+    """加载特征表（列式存储优先，其次为 CSV）"""
+    features_df = load_feature_frame(features_path)
+    if features_df is None:
+        raise FileNotFoundError(f"找不到特征文件 {features_path}")
+    return features_df
 
 def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
     """
@@ -16,7 +75,7 @@ def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
     """
     try:
         # 加载特征数据
-        features_df = pd.read_csv('data/features.csv', index_col=0)
+        features_df = load_features_df()
         
         # 检查球队是否存在于数据中
         if home_team not in features_df.index:
@@ -40,29 +99,9 @@ def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
         print(away_features)
         
         # 计算胜平负概率
-        home_advantage = 0.1  # 主场优势
-        
-        home_win_prob = (home_features['home_win_rate'] * 0.4 + 
-                         home_features['overall_win_rate'] * 0.3 + 
-                         home_features['recent_form'] * 0.3 + 
-                         home_advantage)
-        
-        away_win_prob = (away_features['away_win_rate'] * 0.4 + 
-                         away_features['overall_win_rate'] * 0.3 + 
-                         away_features['recent_form'] * 0.3)
-        
-        draw_prob = 1 - home_win_prob - away_win_prob
-        if draw_prob < 0:
-            total = home_win_prob + away_win_prob
-            home_win_prob = home_win_prob / total * 0.9
-            away_win_prob = away_win_prob / total * 0.9
-            draw_prob = 0.1
-        
-        # 归一化概率
-        total_prob = home_win_prob + draw_prob + away_win_prob
-        home_win_prob /= total_prob
-        draw_prob /= total_prob
-        away_win_prob /= total_prob
+        home_win_prob, draw_prob, away_win_prob = (
+            float(prob) for prob in win_draw_loss_probs(home_features, away_features)
+        )
         
         print("\n胜平负预测:")
         print(f"主胜({home_team}赢): {home_win_prob:.2f} ({home_win_prob*100:.1f}%)")
@@ -73,71 +112,30 @@ def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
         home_goals_mean = home_features['home_goals_scored_avg']
         away_goals_mean = away_features['away_goals_scored_avg']
         
-        # 计算比分概率
-        score_probs = {}
-        total_prob = 0
-        
-        for h in range(6):
-            for a in range(6):
-                h_prob = poisson.pmf(h, home_goals_mean)
-                a_prob = poisson.pmf(a, away_goals_mean)
-                score_prob = h_prob * a_prob
-                score_probs[f"{h}-{a}"] = score_prob
-                total_prob += score_prob
-        
-        # 归一化概率
-        for score in score_probs:
-            score_probs[score] /= total_prob
-        
-        # 排序比分概率
-        sorted_scores = sorted(score_probs.items(), key=lambda x: x[1], reverse=True)
+        # 计算比分概率并归一化
+        score_matrix = score_matrix_batch([home_goals_mean], [away_goals_mean], max_goals=5)[0]
+        score_matrix /= score_matrix.sum()
         
         print("\n最可能的比分:")
-        for score, prob in sorted_scores[:5]:
+        for score, prob in top_scores(score_matrix, 5):
             print(f"{score}: {prob:.4f} ({prob*100:.1f}%)")
         
-        # 预测半场进球
-        ht_home_goals_mean = home_goals_mean * 0.45
-        ht_away_goals_mean = away_goals_mean * 0.45
-        
-        # 计算半场比分概率
-        ht_score_probs = {}
-        ht_total_prob = 0
-        
-        for h in range(4):
-            for a in range(4):
-                h_prob = poisson.pmf(h, ht_home_goals_mean)
-                a_prob = poisson.pmf(a, ht_away_goals_mean)
-                score_prob = h_prob * a_prob
-                ht_score_probs[f"{h}-{a}"] = score_prob
-                ht_total_prob += score_prob
+        # 预测半场进球（上半场进球占比由历史半场比分校准）
+        home_share, away_share = load_half_shares()
+        ht_home_goals_mean = home_goals_mean * home_share
+        ht_away_goals_mean = away_goals_mean * away_share
         
-        # 归一化概率
-        for score in ht_score_probs:
-            ht_score_probs[score] /= ht_total_prob
-        
-        # 排序半场比分概率
-        sorted_ht_scores = sorted(ht_score_probs.items(), key=lambda x: x[1], reverse=True)
+        # 计算半场比分概率并归一化
+        ht_score_matrix = score_matrix_batch([ht_home_goals_mean], [ht_away_goals_mean], max_goals=3)[0]
+        ht_score_matrix /= ht_score_matrix.sum()
         
         print("\n最可能的半场比分:")
-        for score, prob in sorted_ht_scores[:5]:
+        for score, prob in top_scores(ht_score_matrix, 5):
             print(f"{score}: {prob:.4f} ({prob*100:.1f}%)")
         
-        # 计算半全场组合概率
-        ht_ft_probs = {}
-        
-        for ht_score, ht_prob in ht_score_probs.items():
-            ht_home, ht_away = map(int, ht_score.split('-'))
-            ht_result = 'H' if ht_home > ht_away else ('D' if ht_home == ht_away else 'A')
-            
-            for ft_score, ft_prob in score_probs.items():
-                ft_home, ft_away = map(int, ft_score.split('-'))
-                ft_result = 'H' if ft_home > ft_away else ('D' if ft_home == ft_away else 'A')
-                
-                combo = f"{ht_result}/{ft_result}"
-                if combo not in ht_ft_probs:
-                    ht_ft_probs[combo] = 0
-                ht_ft_probs[combo] += ht_prob * ft_prob
+        # 计算半全场联合概率（全场结果由上下半场进球共同决定）
+        ht_ft_probs = dict(zip(HAFU_LABELS, hafu_probs([home_goals_mean], [away_goals_mean],
+                                                       home_share, away_share)[0].tolist()))
         
         # 排序半全场组合概率
         sorted_ht_ft = sorted(ht_ft_probs.items(), key=lambda x: x[1], reverse=True)
@@ -146,6 +144,16 @@ def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
         for combo, prob in sorted_ht_ft[:5]:
             print(f"{combo}: {prob:.4f} ({prob*100:.1f}%)")
         
+        # 总进球及大小球（在更大的比分网格上一次性定价）
+        markets = price_markets(score_matrix_batch([home_goals_mean], [away_goals_mean], MARKET_MAX_GOALS)[0])
+        
+        print("\n总进球数分布:")
+        print(", ".join(f"{label}球: {prob*100:.1f}%" for label, prob in zip(TTG_LABELS, markets['ttg'])))
+        
+        print("\n大小球:")
+        for line, over, under in zip(markets['total_lines'], markets['over'], markets['under']):
+            print(f"{line:g}球: 大 {over:.4f}, 小 {under:.4f}")
+        
         # 分析赔率
         odds = {
             'H': home_odds,  # 主胜赔率
@@ -183,13 +191,193 @@ def predict_match(home_team, away_team, home_odds, draw_odds, away_odds):
 def list_teams():
     """列出所有可用的球队"""
     try:
-        features_df = pd.read_csv('data/features.csv', index_col=0)
+        features_df = load_features_df()
         print("\n可用的球队列表:")
         for team in features_df.index:
             print(f"- {team}")
     except Exception as e:
         print(f"无法加载球队列表: {e}")
 
+def load_feature_table(features_path=FEATURES_FILE):
+    """
+    一次性加载特征表，优先使用列式特征存储
+
+    返回:
+        (球队名→行号, 列名→列号, 特征矩阵)
+    """
+    store = load_feature_store(features_path)
+    if store is None:
+        features_df = pd.read_csv(features_path, index_col=0)
+        teams = [str(team) for team in features_df.index]
+        columns = [str(col) for col in features_df.columns]
+        matrix = features_df.to_numpy(dtype=np.float64)
+    else:
+        teams, columns, matrix = store
+    team_rows = {team: row for row, team in enumerate(teams)}
+    column_index = {col: j for j, col in enumerate(columns)}
+    return team_rows, column_index, np.asarray(matrix, dtype=np.float64)
+
+def _top_cells(probs, labels, key, n=5):
+    """每行取概率最高的 n 个标签，probs 为 (N, K)"""
+    order = np.argsort(-probs, axis=1, kind='stable')[:, :n]
+    top_probs = np.take_along_axis(probs, order, axis=1)
+    return [
+        [{key: labels[k], 'prob': p} for k, p in zip(row_order, row_probs)]
+        for row_order, row_probs in zip(order.tolist(), top_probs.tolist())
+    ]
+
+def _fixture_odds(fixture):
+    """读取比赛的胜平负赔率，缺失时使用默认赔率"""
+    odds = {}
+    for key, field in (('H', 'home_odds'), ('D', 'draw_odds'), ('A', 'away_odds')):
+        value = fixture.get(field)
+        odds[key] = float(value) if value else DEFAULT_ODDS[key]
+    return odds
+
+def predict_fixtures(fixtures, feature_table, half_shares=None):
+    """
+    批量预测一组比赛，输出与 predict_match 相同的胜平负、比分、半场和半全场结果
+
+    参数:
+        fixtures: 比赛字典列表，包含 home_team/away_team（或 home/away），
+                  可选 home_odds/draw_odds/away_odds 和 match_id
+        feature_table: load_feature_table 的返回值
+        half_shares: (主队, 客队) 上半场进球占比，缺省时读取校准结果
+
+    返回:
+        与 fixtures 一一对应的结果字典列表，找不到球队时结果中包含 error
+    """
+    team_rows, column_index, matrix = feature_table
+    if half_shares is None:
+        half_shares = load_half_shares()
+    results = [None] * len(fixtures)
+
+    valid, home_rows, away_rows, odds_rows = [], [], [], []
+    for i, fixture in enumerate(fixtures):
+        home_team = fixture.get('home_team', fixture.get('home'))
+        away_team = fixture.get('away_team', fixture.get('away'))
+        result = {'home_team': home_team, 'away_team': away_team}
+        if 'match_id' in fixture:
+            result = {'match_id': fixture['match_id'], **result}
+        results[i] = result
+
+        missing = [team for team in (home_team, away_team) if team not in team_rows]
+        if missing:
+            result['error'] = f"找不到球队 '{missing[0]}' 的数据"
+            continue
+        try:
+            odds = _fixture_odds(fixture)
+        except (TypeError, ValueError):
+            result['error'] = "赔率必须是数字"
+            continue
+        valid.append(i)
+        home_rows.append(team_rows[home_team])
+        away_rows.append(team_rows[away_team])
+        odds_rows.append([odds['H'], odds['D'], odds['A']])
+
+    if not valid:
+        return results
+
+    home_matrix = matrix[home_rows]
+    away_matrix = matrix[away_rows]
+    home_features = {col: home_matrix[:, j] for col, j in column_index.items()}
+    away_features = {col: away_matrix[:, j] for col, j in column_index.items()}
+
+    # 胜平负及期望值
+    result_probs = np.column_stack(win_draw_loss_probs(home_features, away_features))
+    odds = np.array(odds_rows, dtype=np.float64)
+    ev = result_probs * odds - (1 - result_probs)
+    best = np.argmax(ev, axis=1)
+
+    # 全场和半场比分，按场归一化
+    home_goals_mean = home_features['home_goals_scored_avg']
+    away_goals_mean = away_features['away_goals_scored_avg']
+    score_matrices = score_matrix_batch(home_goals_mean, away_goals_mean, max_goals=5)
+    score_matrices /= score_matrices.sum(axis=(1, 2), keepdims=True)
+    home_share, away_share = half_shares
+    ht_score_matrices = score_matrix_batch(home_goals_mean * home_share, away_goals_mean * away_share, max_goals=3)
+    ht_score_matrices /= ht_score_matrices.sum(axis=(1, 2), keepdims=True)
+
+    # 半全场联合分布，第 3*i+j 列为 半场i/全场j
+    ht_ft = hafu_probs(home_goals_mean, away_goals_mean, home_share, away_share)
+
+    score_labels = [f"{i // 6}-{i % 6}" for i in range(36)]
+    ht_score_labels = [f"{i // 4}-{i % 4}" for i in range(16)]
+    top_score_rows = _top_cells(score_matrices.reshape(len(valid), -1), score_labels, 'score')
+    top_ht_rows = _top_cells(ht_score_matrices.reshape(len(valid), -1), ht_score_labels, 'score')
+    top_ht_ft_rows = _top_cells(ht_ft, HAFU_LABELS, 'result')
+
+    probs_list, ev_list, odds_list = result_probs.tolist(), ev.tolist(), odds.tolist()
+    for n, i in enumerate(valid):
+        result = results[i]
+        result['probabilities'] = dict(zip('HDA', probs_list[n]))
+        result['expected_value'] = dict(zip('HDA', ev_list[n]))
+        pick = int(best[n])
+        if ev_list[n][pick] > 0:
+            result['best_bet'] = {'result': 'HDA'[pick], 'odds': odds_list[n][pick], 'ev': ev_list[n][pick]}
+        else:
+            result['best_bet'] = None
+        result['top_scores'] = top_score_rows[n]
+        result['half_time_top_scores'] = top_ht_rows[n]
+        result['half_full'] = top_ht_ft_rows[n]
+
+    return results
+
+def run_batch(input_path='-', output_path='-', features_path=FEATURES_FILE, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    批量/流式预测：特征只加载一次，从 JSONL 文件或标准输入逐行读取比赛，
+    每场比赛输出一行 JSON 结果，按 chunk_size 场为一批向量化计算
+
+    返回:
+        处理的比赛数
+    """
+    feature_table = load_feature_table(features_path)
+    half_shares = load_half_shares()
+
+    source = sys.stdin if input_path == '-' else open(input_path, 'r', encoding='utf-8')
+    sink = sys.stdout if output_path == '-' else open(output_path, 'w', encoding='utf-8')
+
+    def flush(chunk):
+        # chunk 中为 (比赛, 解析错误结果) 对，按输入顺序输出
+        predicted = iter(predict_fixtures([fixture for fixture, _ in chunk if fixture is not None],
+                                          feature_table, half_shares))
+        for fixture, error in chunk:
+            result = error if fixture is None else next(predicted)
+            sink.write(json.dumps(result, ensure_ascii=False) + '\n')
+        sink.flush()
+
+    start = time.perf_counter()
+    count = 0
+    chunk = []
+    try:
+        for line_no, line in enumerate(source, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                fixture = json.loads(line)
+                if not isinstance(fixture, dict):
+                    raise ValueError("每行必须是一个 JSON 对象")
+                chunk.append((fixture, None))
+            except ValueError as e:
+                chunk.append((None, {'line': line_no, 'error': f"无法解析输入: {e}"}))
+            count += 1
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"已预测 {count} 场比赛，用时 {elapsed:.3f} 秒 ({rate:.0f} 场/秒)", file=sys.stderr)
+    return count
+
 def main():
     parser = argparse.ArgumentParser(description='足球比赛预测工具')
     parser.add_argument('--home', type=str, help='主队名称')
@@ -198,9 +386,18 @@ def main():
     parser.add_argument('--draw_odds', type=float, help='平局赔率')
     parser.add_argument('--away_odds', type=float, help='客胜赔率')
     parser.add_argument('--list_teams', action='store_true', help='列出所有可用的球队')
+    parser.add_argument('--batch', nargs='?', const='-', metavar='FILE',
+                        help='批量模式：从 JSONL 文件（省略或 - 为标准输入）读取比赛，每行输出一个 JSON 结果')
+    parser.add_argument('--output', type=str, default='-', help='批量模式的输出文件（默认标准输出）')
+    parser.add_argument('--features', type=str, default=FEATURES_FILE, help='批量模式使用的特征文件')
+    parser.add_argument('--chunk_size', type=int, default=BATCH_CHUNK_SIZE, help='批量模式每批向量化处理的比赛数')
     
     args = parser.parse_args()
     
+    if args.batch:
+        run_batch(args.batch, args.output, args.features, args.chunk_size)
+        return
+    
     if args.list_teams:
         list_teams()
         return
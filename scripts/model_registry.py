@@ -0,0 +1,151 @@
+"""
+内存中的模型注册表
+每个模型文件（pickle，或 tree_export 导出的 .npz）只反序列化一次；文件被替换（重新训练后写入新的 pickle）时，
+发现新版本的调用在锁内加载，再原子地替换引用；读取当前版本不需要加锁，正在使用旧版本的调用不受影响。
+批量预测把 N 场比赛的特征矩阵一次标准化、一次 predict_proba，返回主胜/平/客胜概率数组
+"""
+
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+# 结果类别 -> 输出键
+OUTCOME_KEYS = (('H', 'home_win'), ('D', 'draw'), ('A', 'away_win'))
+
+
+def _file_version(path):
+    """文件标识：(inode, 修改时间, 大小)，替换文件后必然变化"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    """
+    按路径缓存已加载的模型
+
+    参数:
+        check_interval: 两次检查文件是否被替换的最小间隔（秒），0 表示每次访问都检查
+    """
+
+    def __init__(self, check_interval=0.0):
+        self.check_interval = check_interval
+        self._entries = {}        # 路径 -> 已加载的模型版本
+        self._checked = {}        # 路径 -> 上次检查时间
+        self._failed = {}         # 路径 -> 加载失败的文件版本，同一版本不再重试
+        self._lock = threading.Lock()
+
+    def _load(self, path, version):
+        if path.endswith('.npz'):
+            # tree_export 导出的纯 NumPy 模型，加载时不需要 scikit-learn
+            from tree_export import load_exported_model
+            model_data = load_exported_model(path)
+        else:
+            with open(path, 'rb') as f:
+                model_data = pickle.load(f)
+        model = model_data['model']
+        classes = list(model.classes_)
+        return {
+            'path': path,
+            'version': version,
+            'loaded_at': time.time(),
+            'model': model,
+            'feature_cols': list(model_data['feature_cols']),
+            'scaler': model_data['scaler'],
+            # 每个结果在 predict_proba 输出中的列号，模型没见过的结果为 None
+            'outcome_columns': {key: classes.index(cls) if cls in classes else None
+                                for cls, key in OUTCOME_KEYS}
+        }
+
+    def get(self, path):
+        """
+        返回 path 的当前模型版本（字典: model / feature_cols / scaler / version / loaded_at ...）
+
+        文件不存在且从未加载过时抛出 FileNotFoundError；
+        新文件加载失败时保留已加载的旧版本并打印错误，没有旧版本时抛出异常
+        """
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and now - self._checked.get(path, 0.0) < self.check_interval:
+            return entry
+
+        try:
+            version = _file_version(path)
+        except FileNotFoundError:
+            if entry is None:
+                raise
+            return entry
+        self._checked[path] = now
+        if entry is not None and (entry['version'] == version or self._failed.get(path) == version):
+            return entry
+
+        with self._lock:
+            # 其他线程可能已经加载了同一版本
+            entry = self._entries.get(path)
+            if entry is not None and entry['version'] == version:
+                return entry
+            try:
+                loaded = self._load(path, version)
+            except Exception as e:
+                if entry is None:
+                    raise
+                self._failed[path] = version
+                print(f"加载新模型 {path} 失败，继续使用已加载的版本: {e}")
+                return entry
+            self._entries[path] = loaded
+            self._failed.pop(path, None)
+        print(f"从{path}加载了模型")
+        return loaded
+
+    def evict(self, path=None):
+        """移除指定路径（默认全部）的缓存"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._checked.clear()
+                self._failed.clear()
+            else:
+                self._entries.pop(path, None)
+                self._checked.pop(path, None)
+                self._failed.pop(path, None)
+
+    def predict_proba(self, path, features):
+        """
+        批量预测 N 场比赛
+
+        参数:
+            features: N x F 特征矩阵（列顺序与模型的 feature_cols 一致），
+                      或包含 feature_cols 的 DataFrame
+        返回:
+            {'home_win': (N,), 'draw': (N,), 'away_win': (N,)}
+        """
+        return predict_proba_batch(self.get(path), features)
+
+
+def predict_proba_batch(entry, features):
+    """用一个已加载的模型版本（或 train_match_result_model 的返回值）批量预测"""
+    feature_cols = entry['feature_cols']
+    if hasattr(features, 'columns'):
+        features = features[feature_cols].to_numpy(dtype=np.float64)
+    X = np.asarray(features, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] != len(feature_cols):
+        raise ValueError(f"特征数不一致: 输入 {X.shape[1]} 列, 模型需要 {len(feature_cols)} 列")
+
+    proba = entry['model'].predict_proba(entry['scaler'].transform(X))
+
+    outcome_columns = entry.get('outcome_columns')
+    if outcome_columns is None:
+        classes = list(entry['model'].classes_)
+        outcome_columns = {key: classes.index(cls) if cls in classes else None for cls, key in OUTCOME_KEYS}
+    return {
+        key: proba[:, column] if column is not None else np.zeros(len(X))
+        for key, column in outcome_columns.items()
+    }
+
+
+# 进程内共享的注册表
+default_registry = ModelRegistry()
@@ -0,0 +1,255 @@
+"""
+并行的逐轮淘汰（successive halving）超参数搜索
+与 GridSearchCV 的区别:
+    1. 按时间顺序划分交叉验证（TimeSeriesSplit），只用过去的比赛预测之后的比赛；
+    2. 候选参数先在少数折上评估，每轮只保留得分最高的 1/factor，再在更多折上评估；
+    3. 各折的拟合分布到进程池中并行执行；
+    4. 每个 (数据, 模型, 参数, 折) 的得分缓存在磁盘上，重复运行时跳过已完成的拟合
+
+用法（在项目根目录运行，对比网格搜索和逐轮淘汰的耗时与得分）:
+    python scripts/model_search.py --matches data/matches_data_PL2024.csv --model_type rf
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+
+# 与原网格搜索相同的参数网格
+PARAM_GRIDS = {
+    'rf': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 10, 20, 30],
+        'min_samples_split': [2, 5, 10]
+    },
+    'gb': {
+        'n_estimators': [50, 100, 200],
+        'learning_rate': [0.01, 0.1, 0.2],
+        'max_depth': [3, 5, 7]
+    }
+}
+
+DEFAULT_SPLITS = 5
+DEFAULT_FACTOR = 3
+# 缓存键的版本，折编号的含义变化时递增（2: 折编号与 TimeSeriesSplit 的顺序一致）
+CACHE_VERSION = 2
+
+
+def build_estimator(model_type, params=None):
+    """按模型类型和参数创建未训练的模型"""
+    params = dict(params or {})
+    if model_type == 'rf':
+        return RandomForestClassifier(random_state=42, **{'n_estimators': 100, **params})
+    if model_type == 'gb':
+        return GradientBoostingClassifier(random_state=42, **params)
+    raise ValueError(f"不支持的模型类型: {model_type}")
+
+
+def data_fingerprint(X, y):
+    """训练数据的哈希，数据有任何变化时缓存自动失效"""
+    digest = hashlib.sha1()
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest.update(str(X.shape).encode())
+    digest.update(X.tobytes())
+    digest.update('\x1f'.join(str(label) for label in y).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FoldCache:
+    """单折得分的磁盘缓存，每条结果一个 JSON 文件"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def key(self, fingerprint, model_type, params, n_splits, fold):
+        payload = json.dumps({
+            'version': CACHE_VERSION,
+            'data': fingerprint,
+            'model_type': model_type,
+            'params': params,
+            'n_splits': n_splits,
+            'fold': fold
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        if not self.cache_dir:
+            return
+        temp_path = f"{self._path(key)}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(temp_path, self._path(key))
+
+
+# 工作进程中的训练数据，由 _init_worker 设置一次，避免每个任务重复传输
+_worker_data = {}
+
+
+def _init_worker(X, y, folds):
+    _worker_data.update(X=X, y=y, folds=folds)
+
+
+def _fit_fold(model_type, params, fold):
+    """训练一折并返回验证集准确率"""
+    X, y = _worker_data['X'], _worker_data['y']
+    train_idx, test_idx = _worker_data['folds'][fold]
+    start = time.perf_counter()
+    model = build_estimator(model_type, params).fit(X[train_idx], y[train_idx])
+    score = accuracy_score(y[test_idx], model.predict(X[test_idx]))
+    return {'score': float(score), 'fit_time': time.perf_counter() - start}
+
+
+def halving_search(model_type, X, y, param_grid=None, n_splits=DEFAULT_SPLITS, factor=DEFAULT_FACTOR,
+                   n_jobs=None, cache_dir=None):
+    """
+    逐轮淘汰搜索最佳参数
+
+    X、y 必须按比赛时间排序。第 r 轮在 min(factor^r, n_splits) 折上评估仍存活的候选，
+    折按 TimeSeriesSplit 的自然顺序使用（训练数据从少到多），
+    早期轮次候选最多、拟合最便宜，保留平均得分最高的 1/factor；
+    所有折都评估完后，平均得分最高的候选胜出
+
+    返回:
+        字典 best_params / best_score / n_fits（实际拟合次数）/ n_cached（命中缓存次数）/ rounds
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    param_grid = param_grid or PARAM_GRIDS[model_type]
+    candidates = list(ParameterGrid(param_grid))
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
+    cache = FoldCache(cache_dir)
+    fingerprint = data_fingerprint(X, y)
+    scores = [dict() for _ in candidates]
+    n_fits = n_cached = 0
+    rounds = []
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    executor = None
+    if n_jobs > 1:
+        executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(X, y, folds))
+    else:
+        _init_worker(X, y, folds)
+
+    try:
+        alive = list(range(len(candidates)))
+        r = 0
+        while True:
+            n_folds = min(factor ** r, n_splits)
+            pending = []
+            for i in alive:
+                for fold in range(n_folds):
+                    if fold in scores[i]:
+                        continue
+                    key = cache.key(fingerprint, model_type, candidates[i], n_splits, fold)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        scores[i][fold] = cached['score']
+                        n_cached += 1
+                    else:
+                        pending.append((i, fold, key))
+
+            if executor is None:
+                for i, fold, key in pending:
+                    result = _fit_fold(model_type, candidates[i], fold)
+                    scores[i][fold] = result['score']
+                    cache.put(key, result)
+            else:
+                futures = {executor.submit(_fit_fold, model_type, candidates[i], fold): (i, fold, key)
+                           for i, fold, key in pending}
+                for future in as_completed(futures):
+                    i, fold, key = futures[future]
+                    result = future.result()
+                    scores[i][fold] = result['score']
+                    cache.put(key, result)
+            n_fits += len(pending)
+
+            mean_scores = {i: float(np.mean([scores[i][fold] for fold in range(n_folds)])) for i in alive}
+            rounds.append({'candidates': len(alive), 'folds': n_folds, 'fits': len(pending)})
+            print(f"第 {r + 1} 轮: {len(alive)} 组参数 x {n_folds} 折, 新拟合 {len(pending)} 次")
+
+            # 平均得分降序，同分时保留网格中靠前的参数
+            alive.sort(key=lambda i: (-mean_scores[i], i))
+            if n_folds == n_splits:
+                break
+            alive = alive[:max(1, math.ceil(len(alive) / factor))]
+            r += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = alive[0]
+    return {
+        'best_params': candidates[best],
+        'best_score': mean_scores[best],
+        'n_fits': n_fits,
+        'n_cached': n_cached,
+        'rounds': rounds
+    }
+
+
+def load_training_frame(matches_paths):
+    """读取比赛 CSV，生成按时间排序、带 Elo 的赛前时点特征"""
+    import pandas as pd
+
+    from elo import add_elo_features
+    from rolling_features import build_point_in_time_features
+
+    matches_df = pd.concat([pd.read_csv(path) for path in matches_paths], ignore_index=True)
+    match_features_df, _ = add_elo_features(build_point_in_time_features(matches_df))
+    return match_features_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比网格搜索与并行逐轮淘汰搜索')
+    parser.add_argument('--matches', type=str, nargs='+', required=True, help='比赛数据 CSV')
+    parser.add_argument('--model_type', type=str, default='rf', choices=sorted(PARAM_GRIDS), help='模型类型')
+    parser.add_argument('--modes', type=str, nargs='+', default=['grid', 'halving', 'halving'],
+                        choices=['grid', 'halving'], help='依次运行的搜索方式（重复 halving 可观察缓存效果）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认为 CPU 核数）')
+    parser.add_argument('--cache_dir', type=str, default=os.path.join('data', 'models', 'search_cache'),
+                        help='单折结果缓存目录')
+    parser.add_argument('--model_dir', type=str, default=os.path.join('data', 'models'), help='模型输出目录')
+    args = parser.parse_args()
+
+    from models import train_match_result_model
+
+    match_features_df = load_training_frame(args.matches)
+    reports = []
+    for mode in args.modes:
+        model_path = os.path.join(args.model_dir, f"match_model_{args.model_type}_{mode}.pkl")
+        model_data = train_match_result_model(match_features_df, args.model_type, model_path=model_path,
+                                              search=mode, n_jobs=args.workers, cache_dir=args.cache_dir)
+        if model_data is not None:
+            reports.append(model_data['search'])
+
+    print("\n搜索方式      耗时(秒)   拟合次数  缓存命中  交叉验证得分  测试集准确率  最佳参数")
+    for report in reports:
+        print(f"{report['mode']:<12}{report['wall_time']:>9.2f}{report['n_fits']:>10}{report['n_cached']:>10}"
+              f"{report['best_score']:>14.4f}{report['test_accuracy']:>14.4f}  {report['best_params']}")
+
+
+if __name__ == "__main__":
+    main()
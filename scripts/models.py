@@ -2,11 +2,15 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import time
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 from sklearn.preprocessing import StandardScaler
 from config import *
+from model_search import PARAM_GRIDS, build_estimator, halving_search
+from model_registry import OUTCOME_KEYS, default_registry, predict_proba_batch
+from tree_export import export_path_for, export_tree_model
 
 def prepare_training_data(match_features_df):
     """准备训练数据"""
@@ -38,42 +42,64 @@ def prepare_training_data(match_features_df):
     
     return X_scaled, y, feature_cols, scaler
 
-def train_match_result_model(match_features_df, model_type='rf'):
-    """训练比赛结果预测模型"""
+def train_match_result_model(match_features_df, model_type='rf', model_path=None, search='grid',
+                             n_jobs=None, cache_dir=None):
+    """
+    训练比赛结果预测模型
+
+    参数:
+        model_path: 模型保存路径，默认为 config 中的 MODEL_SAVE_PATH
+        search: 超参数搜索方式
+            'grid'    - 随机划分测试集，单进程 5 折 GridSearchCV（原方式）
+            'halving' - 按比赛时间划分（最后 20% 为测试集），在时间顺序的折上并行逐轮淘汰，
+                        单折结果缓存在 cache_dir（默认为模型目录下的 search_cache）
+        n_jobs: halving 使用的进程数，默认为 CPU 核数
+    """
+    if model_type not in PARAM_GRIDS:
+        print(f"不支持的模型类型: {model_type}")
+        return None
+    if search not in ('grid', 'halving'):
+        print(f"不支持的搜索方式: {search}")
+        return None
+    
+    if search == 'halving' and 'match_date' in match_features_df.columns:
+        match_features_df = match_features_df.sort_values('match_date', kind='stable')
+    
     X, y, feature_cols, scaler = prepare_training_data(match_features_df)
     
     if X is None or y is None:
         return None
     
-    # 分割训练集和测试集
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # 选择模型
-    if model_type == 'rf':
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        param_grid = {
-            'n_estimators': [50, 100, 200],
-            'max_depth': [None, 10, 20, 30],
-            'min_samples_split': [2, 5, 10]
-        }
-    elif model_type == 'gb':
-        model = GradientBoostingClassifier(random_state=42)
-        param_grid = {
-            'n_estimators': [50, 100, 200],
-            'learning_rate': [0.01, 0.1, 0.2],
-            'max_depth': [3, 5, 7]
-        }
+    model_path = model_path or MODEL_SAVE_PATH
+    model_dir = os.path.dirname(model_path)
+    start = time.perf_counter()
+    
+    if search == 'halving':
+        # 按时间顺序划分训练集和测试集
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+        
+        print("正在进行并行逐轮淘汰搜索以找到最佳参数...")
+        result = halving_search(model_type, X_train, y_train.to_numpy(), n_jobs=n_jobs,
+                                cache_dir=cache_dir or os.path.join(model_dir, 'search_cache'))
+        best_model = build_estimator(model_type, result['best_params']).fit(X_train, y_train)
+        best_params, best_score = result['best_params'], result['best_score']
+        n_fits, n_cached = result['n_fits'], result['n_cached']
     else:
-        print(f"不支持的模型类型: {model_type}")
-        return None
-    
-    # 使用网格搜索找到最佳参数
-    print("正在进行网格搜索以找到最佳参数...")
-    grid_search = GridSearchCV(model, param_grid, cv=5, scoring='accuracy')
-    grid_search.fit(X_train, y_train)
-    
-    best_model = grid_search.best_estimator_
-    print(f"最佳参数: {grid_search.best_params_}")
+        # 分割训练集和测试集
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        # 使用网格搜索找到最佳参数
+        print("正在进行网格搜索以找到最佳参数...")
+        grid_search = GridSearchCV(build_estimator(model_type), PARAM_GRIDS[model_type], cv=5, scoring='accuracy')
+        grid_search.fit(X_train, y_train)
+        
+        best_model = grid_search.best_estimator_
+        best_params, best_score = grid_search.best_params_, grid_search.best_score_
+        n_fits, n_cached = len(grid_search.cv_results_['params']) * 5, 0
+    
+    wall_time = time.perf_counter() - start
+    print(f"最佳参数: {best_params}")
+    print(f"搜索方式 {search}: 耗时 {wall_time:.2f} 秒, 拟合 {n_fits} 次, 最佳交叉验证得分 {best_score:.4f}")
     
     # 在测试集上评估模型
     y_pred = best_model.predict(X_test)
@@ -86,34 +112,71 @@ def train_match_result_model(match_features_df, model_type='rf'):
     print(confusion_matrix(y_test, y_pred))
     
     # 保存模型
-    if not os.path.exists(os.path.dirname(MODEL_SAVE_PATH)):
-        os.makedirs(os.path.dirname(MODEL_SAVE_PATH))
+    if model_dir and not os.path.exists(model_dir):
+        os.makedirs(model_dir)
     
-    with open(MODEL_SAVE_PATH, 'wb') as f:
+    # 先写临时文件再替换，模型注册表不会读到写了一半的文件
+    temp_path = f"{model_path}.tmp"
+    with open(temp_path, 'wb') as f:
         pickle.dump({
             'model': best_model,
             'feature_cols': feature_cols,
             'scaler': scaler
         }, f)
+    os.replace(temp_path, model_path)
+    
+    print(f"模型已保存至 {model_path}")
     
-    print(f"模型已保存至 {MODEL_SAVE_PATH}")
+    # 同时导出纯 NumPy 格式，线上推理无需导入 scikit-learn
+    export_path = export_path_for(model_path)
+    temp_path = f"{export_path}.tmp"
+    export_tree_model({'model': best_model, 'feature_cols': feature_cols, 'scaler': scaler}, temp_path)
+    os.replace(temp_path, export_path)
+    print(f"NumPy 推理模型已导出至 {export_path}")
     
     return {
         'model': best_model,
         'feature_cols': feature_cols,
-        'scaler': scaler
+        'scaler': scaler,
+        'search': {
+            'mode': search,
+            'wall_time': wall_time,
+            'n_fits': n_fits,
+            'n_cached': n_cached,
+            'best_params': best_params,
+            'best_score': best_score,
+            'test_accuracy': accuracy
+        }
     }
 
-def load_model():
-    """加载保存的模型"""
+def load_model(model_path=None):
+    """
+    加载保存的模型
+
+    通过进程内的模型注册表加载：同一版本只反序列化一次，文件被替换后自动加载新版本
+    """
+    model_path = model_path or MODEL_SAVE_PATH
     try:
-        with open(MODEL_SAVE_PATH, 'rb') as f:
-            model_data = pickle.load(f)
-        print(f"从{MODEL_SAVE_PATH}加载了模型")
-        return model_data
-    except:
-        print(f"无法加载模型，请先训练模型")
+        return default_registry.get(model_path)
+    except FileNotFoundError:
+        print(f"找不到模型文件 {model_path}，请先训练模型")
+    except (pickle.UnpicklingError, EOFError, KeyError, AttributeError, ImportError, ValueError) as e:
+        print(f"无法加载模型 {model_path}: {e}")
+    return None
+
+def predict_matches(model_data, features):
+    """
+    批量预测比赛结果，一次 predict_proba 处理全部比赛
+
+    参数:
+        features: N x F 特征矩阵（列顺序为 model_data['feature_cols']）或包含这些列的 DataFrame
+    返回:
+        {'home_win': (N,), 'draw': (N,), 'away_win': (N,)}
+    """
+    if model_data is None:
+        print("无效的模型数据")
         return None
+    return predict_proba_batch(model_data, features)
 
 def predict_match(model_data, match_features):
     """预测单场比赛结果"""
@@ -121,43 +184,27 @@ def predict_match(model_data, match_features):
         print("无效的模型数据")
         return None
     
-    model = model_data['model']
-    feature_cols = model_data['feature_cols']
-    scaler = model_data['scaler']
-    
-    # 提取特征
-    X = match_features[feature_cols].values.reshape(1, -1)
+    # 提取特征，作为只有一行的批量预测
+    X = match_features[model_data['feature_cols']].to_numpy(dtype=np.float64).reshape(1, -1)
+    probs = predict_proba_batch(model_data, X)
     
-    # 标准化特征
-    X_scaled = scaler.transform(X)
-    
-    # 预测结果概率
-    proba = model.predict_proba(X_scaled)[0]
-    
-    # 获取类别标签
-    classes = model.classes_
-    
-    # 创建结果字典
-    result = {}
-    for i, cls in enumerate(classes):
-        if cls == 'H':
-            result['home_win'] = proba[i]
-        elif cls == 'D':
-            result['draw'] = proba[i]
-        elif cls == 'A':
-            result['away_win'] = proba[i]
-    
-    return result
+    # 只包含模型训练时见过的结果
+    classes = set(model_data['model'].classes_)
+    return {key: probs[key][0] for cls, key in OUTCOME_KEYS if cls in classes}
 
 if __name__ == "__main__":
     # 测试模型训练功能
     from data_processing import load_or_process_data
-    from models.feature_engineering import load_or_create_features, prepare_match_features
+    from elo import add_elo_features
+    from rolling_features import build_point_in_time_features
     
     processed_data = load_or_process_data()
-    features_df = load_or_create_features(processed_data['matches'])
     
-    if features_df is not None:
-        match_features_df = prepare_match_features(processed_data['matches'], features_df)
+    # 使用赛前时点特征训练，避免赛季末特征带来的未来信息
+    match_features_df = build_point_in_time_features(processed_data['matches'])
+    if match_features_df is not None:
+        match_features_df, _ = add_elo_features(match_features_df)
+    
+    if match_features_df is not None:
         model_data = train_match_result_model(match_features_df)
         print("模型训练完成")
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""
+赔率数据的列式解析
+The Odds API 返回的 JSON 是比赛数组，每场比赛嵌套 博彩公司 -> 盘口 -> 结果。
+这里逐场增量解析（不把整个 JSON 读入内存，安装了 ijson 时使用 ijson），
+每条赔率只向几个定长类型的列缓冲区追加一个值：
+    - 比赛级字段（match_id / 球队 / 开赛时间 / sport）每场比赛只存一次，赔率行保存比赛序号；
+    - bookmaker / market / outcome 编码为类别编号，字典在整个文件中共享；
+    - price 为 float64；point（spreads / totals 的盘口线，h2h 没有）为 float64，缺失为 NaN
+缓冲区可以按行数分批写出 CSV 后清空，处理任意大的文件时内存占用保持不变
+
+用法（在项目根目录运行）:
+    python scripts/odds_columns.py data/raw_odds_20250302_120000.json --output data/odds_data.csv
+"""
+
+import argparse
+import json
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 与 data_processing.process_odds_data 输出相同的列顺序
+ODDS_COLUMNS = ['match_id', 'home_team', 'away_team', 'commence_time', 'sport',
+                'bookmaker', 'market', 'outcome', 'price', 'point']
+
+# 增量解析每次读取的字符数
+READ_CHUNK_SIZE = 1 << 16
+
+# 分批写出 CSV 时每批的赔率行数
+DEFAULT_FLUSH_ROWS = 200_000
+
+
+def _iter_json_array_stdlib(f, chunk_size=READ_CHUNK_SIZE):
+    """用 json.JSONDecoder.raw_decode 逐个解析顶层数组的元素，缓冲区只保留未解析的部分"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise ValueError("赔率数据应为 JSON 数组")
+    pos += 1
+    expect_item = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("JSON 数组不完整")
+        if buffer[pos] == ']':
+            return
+        if not expect_item:
+            if buffer[pos] != ',':
+                raise ValueError(f"JSON 数组元素之间缺少逗号: {buffer[pos:pos + 20]!r}")
+            pos += 1
+            skip_whitespace()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # 元素跨越了缓冲区末尾，继续读取
+                if eof:
+                    raise
+                fill()
+                continue
+            # 元素后面必须是分隔符，否则可能是被缓冲区末尾截断的数字（如 "1." 后面还有 "25"）
+            if not eof and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                fill()
+                continue
+            break
+        pos = end
+        expect_item = False
+        yield item
+
+
+def iter_odds_matches(source):
+    """
+    逐场产出赔率 JSON 中的比赛
+
+    参数:
+        source: 已解析的比赛列表、JSON 文件路径或以文本/二进制模式打开的文件对象
+    """
+    if isinstance(source, (list, tuple)):
+        yield from source
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_odds_matches(f)
+        return
+
+    if ijson is not None:
+        yield from ijson.items(source, 'item', use_float=True)
+        return
+    if isinstance(source.read(0), bytes):
+        import io
+        source = io.TextIOWrapper(source, encoding='utf-8')
+    yield from _iter_json_array_stdlib(source)
+
+
+class Categories:
+    """字符串 -> 类别编号的字典，编号按首次出现的顺序分配"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class OddsColumns:
+    """赔率数据的列缓冲区"""
+
+    def __init__(self):
+        # 比赛级字段，每场比赛一个值
+        self.match_ids = []
+        self.home_teams = []
+        self.away_teams = []
+        self.commence_times = []
+        self.sports = Categories()
+        self.match_sport = array('H')
+        # 赔率行
+        self.bookmakers = Categories()
+        self.markets = Categories()
+        self.outcomes = Categories()
+        self.row_match = array('I')
+        self.row_bookmaker = array('H')
+        self.row_market = array('H')
+        self.row_outcome = array('I')
+        self.row_price = array('d')
+        self.row_point = array('d')
+        self.n_matches_total = 0
+        self.n_rows_total = 0
+
+    def __len__(self):
+        return len(self.row_price)
+
+    def add_match(self, match):
+        """追加一场比赛的全部赔率，返回新增行数"""
+        match_index = len(self.match_ids)
+        self.match_ids.append(match['id'])
+        self.home_teams.append(match['home_team'])
+        self.away_teams.append(match['away_team'])
+        self.commence_times.append(match['commence_time'])
+        self.match_sport.append(self.sports.code(match['sport_key']))
+        self.n_matches_total += 1
+
+        n_before = len(self.row_price)
+        for bookmaker in match['bookmakers']:
+            bookmaker_code = self.bookmakers.code(bookmaker['key'])
+            for market in bookmaker['markets']:
+                market_code = self.markets.code(market['key'])
+                outcomes = market['outcomes']
+                n = len(outcomes)
+                self.row_outcome.extend([self.outcomes.code(outcome['name']) for outcome in outcomes])
+                self.row_price.extend([float(outcome['price']) for outcome in outcomes])
+                self.row_point.extend([float(outcome.get('point', 'nan')) for outcome in outcomes])
+                self.row_bookmaker.extend([bookmaker_code] * n)
+                self.row_market.extend([market_code] * n)
+                self.row_match.extend([match_index] * n)
+        added = len(self.row_price) - n_before
+        self.n_rows_total += added
+        return added
+
+    def clear(self):
+        """清空已缓冲的比赛和赔率行，保留类别字典（之后的批次编号保持一致）"""
+        for name in ('match_ids', 'home_teams', 'away_teams', 'commence_times'):
+            setattr(self, name, [])
+        for name in ('match_sport', 'row_match', 'row_bookmaker', 'row_market', 'row_outcome', 'row_price',
+                     'row_point'):
+            setattr(self, name, array(getattr(self, name).typecode))
+
+    def to_csv(self, path_or_buf, header=True):
+        """把缓冲的赔率行写出为 CSV"""
+        self.to_frame(parse_dates=False).to_csv(path_or_buf, index=False, header=header)
+
+    def nbytes(self):
+        """赔率行缓冲区占用的字节数"""
+        return sum(buffer.itemsize * len(buffer)
+                   for buffer in (self.row_match, self.row_bookmaker, self.row_market,
+                                  self.row_outcome, self.row_price, self.row_point))
+
+    def to_frame(self, parse_dates=True):
+        """
+        转为 DataFrame，列与 process_odds_data 相同
+
+        字符串列为 Categorical，commence_time 每场比赛只解析一次；
+        parse_dates=False 时 commence_time 为每场比赛格式化一次的字符串（与 to_csv 写出日期的格式相同），
+        避免写 CSV 时逐行格式化带时区的时间
+        """
+        row_match = np.frombuffer(self.row_match, dtype=np.uint32).astype(np.intp)
+
+        def per_match(values):
+            # 比赛级字段: 同一个值只保留一个类别，再按每行的比赛序号展开
+            codes, categories = pd.factorize(pd.Series(values, dtype=object))
+            return pd.Categorical.from_codes(codes[row_match], categories)
+
+        def coded(buffer, categories, dtype):
+            return pd.Categorical.from_codes(np.frombuffer(buffer, dtype=dtype), list(categories.values))
+
+        commence_time = pd.to_datetime(pd.Series(self.commence_times, dtype=object))
+        if parse_dates:
+            commence_time = commence_time.take(row_match).reset_index(drop=True)
+        else:
+            commence_time = per_match(pd.DatetimeIndex(commence_time).astype(str))
+        sport_codes = np.frombuffer(self.match_sport, dtype=np.uint16)
+        return pd.DataFrame({
+            'match_id': per_match(self.match_ids),
+            'home_team': per_match(self.home_teams),
+            'away_team': per_match(self.away_teams),
+            'commence_time': commence_time,
+            'sport': pd.Categorical.from_codes(sport_codes[row_match], list(self.sports.values)),
+            'bookmaker': coded(self.row_bookmaker, self.bookmakers, np.uint16),
+            'market': coded(self.row_market, self.markets, np.uint16),
+            'outcome': coded(self.row_outcome, self.outcomes, np.uint32),
+            'price': np.frombuffer(self.row_price, dtype=np.float64).copy(),
+            'point': np.frombuffer(self.row_point, dtype=np.float64).copy()
+        }, columns=ODDS_COLUMNS)
+
+
+def read_odds_columns(source):
+    """把整个赔率数据解析为一个 OddsColumns"""
+    columns = OddsColumns()
+    for match in iter_odds_matches(source):
+        columns.add_match(match)
+    return columns
+
+
+def write_odds_csv(source, output_path, flush_rows=DEFAULT_FLUSH_ROWS):
+    """
+    流式解析赔率数据并写出 CSV，每缓冲 flush_rows 行写出一次并清空缓冲区
+
+    先写入临时文件，完成后再替换 output_path
+    返回:
+        (比赛数, 赔率行数)
+    """
+    directory = os.path.dirname(output_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    columns = OddsColumns()
+    temp_path = f"{output_path}.tmp"
+    header = True
+    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+        for match in iter_odds_matches(source):
+            columns.add_match(match)
+            if len(columns) >= flush_rows:
+                columns.to_csv(f, header=header)
+                header = False
+                columns.clear()
+        if len(columns) or header:
+            columns.to_csv(f, header=header)
+    os.replace(temp_path, output_path)
+    return columns.n_matches_total, columns.n_rows_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式处理 The Odds API 的赔率 JSON')
+    parser.add_argument('input', type=str, help='赔率 JSON 文件（raw_odds_*.json）')
+    parser.add_argument('--output', type=str, required=True, help='输出 CSV')
+    parser.add_argument('--flush_rows', type=int, default=DEFAULT_FLUSH_ROWS, help='每批写出的赔率行数')
+    args = parser.parse_args()
+
+    n_matches, n_rows = write_odds_csv(args.input, args.output, flush_rows=args.flush_rows)
+    print(f"处理了 {n_matches} 场比赛的 {n_rows} 条赔率，已保存至 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+赔率快照的编码（PostgreSQL 表 odds_history 与本地文件 odds_history.py 共用）
+
+    赔率     赔率 x 100 的整数（0 表示缺失）
+    让球数   整数，没有让球为 GOAL_LINE_NONE
+    盘口     MARKETS 中的序号（had 不让球 / hhad 让球）
+
+只使用标准库：线上部署不安装 numpy / pandas，database.py 在导入时就需要这些编码
+"""
+
+MARKETS = ('had', 'hhad')
+PRICE_SCALE = 100
+# PostgreSQL SMALLINT 的上限
+MAX_ENCODED_PRICE = 32767
+GOAL_LINE_NONE = -128
+
+# 快照中参与变化判断的字段
+VALUE_FIELDS = ('home', 'draw', 'away', 'market', 'goal_line')
+
+
+def encode_price(value):
+    """'2.10' -> 210，无法解析或不大于 0 时为 0"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return 0
+    if not price > 0:
+        return 0
+    return min(int(round(price * PRICE_SCALE)), MAX_ENCODED_PRICE)
+
+
+def encode_goal_line(value):
+    """'-1' / '+1' -> -1 / 1，空值为 GOAL_LINE_NONE"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return GOAL_LINE_NONE
+
+
+def snapshots_from_matches(matches):
+    """
+    从体彩比赛数据（china_lottery_spider.get_formatted_matches 的结果）中提取赔率快照
+
+    返回:
+        (快照字典 match_id / match_date / home / draw / away / market / goal_line, 跳过的比赛数)
+        同一场比赛出现多次时只保留第一次
+    """
+    snapshots = {name: [] for name in ('match_id', 'match_date') + VALUE_FIELDS}
+    seen = set()
+    skipped = 0
+    for match in matches:
+        odds = match.get('odds') or {}
+        hhad = odds.get('hhad') or {}
+        match_id = match.get('match_id')
+        match_date = str(match.get('match_date') or match.get('match_time') or '')[:10]
+        prices = [encode_price(hhad.get(key)) for key in ('h', 'd', 'a')]
+        if not match_id or len(match_date) != 10 or not all(prices) or match_id in seen:
+            skipped += 1
+            continue
+        seen.add(match_id)
+        market = odds.get('type', 'hhad')
+        snapshots['match_id'].append(match_id)
+        snapshots['match_date'].append(match_date)
+        snapshots['home'].append(prices[0])
+        snapshots['draw'].append(prices[1])
+        snapshots['away'].append(prices[2])
+        snapshots['market'].append(MARKETS.index(market) if market in MARKETS else MARKETS.index('hhad'))
+        snapshots['goal_line'].append(encode_goal_line(odds.get('goal_line')) if market == 'hhad' else GOAL_LINE_NONE)
+    return snapshots, skipped
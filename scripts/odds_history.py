@@ -0,0 +1,354 @@
+"""
+只追加的赔率历史存储
+每次同步时记录每场比赛的胜平负赔率，只有赔率（或盘口类型、让球数）变化时才追加一条快照，
+从而保留完整的赔率变动，用于查询"某个时刻的赔率"和"初盘 vs 终盘"
+
+PostgreSQL 表 odds_history 与本地文件使用相同的编码（见 odds_encoding.py）
+
+本地文件后端（离线使用，默认目录 data/odds_history 不提交）目录结构:
+    matches.tsv          比赛表，每行 match_id<TAB>比赛日期，行号即比赛编号（只追加）
+    <比赛日期>.odds      按比赛日期分区，定长 16 字节的快照记录（只追加）
+查询时每个分区按 (比赛编号, 记录时间) 排序建立索引（缓存在内存中，文件增长后重建），
+一批比赛的查询在每个分区上是一次向量化的 searchsorted
+
+用法（在项目根目录运行）:
+    python scripts/odds_history.py --sync --days 3
+    python scripts/odds_history.py --info
+    python scripts/odds_history.py --opening_closing lottery_1029384 lottery_1029385
+    python scripts/odds_history.py --as_of "2025-09-20 12:00:00" --match_ids lottery_1029384
+"""
+
+import argparse
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.odds_encoding import (GOAL_LINE_NONE, MARKETS, MAX_ENCODED_PRICE, PRICE_SCALE, VALUE_FIELDS,
+                                       encode_goal_line, encode_price, snapshots_from_matches)
+except ImportError:
+    from odds_encoding import (GOAL_LINE_NONE, MARKETS, MAX_ENCODED_PRICE, PRICE_SCALE, VALUE_FIELDS,
+                               encode_goal_line, encode_price, snapshots_from_matches)
+
+DEFAULT_ROOT = os.path.join('data', 'odds_history')
+MATCH_TABLE = 'matches.tsv'
+PARTITION_EXTENSION = '.odds'
+
+# 记录时间以 uint32 秒保存
+MAX_EPOCH = 2 ** 32 - 1
+
+RECORD_DTYPE = np.dtype([
+    ('match', '<u4'),
+    ('captured_at', '<u4'),
+    ('home', '<u2'),
+    ('draw', '<u2'),
+    ('away', '<u2'),
+    ('market', 'u1'),
+    ('goal_line', 'i1')
+])
+
+
+def decode_prices(encoded):
+    """整数赔率数组 -> 浮点赔率，0 为 NaN"""
+    encoded = np.asarray(encoded)
+    return np.where(encoded > 0, encoded / PRICE_SCALE, np.nan)
+
+
+def decode_goal_lines(encoded):
+    encoded = np.asarray(encoded)
+    return np.where(encoded == GOAL_LINE_NONE, np.nan, encoded)
+
+
+def to_epoch(value):
+    """datetime / 字符串 / 秒数 -> 整数秒；不带时区的时间按原样保存（与数据库的 TIMESTAMP 列一致）"""
+    if isinstance(value, (int, np.integer, float, np.floating)):
+        return int(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return int(timestamp.value // 10 ** 9)
+
+
+def _snapshot_frame(match_ids, found, records, prefix=''):
+    """把查询到的记录解码为 DataFrame，没有记录的比赛各列为 NaN"""
+    captured_at = pd.to_datetime(np.where(found, records['captured_at'], 0).astype(np.int64), unit='s')
+    market = np.array(MARKETS, dtype=object)[records['market'].clip(0, len(MARKETS) - 1)]
+    return pd.DataFrame({
+        'match_id': match_ids,
+        f'{prefix}captured_at': captured_at.where(found),
+        f'{prefix}market': np.where(found, market, None),
+        f'{prefix}home_odds': np.where(found, decode_prices(records['home']), np.nan),
+        f'{prefix}draw_odds': np.where(found, decode_prices(records['draw']), np.nan),
+        f'{prefix}away_odds': np.where(found, decode_prices(records['away']), np.nan),
+        f'{prefix}goal_line': np.where(found, decode_goal_lines(records['goal_line']), np.nan)
+    })
+
+
+class LocalOddsHistory:
+    """
+    赔率历史的本地文件后端
+
+    同一目录同时只应有一个写入者（进程内的多个线程通过锁串行写入）
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._codes = {}          # match_id -> 比赛编号
+        self._match_ids = []      # 比赛编号 -> match_id
+        self._dates = []          # 比赛编号 -> 比赛日期（分区）
+        self._table_size = 0
+        self._partitions = {}     # 日期 -> (文件大小, 排序后的记录, 排序键)
+        self._lock = threading.Lock()
+
+    def _table_path(self):
+        return os.path.join(self.root, MATCH_TABLE)
+
+    def _partition_path(self, date):
+        return os.path.join(self.root, f"{date}{PARTITION_EXTENSION}")
+
+    def _refresh_match_table(self):
+        """读取比赛表中新增的行"""
+        path = self._table_path()
+        if not os.path.exists(path) or os.path.getsize(path) == self._table_size:
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            f.seek(self._table_size)
+            for line in f:
+                if not line.endswith('\n'):
+                    # 未写完的行，下次再读
+                    break
+                match_id, date = line.rstrip('\n').split('\t')
+                self._codes[match_id] = len(self._match_ids)
+                self._match_ids.append(match_id)
+                self._dates.append(date)
+                self._table_size += len(line.encode('utf-8'))
+
+    def _partition(self, date):
+        """分区的索引: 按 (比赛编号, 记录时间) 排序的记录和对应的 uint64 键"""
+        path = self._partition_path(date)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._partitions.get(date)
+        if cached is not None and cached[0] == size:
+            return cached
+        # 忽略写入中断留下的不完整记录
+        count = size // RECORD_DTYPE.itemsize
+        records = np.fromfile(path, dtype=RECORD_DTYPE, count=count) if count else np.zeros(0, RECORD_DTYPE)
+        keys = (records['match'].astype(np.uint64) << np.uint64(32)) | records['captured_at'].astype(np.uint64)
+        # 记录按时间追加，稳定排序保证同一秒内的多条记录保持写入顺序
+        order = np.argsort(keys, kind='stable')
+        cached = (size, records[order], keys[order])
+        self._partitions[date] = cached
+        return cached
+
+    def _lookup(self, match_ids):
+        """match_id -> (比赛编号数组, 日期数组, 是否存在)"""
+        self._refresh_match_table()
+        codes = np.array([self._codes.get(match_id, -1) for match_id in match_ids], dtype=np.int64)
+        known = codes >= 0
+        dates = np.array([self._dates[code] if code >= 0 else '' for code in codes], dtype=object)
+        return codes, dates, known
+
+    def _by_partition(self, dates, known):
+        """按分区分组的行号"""
+        if not known.any():
+            return []
+        labels, uniques = pd.factorize(dates[known])
+        rows = np.flatnonzero(known)
+        return [(date, rows[labels == i]) for i, date in enumerate(uniques)]
+
+    def append(self, matches, captured_at=None):
+        """
+        记录一次同步的赔率，只追加赔率有变化（或第一次出现）的比赛
+
+        参数:
+            matches: 体彩比赛数据列表
+            captured_at: 记录时间，默认为当前时间
+        返回:
+            统计信息字典 {'appended': 追加数量, 'unchanged': 未变化数量, 'skipped': 跳过数量}
+        """
+        snapshots, skipped = snapshots_from_matches(matches)
+        stats = {'appended': 0, 'unchanged': 0, 'skipped': skipped}
+        if not snapshots['match_id']:
+            return stats
+        captured = to_epoch(captured_at if captured_at is not None else datetime.now())
+
+        with self._lock:
+            if not os.path.exists(self.root):
+                os.makedirs(self.root)
+            self._refresh_match_table()
+
+            # 新比赛先写入比赛表，快照中的比赛编号总能在比赛表中找到
+            new_lines = []
+            for match_id, date in zip(snapshots['match_id'], snapshots['match_date']):
+                if match_id not in self._codes:
+                    new_lines.append(f"{match_id}\t{date}\n")
+                    self._codes[match_id] = len(self._match_ids)
+                    self._match_ids.append(match_id)
+                    self._dates.append(date)
+            if new_lines:
+                content = ''.join(new_lines)
+                with open(self._table_path(), 'a', encoding='utf-8') as f:
+                    f.write(content)
+                self._table_size += len(content.encode('utf-8'))
+
+            records = np.zeros(len(snapshots['match_id']), RECORD_DTYPE)
+            records['captured_at'] = captured
+            for field in VALUE_FIELDS:
+                records[field] = snapshots[field]
+            codes, dates, known = self._lookup(snapshots['match_id'])
+            records['match'] = codes
+
+            # 比赛日期以首次记录时为准（比赛改期后仍写入原分区）
+            for date, rows in self._by_partition(dates, known):
+                _, stored, keys = self._partition(date)
+                latest = self._latest(stored, keys, codes[rows])
+                changed = latest < 0
+                if len(stored):
+                    previous = stored[np.maximum(latest, 0)]
+                    for field in VALUE_FIELDS:
+                        changed |= previous[field] != records[field][rows]
+                if changed.any():
+                    with open(self._partition_path(date), 'ab') as f:
+                        # 截掉写入中断留下的不完整记录，保证追加的记录对齐
+                        tail = f.tell() % RECORD_DTYPE.itemsize
+                        if tail:
+                            f.truncate(f.tell() - tail)
+                        f.write(records[rows[changed]].tobytes())
+                stats['appended'] += int(changed.sum())
+                stats['unchanged'] += int((~changed).sum())
+        return stats
+
+    @staticmethod
+    def _latest(stored, keys, codes, at=None):
+        """每个比赛编号在 at（默认不限）之前最后一条记录的位置，没有时为 -1"""
+        codes = codes.astype(np.uint64)
+        if at is None:
+            target = ((codes + np.uint64(1)) << np.uint64(32))
+            positions = np.searchsorted(keys, target, side='left') - 1
+        else:
+            at = np.clip(at, 0, MAX_EPOCH).astype(np.uint64)
+            target = (codes << np.uint64(32)) | at
+            positions = np.searchsorted(keys, target, side='right') - 1
+        valid = positions >= 0
+        valid[valid] = stored['match'][positions[valid]] == codes[valid]
+        return np.where(valid, positions, -1)
+
+    def as_of(self, match_ids, at):
+        """
+        每场比赛在 at 时刻（含）的赔率
+
+        参数:
+            at: 一个时刻，或与 match_ids 等长的时刻列表（如各场比赛的开赛时间）
+        返回:
+            DataFrame: match_id / captured_at / market / home_odds / draw_odds / away_odds / goal_line，
+            没有记录的比赛各列为 NaN
+        """
+        match_ids = list(match_ids)
+        at = np.asarray([to_epoch(value) for value in at] if np.ndim(at) else [to_epoch(at)] * len(match_ids),
+                        dtype=np.int64)
+        result = np.zeros(len(match_ids), RECORD_DTYPE)
+        found = np.zeros(len(match_ids), dtype=bool)
+        codes, dates, known = self._lookup(match_ids)
+        for date, rows in self._by_partition(dates, known):
+            _, stored, keys = self._partition(date)
+            positions = self._latest(stored, keys, codes[rows], at=at[rows])
+            hit = positions >= 0
+            result[rows[hit]] = stored[positions[hit]]
+            found[rows[hit]] = True
+        return _snapshot_frame(match_ids, found, result)
+
+    def opening_closing(self, match_ids, before=None):
+        """
+        每场比赛的初盘（第一条记录）和终盘（最后一条记录，或 before 时刻之前的最后一条）
+
+        返回:
+            DataFrame: match_id / opening_* / closing_* / n_snapshots
+        """
+        match_ids = list(match_ids)
+        n = len(match_ids)
+        opening = np.zeros(n, RECORD_DTYPE)
+        closing = np.zeros(n, RECORD_DTYPE)
+        found = np.zeros(n, dtype=bool)
+        n_snapshots = np.zeros(n, dtype=np.int64)
+        if before is not None:
+            before = np.asarray([to_epoch(value) for value in before] if np.ndim(before)
+                                else [to_epoch(before)] * n, dtype=np.int64)
+
+        codes, dates, known = self._lookup(match_ids)
+        for date, rows in self._by_partition(dates, known):
+            _, stored, keys = self._partition(date)
+            first = np.searchsorted(keys, codes[rows].astype(np.uint64) << np.uint64(32), side='left')
+            last = self._latest(stored, keys, codes[rows],
+                                at=None if before is None else before[rows])
+            hit = last >= 0
+            opening[rows[hit]] = stored[first[hit]]
+            closing[rows[hit]] = stored[last[hit]]
+            n_snapshots[rows[hit]] = last[hit] - first[hit] + 1
+            found[rows[hit]] = True
+
+        frame = _snapshot_frame(match_ids, found, opening, prefix='opening_')
+        closing_frame = _snapshot_frame(match_ids, found, closing, prefix='closing_')
+        frame = pd.concat([frame, closing_frame.drop(columns='match_id')], axis=1)
+        frame['n_snapshots'] = n_snapshots
+        return frame
+
+    def history(self, match_id):
+        """一场比赛的全部快照（按时间排序）"""
+        codes, dates, known = self._lookup([match_id])
+        if not known[0]:
+            return _snapshot_frame([], np.zeros(0, dtype=bool), np.zeros(0, RECORD_DTYPE))
+        _, stored, keys = self._partition(dates[0])
+        code = np.uint64(codes[0])
+        start = np.searchsorted(keys, code << np.uint64(32), side='left')
+        end = np.searchsorted(keys, (code + np.uint64(1)) << np.uint64(32), side='left')
+        records = stored[start:end]
+        return _snapshot_frame([match_id] * len(records), np.ones(len(records), dtype=bool), records)
+
+    def info(self):
+        """各分区的快照数和文件大小"""
+        self._refresh_match_table()
+        partitions = []
+        if os.path.exists(self.root):
+            for filename in sorted(os.listdir(self.root)):
+                if filename.endswith(PARTITION_EXTENSION):
+                    size = os.path.getsize(os.path.join(self.root, filename))
+                    partitions.append({'date': filename[:-len(PARTITION_EXTENSION)],
+                                       'snapshots': size // RECORD_DTYPE.itemsize, 'bytes': size})
+        return {'matches': len(self._match_ids), 'partitions': partitions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='赔率历史存储（本地文件）')
+    parser.add_argument('--root', type=str, default=DEFAULT_ROOT, help='存储目录')
+    parser.add_argument('--sync', action='store_true', help='从体彩官网获取当前赔率并记录')
+    parser.add_argument('--days', type=int, default=3, help='同步未来天数')
+    parser.add_argument('--info', action='store_true', help='显示各分区的快照数')
+    parser.add_argument('--as_of', type=str, default=None, help='查询该时刻的赔率（需要 --match_ids）')
+    parser.add_argument('--match_ids', type=str, nargs='+', default=[], help='比赛 ID')
+    parser.add_argument('--opening_closing', type=str, nargs='+', default=None, help='查询这些比赛的初盘和终盘')
+    args = parser.parse_args()
+
+    store = LocalOddsHistory(args.root)
+    if args.sync:
+        from china_lottery_spider import ChinaLotterySpider
+
+        matches = ChinaLotterySpider().get_formatted_matches(days_ahead=args.days)
+        stats = store.append(matches)
+        print(f"记录 {len(matches)} 场比赛: 新快照 {stats['appended']}, 未变化 {stats['unchanged']}, "
+              f"跳过 {stats['skipped']}")
+    if args.info:
+        info = store.info()
+        print(f"{info['matches']} 场比赛, {len(info['partitions'])} 个分区")
+        for partition in info['partitions']:
+            print(f"  {partition['date']}: {partition['snapshots']} 条快照, {partition['bytes']} 字节")
+    if args.as_of:
+        print(store.as_of(args.match_ids, args.as_of).to_string(index=False))
+    if args.opening_closing:
+        print(store.opening_closing(args.opening_closing).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+每场比赛一行的赔率宽表
+odds_data_*.csv 按 比赛 × 博彩公司 × 盘口 × 选项 逐行存放，定价和回测每次都要对全表分组、透视。
+这里一次性（全部以数组计算）把长表转为宽表，每场比赛一行:
+
+    {盘口}_{选项}_best / _median / _mean / _n    最高赔率、中位数、平均值、报价的博彩公司数
+    {盘口}_overround                              各博彩公司抽水（1/赔率之和 - 1）的中位数，只统计报全所有选项的公司
+    {盘口}_best_overround                         按各选项最高赔率计算的抽水（为负说明存在套利）
+    spreads_line / totals_line                    统计所用的盘口线（spreads 为主队的让球数）
+
+盘口与选项见 MARKET_SIDES；不大于 1 的赔率（暂停或已结算的报价）不计入。
+不同盘口线的赔率不可比较，spreads / totals 只统计每场比赛的主盘口线（报价最多的线，相同时取较小的线）；
+没有 point 列的旧 CSV 无法区分盘口线，这两个盘口的列为空（报价数为 0）。
+宽表按 match_id 排序，以特征存储格式（feature_store.py）保存为 odds_table_*.fstore，
+头部记录球队、开赛时间和源 CSV 的大小与修改时间，源 CSV 变化后 load_odds_table 自动重建。
+宽表是由 CSV 派生的缓存，不提交（见 .gitignore）
+
+用法（在项目根目录运行）:
+    python scripts/odds_table.py data/odds_data_SA2024.csv
+    python scripts/odds_table.py --data_dir data
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_store import open_feature_store, save_feature_store, store_path, widen_float32
+
+MARKET_SIDES = {
+    'h2h': ('home', 'draw', 'away'),
+    'spreads': ('home', 'away'),
+    'totals': ('over', 'under'),
+}
+PRICE_STATS = ('best', 'median', 'mean', 'n')
+# 有盘口线（point）的盘口
+LINE_MARKETS = ('spreads', 'totals')
+MATCH_COLUMNS = ['home_team', 'away_team', 'commence_time']
+
+# 宽表的列定义或统计口径变化时递增，旧版本的存储在读取时视为过期（2: spreads / totals 按主盘口线统计）
+TABLE_VERSION = 2
+
+# (盘口, 选项) 按 MARKET_SIDES 的顺序编号
+SIDES = [(market, side) for market, sides in MARKET_SIDES.items() for side in sides]
+
+
+def table_path(odds_path):
+    """
+    宽表存储路径
+
+    例如 data/odds_data_SA2024.csv -> data/odds_table_SA2024.fstore
+    """
+    directory, name = os.path.split(odds_path)
+    return store_path(os.path.join(directory, name.replace('odds_data', 'odds_table', 1)))
+
+
+def table_columns():
+    """宽表的数值列名"""
+    columns = [f"{market}_{side}_{stat}" for market, side in SIDES for stat in PRICE_STATS]
+    for market in MARKET_SIDES:
+        columns += [f"{market}_overround", f"{market}_best_overround"]
+        if market in LINE_MARKETS:
+            columns.append(f"{market}_line")
+    return columns
+
+
+def _side_codes(odds):
+    """每行的 (盘口, 选项) 编号，不属于 MARKET_SIDES 的行为 -1"""
+    market = np.asarray(odds['market'], dtype=object)
+    outcome = np.asarray(odds['outcome'], dtype=object)
+    names = {
+        'home': outcome == np.asarray(odds['home_team'], dtype=object),
+        'away': outcome == np.asarray(odds['away_team'], dtype=object),
+        'draw': outcome == 'Draw',
+        'over': outcome == 'Over',
+        'under': outcome == 'Under',
+    }
+    conditions = [(market == m) & names[side] for m, side in SIDES]
+    return np.select(conditions, np.arange(len(SIDES)), -1)
+
+
+def _row_lines(odds, side):
+    """每行的盘口线: totals 为 point，spreads 统一为主队的让球数（客队行取反）；没有 point 列时为 NaN"""
+    if 'point' not in odds:
+        return np.full(len(side), np.nan)
+    point = np.asarray(odds['point'], dtype=np.float64)
+    return np.where(side == SIDES.index(('spreads', 'away')), -point, point)
+
+
+def _main_lines(groups, lines, n_groups):
+    """
+    每组（比赛 × 盘口）的主盘口线: 报价最多的线，相同时取较小的线
+
+    返回:
+        长度为 n_groups 的数组，没有报价的组为 NaN
+    """
+    main = np.full(n_groups, np.nan)
+    if not len(groups):
+        return main
+    line_codes, line_values = pd.factorize(lines)
+    keys, counts = np.unique(groups * len(line_values) + line_codes, return_counts=True)
+    key_groups = keys // len(line_values)
+    key_lines = np.asarray(line_values)[keys % len(line_values)]
+    order = np.lexsort((key_lines, -counts, key_groups))
+    first = order[np.r_[True, key_groups[order][1:] != key_groups[order][:-1]]]
+    main[key_groups[first]] = key_lines[first]
+    return main
+
+
+def _group_stats(groups, values, n_groups):
+    """
+    按组编号计算最大值、中位数、平均值和个数（排序后按组的起止位置取值）
+
+    返回:
+        (最大值, 中位数, 平均值, 个数)，空组的前三项为 NaN
+    """
+    order = np.lexsort((values, groups))
+    values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    present = counts > 0
+
+    best = np.full(n_groups, np.nan)
+    median = np.full(n_groups, np.nan)
+    mean = np.full(n_groups, np.nan)
+    best[present] = values[ends[present] - 1]
+    lo = starts[present] + (counts[present] - 1) // 2
+    hi = starts[present] + counts[present] // 2
+    median[present] = (values[lo] + values[hi]) / 2
+    mean[present] = np.bincount(groups, weights=values, minlength=n_groups)[present] / counts[present]
+    return best, median, mean, counts
+
+
+def build_odds_table(odds):
+    """
+    由长表构造宽表
+
+    参数:
+        odds: odds_data_*.csv 路径（str 或 os.PathLike），或 process_odds_data 返回的 DataFrame
+    返回:
+        以 match_id 为索引（已排序）的 DataFrame: home_team, away_team, commence_time 和 table_columns()
+    """
+    if isinstance(odds, (str, os.PathLike)):
+        odds = pd.read_csv(odds, dtype={'match_id': str, 'commence_time': str})
+
+    match_codes, match_ids = pd.factorize(np.asarray(odds['match_id'], dtype=object), sort=True)
+    n_matches = len(match_ids)
+    first = np.unique(match_codes, return_index=True)[1]
+    table = pd.DataFrame({col: np.asarray(odds[col].astype(str), dtype=object)[first] for col in MATCH_COLUMNS},
+                         index=pd.Index(match_ids, name='match_id'))
+
+    price = np.asarray(odds['price'], dtype=np.float64)
+    side = _side_codes(odds)
+    lines = _row_lines(odds, side)
+    side_market = np.array([list(MARKET_SIDES).index(market) for market, _ in SIDES])
+    line_market = np.array([market in LINE_MARKETS for market in MARKET_SIDES])
+    has_line = line_market[side_market[side]] & (side >= 0)
+    valid = (side >= 0) & np.isfinite(price) & (price > 1) & (~has_line | np.isfinite(lines))
+    book_codes = pd.factorize(np.asarray(odds['bookmaker'], dtype=object))[0][valid]
+    match_codes, side, price, lines, has_line = (match_codes[valid], side[valid], price[valid], lines[valid],
+                                                 has_line[valid])
+
+    # spreads / totals 只保留每场比赛的主盘口线
+    market_groups = match_codes * len(MARKET_SIDES) + side_market[side]
+    main_lines = _main_lines(market_groups[has_line], lines[has_line], n_matches * len(MARKET_SIDES))
+    keep = ~has_line | (lines == main_lines[market_groups])
+    book_codes, match_codes, side, price = book_codes[keep], match_codes[keep], side[keep], price[keep]
+
+    # 同一博彩公司对同一选项只取最后一条报价
+    n_books = int(book_codes.max()) + 1 if len(book_codes) else 1
+    groups = match_codes * len(SIDES) + side
+    keep = np.unique((groups * n_books + book_codes)[::-1], return_index=True)[1]
+    keep = len(groups) - 1 - keep
+    groups, book_codes, price = groups[keep], book_codes[keep], price[keep]
+
+    best, median, mean, counts = _group_stats(groups, price, n_matches * len(SIDES))
+    stats = {'best': best, 'median': median, 'mean': mean, 'n': counts.astype(np.float64)}
+    columns = {}
+    for k, (market, side_name) in enumerate(SIDES):
+        for stat in PRICE_STATS:
+            columns[f"{market}_{side_name}_{stat}"] = stats[stat][k::len(SIDES)]
+
+    # 每家博彩公司在每个盘口上的 1/赔率 之和；报全所有选项时才计入抽水
+    market_of = side_market[groups % len(SIDES)]
+    book_groups, book_index = np.unique((groups // len(SIDES) * len(MARKET_SIDES) + market_of) * n_books
+                                        + book_codes, return_inverse=True)
+    inverse_sum = np.bincount(book_index, weights=1 / price)
+    quoted = np.bincount(book_index)
+    book_market = book_groups // n_books
+    n_sides = np.array([len(sides) for sides in MARKET_SIDES.values()])
+    complete = quoted == n_sides[book_market % len(MARKET_SIDES)]
+    overround = _group_stats(book_market[complete], inverse_sum[complete] - 1,
+                             n_matches * len(MARKET_SIDES))[1]
+
+    for m, (market, sides) in enumerate(MARKET_SIDES.items()):
+        columns[f"{market}_overround"] = overround[m::len(MARKET_SIDES)]
+        columns[f"{market}_best_overround"] = sum(1 / columns[f"{market}_{s}_best"] for s in sides) - 1
+        if market in LINE_MARKETS:
+            columns[f"{market}_line"] = main_lines[m::len(MARKET_SIDES)]
+
+    return table.join(pd.DataFrame(columns, index=table.index)[table_columns()])
+
+
+def save_odds_table(table, odds_path):
+    """
+    保存宽表，头部记录各场比赛的球队、开赛时间和源 CSV 的大小与修改时间
+
+    返回:
+        (存储路径, 构建版本号)
+    """
+    metadata = {
+        'table_version': TABLE_VERSION,
+        'source': _source_identity(odds_path),
+        'matches': {col: table[col].astype(str).tolist() for col in MATCH_COLUMNS}
+    }
+    return save_feature_store(table[table_columns()], table_path(odds_path), metadata=metadata)
+
+
+def _source_identity(odds_path):
+    try:
+        stat = os.stat(odds_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _read_table(path):
+    header, columns = open_feature_store(path, mmap=False)
+    matches = header.get('metadata', {}).get('matches', {})
+    table = pd.DataFrame(widen_float32(columns.T), columns=header['columns'],
+                         index=pd.Index(header['teams'], name='match_id'))
+    for position, col in enumerate(MATCH_COLUMNS):
+        table.insert(position, col, matches.get(col, [None] * len(table)))
+    return header, table
+
+
+def load_odds_table(odds_path, rebuild=True):
+    """
+    读取赔率宽表
+
+    存储不存在、版本不是 TABLE_VERSION 或与源 CSV 不一致时，rebuild 为 True 则由源 CSV 重建并保存，
+    否则返回 None；源 CSV 不存在时直接使用已有的（同版本的）存储
+    """
+    path = table_path(odds_path)
+    source = _source_identity(odds_path)
+    try:
+        header, table = _read_table(path)
+        metadata = header.get('metadata', {})
+        if metadata.get('table_version') == TABLE_VERSION and (source is None or metadata.get('source') == source):
+            return table
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    if not rebuild or source is None:
+        return None
+    table = build_odds_table(odds_path)
+    save_odds_table(table, odds_path)
+    return table
+
+
+def build_tables(paths):
+    """为多个 odds_data_*.csv 重建并保存宽表"""
+    built = []
+    for odds_path in paths:
+        table = build_odds_table(odds_path)
+        path, version = save_odds_table(table, odds_path)
+        built.append(path)
+        print(f"已生成 {path}（{len(table)} 场比赛，版本 {version}）")
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description='由长格式赔率 CSV 生成每场比赛一行的赔率宽表')
+    parser.add_argument('paths', type=str, nargs='*', help='odds_data_*.csv 路径')
+    parser.add_argument('--data_dir', type=str, default='data', help='未指定路径时处理该目录下全部 odds_data_*.csv')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(args.data_dir, 'odds_data_*.csv')))
+    if not paths:
+        print(f"{args.data_dir} 中没有赔率数据")
+        return
+    build_tables(paths)
+
+
+if __name__ == "__main__":
+    main()
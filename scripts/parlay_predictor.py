@@ -1,16 +1,140 @@
-import pandas as pd
 import numpy as np
-from scipy.stats import poisson
 import argparse
 import os
 import json
-from itertools import product
+import math
+import heapq
+
+from poisson_engine import DEFAULT_MAX_GOALS, predict_batch, score_matrix_batch
+from markets import MARKET_MAX_GOALS, markets_to_dict, parse_goal_line, price_markets
+from system_bet import evaluate_system_bet
+from feature_store import load_feature_store
+# 特征矩阵的列顺序（与 feature_engineering.create_team_features 的输出一致）
+from rolling_features import FEATURE_COLUMNS
+
+_HOME_GOALS_SCORED = FEATURE_COLUMNS.index('home_goals_scored_avg')
+_HOME_GOALS_CONCEDED = FEATURE_COLUMNS.index('home_goals_conceded_avg')
+_AWAY_GOALS_SCORED = FEATURE_COLUMNS.index('away_goals_scored_avg')
+_AWAY_GOALS_CONCEDED = FEATURE_COLUMNS.index('away_goals_conceded_avg')
+
+# 对数回报的并列容差，以及并列时最多额外展开的组合数
+_TIE_TOLERANCE = 1e-9
+_MAX_TIE_EXPANSION = 1000
+
+def normalize_team_name(team_name):
+    """规范化球队名称：合并空白并忽略大小写"""
+    return " ".join(str(team_name).split()).casefold()
+
+def expected_goals(home_features, away_features):
+    """
+    根据两队特征向量计算主客队预期进球数
+    
+    参数可以是单个特征向量，也可以是 (N, F) 的特征矩阵（列顺序为 FEATURE_COLUMNS）
+    """
+    home_expected_goals = (home_features[..., _HOME_GOALS_SCORED] * 0.7 + 
+                          away_features[..., _AWAY_GOALS_CONCEDED] * 0.3) * 1.1  # 主场优势
+    
+    away_expected_goals = (away_features[..., _AWAY_GOALS_SCORED] * 0.7 + 
+                          home_features[..., _HOME_GOALS_CONCEDED] * 0.3) * 0.9  # 客场劣势
+    
+    return home_expected_goals, away_expected_goals
+
+def _log_return(odds, prob):
+    """单项投注的对数期望回报 log(odds * prob)"""
+    value = odds * prob
+    return math.log(value) if value > 0 else float('-inf')
+
+def top_k_combinations(leg_options, k=10):
+    """
+    在各场投注选项的笛卡尔积中找出期望回报最高的 k 个串关组合
+    
+    串关期望回报为各场 odds * prob 的乘积，等价于对数期望回报之和，
+    因此可以对每场选项按对数回报降序排列后，用最大堆惰性展开积空间，
+    复杂度约为 O(n·k·log k)，而不是 O(3^n)。
+    
+    参数:
+        leg_options: 每场比赛的投注选项列表，元素为 (bet_type, ev, odds, prob)
+        k: 返回的组合数量
+        
+    返回:
+        按期望值降序排列的组合列表，每个组合为各场所选选项组成的元组；
+        期望值相同时保持与 itertools.product 相同的先后顺序
+    """
+    if k <= 0 or not leg_options or any(len(options) == 0 for options in leg_options):
+        return []
+    
+    # 每场按对数回报降序排列（稳定排序，保持原有顺序作为并列时的次序）
+    orders = []
+    scores = []
+    for options in leg_options:
+        leg_scores = [_log_return(odds, prob) for _, _, odds, prob in options]
+        order = sorted(range(len(options)), key=lambda i: -leg_scores[i])
+        orders.append(order)
+        scores.append([leg_scores[i] for i in order])
+    
+    n = len(leg_options)
+    start = (0,) * n
+    # 堆元素: (-对数回报之和, 原始选项下标元组, 排序后下标元组, 最后一次递增的位置)
+    heap = [(-sum(leg[0] for leg in scores), tuple(order[0] for order in orders), start, 0)]
+    results = []
+    cutoff = None
+    
+    while heap:
+        # 取满 k 个后，继续取出与第 k 名对数回报几乎相同的组合，
+        # 以免对数舍入误差打乱期望值完全相同的并列组合
+        if cutoff is not None and (heap[0][0] > cutoff or len(results) >= k + _MAX_TIE_EXPANSION):
+            break
+        neg_score, original, ranks, pos = heapq.heappop(heap)
+        results.append(original)
+        if len(results) == k:
+            cutoff = neg_score + _TIE_TOLERANCE
+        
+        # 只递增 pos 及其之后的位置，保证每个组合恰好生成一次
+        for i in range(pos, n):
+            next_rank = ranks[i] + 1
+            if next_rank >= len(scores[i]):
+                continue
+            child_ranks = ranks[:i] + (next_rank,) + ranks[i + 1:]
+            child_original = original[:i] + (orders[i][next_rank],) + original[i + 1:]
+            # 重新求和而非增量更新，避免 log(0) = -inf 时出现 inf - inf
+            child_score = -sum(scores[j][rank] for j, rank in enumerate(child_ranks))
+            heapq.heappush(heap, (child_score, child_original, child_ranks, i))
+    
+    combos = [tuple(leg_options[i][j] for i, j in enumerate(original)) for original in results]
+    
+    # 用与原实现相同的乘积方式计算期望值做最终排序，消除对数求和的舍入差异
+    def exact_value(combo):
+        total_odds = 1.0
+        total_prob = 1.0
+        for _, _, odds, prob in combo:
+            total_odds *= odds
+            total_prob *= prob
+        return total_odds * total_prob - 1
+    
+    order = sorted(range(len(combos)), key=lambda i: (-exact_value(combos[i]), results[i]))
+    return [combos[i] for i in order[:k]]
 
 class ParlayPredictor:
     """足球比赛串关预测器"""
     
-    def __init__(self):
-        """初始化预测器"""
+    def __init__(self, data_dir="data", use_store=True, score_cache=None, lambda_provider=None,
+                 lambda_adjuster=None):
+        """
+        初始化预测器
+        
+        参数:
+            data_dir: 特征数据目录
+            use_store: 是否优先从列式特征存储加载（不存在时回退到 CSV）
+            score_cache: 可选的比分矩阵缓存（ScoreMatrixCache），例如 poisson_engine.default_score_cache；
+                         启用后预期进球按缓存的量化步长取整
+            lambda_provider: 可选的预期进球来源，调用形式为 provider(home_team, away_team, league_code)，
+                             返回 (λ_home, λ_away) 或 None；例如 dixon_coles.load_league_models()。
+                             返回 None 时回退到基于赛季特征的公式
+            lambda_adjuster: 可选的预期进球调整，调用形式为
+                             adjuster(主队名列表, 客队名列表, λ_home 数组, λ_away 数组) -> (λ_home, λ_away)，
+                             例如 elo.EloLambdaAdjuster；只用于基于特征公式的比赛，
+                             lambda_provider 给出的预期进球不再调整
+        """
         self.leagues = {
             "PL": "英超",
             "PD": "西甲",
@@ -18,60 +142,126 @@ class ParlayPredictor:
             "BL1": "德甲",
             "FL1": "法甲"
         }
+        self.data_dir = data_dir
+        self.use_store = use_store
+        self.score_cache = score_cache
+        self.lambda_provider = lambda_provider
+        self.lambda_adjuster = lambda_adjuster
         
-        # 加载所有可用的特征数据
-        self.features = {}
-        for league_code in self.leagues.keys():
-            file_path = f"data/features_{league_code}2024.csv"
-            if os.path.exists(file_path):
-                self.features[league_code] = pd.read_csv(file_path, index_col=0)
-                print(f"已加载 {self.leagues[league_code]} 数据")
-        
-        if not self.features:
-            print("错误: 未找到任何联赛数据文件")
+        # 联赛特征在首次访问时才加载
+        self._matrices = {}       # 联赛代码 -> 按 FEATURE_COLUMNS 排列的特征矩阵（优先为列式存储的 float32 内存映射视图）
+        self._team_names = {}     # 联赛代码 -> 行号对应的原始球队名
+        self._league_rows = {}    # (联赛代码, 规范化球队名) -> 行号
+        self._all_loaded = False
+        self.team_index = {}      # 规范化球队名 -> (联赛代码, 行号)，加载全部联赛后按联赛顺序建立
     
-    def get_team_features(self, team_name, league_code=None):
-        """获取球队特征"""
-        if league_code and league_code in self.features:
-            # 在指定联赛中查找
-            if team_name in self.features[league_code].index:
-                return self.features[league_code].loc[team_name]
+    def _load_league_matrix(self, league_code):
+        """从列式存储或 CSV 读取一个联赛的特征，返回 (球队名列表, 特征矩阵)"""
+        file_path = os.path.join(self.data_dir, f"features_{league_code}2024.csv")
         
-        # 在所有联赛中查找
-        for code, df in self.features.items():
-            if team_name in df.index:
-                return df.loc[team_name]
+        if self.use_store:
+            stored = load_feature_store(file_path)
+            if stored is not None:
+                teams, columns, matrix = stored
+                if list(columns) != FEATURE_COLUMNS:
+                    positions = [columns.index(col) if col in columns else None for col in FEATURE_COLUMNS]
+                    matrix = np.column_stack([
+                        matrix[:, pos] if pos is not None else np.full(len(teams), np.nan)
+                        for pos in positions
+                    ])
+                return teams, matrix
+        
+        if os.path.exists(file_path):
+            import pandas as pd
+            df = pd.read_csv(file_path, index_col=0)
+            matrix = np.ascontiguousarray(df.reindex(columns=FEATURE_COLUMNS).to_numpy(dtype=np.float64))
+            return list(df.index), matrix
         
-        print(f"警告: 找不到球队 '{team_name}' 的数据")
         return None
     
-    def predict_match(self, home_team, away_team, home_odds, draw_odds, away_odds, league_code=None):
-        """预测单场比赛结果"""
-        home_features = self.get_team_features(home_team, league_code)
-        away_features = self.get_team_features(away_team, league_code)
+    def _ensure_league(self, league_code):
+        """首次访问某联赛时加载其特征并登记到索引中"""
+        if league_code in self._matrices:
+            return
         
-        if home_features is None or away_features is None:
-            return None
+        loaded = self._load_league_matrix(league_code)
+        if loaded is None:
+            self._matrices[league_code] = None
+            return
+        
+        teams, matrix = loaded
+        self._matrices[league_code] = matrix
+        self._team_names[league_code] = teams
+        for row, team_name in enumerate(teams):
+            self._league_rows.setdefault((league_code, normalize_team_name(team_name)), row)
+        print(f"已加载 {self.leagues[league_code]} 数据")
+    
+    def _ensure_all_leagues(self):
+        """加载全部联赛，并按联赛顺序建立全局球队索引"""
+        if self._all_loaded:
+            return
+        
+        for league_code in self.leagues.keys():
+            self._ensure_league(league_code)
+        
+        for (league_code, key), row in sorted(self._league_rows.items(),
+                                             key=lambda item: list(self.leagues).index(item[0][0])):
+            self.team_index.setdefault(key, (league_code, row))
+        self._all_loaded = True
         
-        # 计算预期进球数
-        home_expected_goals = (home_features['home_goals_scored_avg'] * 0.7 + 
-                              away_features['away_goals_conceded_avg'] * 0.3) * 1.1  # 主场优势
+        if not any(matrix is not None for matrix in self._matrices.values()):
+            print("错误: 未找到任何联赛数据文件")
+    
+    def locate_team(self, team_name, league_code=None):
+        """
+        查找球队所在的联赛和行号
+        
+        先在指定联赛中查找（只加载该联赛），找不到时再查全局索引，每次查找只需一到两次哈希
         
-        away_expected_goals = (away_features['away_goals_scored_avg'] * 0.7 + 
-                              home_features['home_goals_conceded_avg'] * 0.3) * 0.9  # 客场劣势
+        返回:
+            (联赛代码, 行号)，找不到时返回 None
+        """
+        key = normalize_team_name(team_name)
+        if league_code in self.leagues:
+            self._ensure_league(league_code)
+            row = self._league_rows.get((league_code, key))
+            if row is not None:
+                return league_code, row
         
-        # 使用泊松分布计算比分概率
-        max_goals = 5
-        score_probs = {}
-        for i in range(max_goals + 1):
-            for j in range(max_goals + 1):
-                score_probs[(i, j)] = (poisson.pmf(i, home_expected_goals) * 
-                                      poisson.pmf(j, away_expected_goals))
+        self._ensure_all_leagues()
+        return self.team_index.get(key)
+    
+    def get_team_vector(self, team_name, league_code=None):
+        """获取球队特征向量（按 FEATURE_COLUMNS 排列的只读 float64 数组）"""
+        location = self.locate_team(team_name, league_code)
+        if location is None:
+            print(f"警告: 找不到球队 '{team_name}' 的数据")
+            return None
+        code, row = location
+        return self._matrices[code][row]
+    
+    def get_team_features(self, team_name, league_code=None):
+        """获取球队特征"""
+        import pandas as pd
         
-        # 计算胜平负概率
-        home_win_prob = sum(prob for (i, j), prob in score_probs.items() if i > j)
-        draw_prob = sum(prob for (i, j), prob in score_probs.items() if i == j)
-        away_win_prob = sum(prob for (i, j), prob in score_probs.items() if i < j)
+        location = self.locate_team(team_name, league_code)
+        if location is None:
+            print(f"警告: 找不到球队 '{team_name}' 的数据")
+            return None
+        code, row = location
+        return pd.Series(np.asarray(self._matrices[code][row]), index=FEATURE_COLUMNS,
+                         name=self._team_names[code][row])
+    
+    def _expected_goals(self, home_features, away_features):
+        """根据两队特征向量计算主客队预期进球数（见 expected_goals）"""
+        return expected_goals(home_features, away_features)
+    
+    def _build_prediction(self, home_team, away_team, home_odds, draw_odds, away_odds,
+                          home_win_prob, draw_prob, away_win_prob):
+        """根据胜平负概率和赔率生成单场预测结果"""
+        home_win_prob = float(home_win_prob)
+        draw_prob = float(draw_prob)
+        away_win_prob = float(away_win_prob)
         
         # 计算期望值
         result_probs = {'H': home_win_prob, 'D': draw_prob, 'A': away_win_prob}
@@ -111,23 +301,153 @@ class ParlayPredictor:
             'all_bets': all_bets  # 所有投注选项
         }
     
-    def predict_parlay(self, matches):
+    def predict_match(self, home_team, away_team, home_odds, draw_odds, away_odds, league_code=None):
+        """预测单场比赛结果"""
+        predictions = self.predict_matches([{
+            'home_team': home_team,
+            'away_team': away_team,
+            'home_odds': home_odds,
+            'draw_odds': draw_odds,
+            'away_odds': away_odds,
+            'league_code': league_code
+        }])
+        return predictions[0]
+    
+    def _card_expected_goals(self, matches):
+        """
+        为一组比赛查找球队特征并批量计算预期进球
+        
+        返回:
+            (有效比赛下标列表, 主队预期进球数组, 客队预期进球数组)
+        """
+        rows = []
+        provided = {}
+        feature_rows = []
+        home_vectors = []
+        away_vectors = []
+        
+        for idx, match in enumerate(matches):
+            league_code = match.get('league_code')
+            
+            if self.lambda_provider is not None:
+                expected = self.lambda_provider(match['home_team'], match['away_team'], league_code)
+                if expected is not None:
+                    rows.append(idx)
+                    provided[idx] = expected
+                    continue
+            
+            home_location = self.locate_team(match['home_team'], league_code)
+            away_location = self.locate_team(match['away_team'], league_code)
+            
+            if home_location is None:
+                print(f"警告: 找不到球队 '{match['home_team']}' 的数据")
+            if away_location is None:
+                print(f"警告: 找不到球队 '{match['away_team']}' 的数据")
+            if home_location is None or away_location is None:
+                continue
+            
+            rows.append(idx)
+            feature_rows.append(idx)
+            home_vectors.append(self._matrices[home_location[0]][home_location[1]])
+            away_vectors.append(self._matrices[away_location[0]][away_location[1]])
+        
+        home_xg = np.empty(len(rows))
+        away_xg = np.empty(len(rows))
+        position = {idx: k for k, idx in enumerate(rows)}
+        
+        for idx, (lam, mu) in provided.items():
+            home_xg[position[idx]] = lam
+            away_xg[position[idx]] = mu
+        
+        if feature_rows:
+            # 所有比赛的特征行拼成矩阵，批量计算预期进球
+            feature_home_xg, feature_away_xg = self._expected_goals(np.array(home_vectors), np.array(away_vectors))
+            # 调整只作用于特征公式得到的预期进球，lambda_provider 给出的值已包含球队强度
+            if self.lambda_adjuster is not None:
+                feature_home_xg, feature_away_xg = self.lambda_adjuster(
+                    [matches[idx]['home_team'] for idx in feature_rows],
+                    [matches[idx]['away_team'] for idx in feature_rows],
+                    feature_home_xg, feature_away_xg
+                )
+            targets = [position[idx] for idx in feature_rows]
+            home_xg[targets] = feature_home_xg
+            away_xg[targets] = feature_away_xg
+        
+        return rows, home_xg, away_xg
+    
+    def predict_matches(self, matches):
+        """
+        批量预测多场比赛结果，所有比赛的比分矩阵由一次向量化调用完成
+        
+        返回:
+            与 matches 等长的列表，找不到球队数据的比赛对应 None
+        """
+        predictions = [None] * len(matches)
+        rows, home_xg, away_xg = self._card_expected_goals(matches)
+        
+        if not rows:
+            return predictions
+        
+        # 使用泊松分布批量计算比分概率及胜平负概率
+        priced = predict_batch(home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS, cache=self.score_cache)
+        
+        for k, idx in enumerate(rows):
+            match = matches[idx]
+            predictions[idx] = self._build_prediction(
+                match['home_team'], match['away_team'],
+                match['home_odds'], match['draw_odds'], match['away_odds'],
+                priced['home_win'][k], priced['draw'][k], priced['away_win'][k]
+            )
+        
+        return predictions
+    
+    def price_match_markets(self, matches):
+        """
+        为一组比赛一次性计算全部竞彩玩法概率（胜平负、让球胜平负、比分、总进球、大小球）
+        
+        让球数取自 match['goal_line'] 或 match['odds']['goal_line']
+        
+        返回:
+            与 matches 等长的列表，找不到球队数据的比赛对应 None
+        """
+        results = [None] * len(matches)
+        rows, home_xg, away_xg = self._card_expected_goals(matches)
+        
+        if not rows:
+            return results
+        
+        goal_lines = []
+        for idx in rows:
+            match = matches[idx]
+            goal_line = match.get('goal_line')
+            if goal_line in (None, ''):
+                goal_line = (match.get('odds') or {}).get('goal_line')
+            goal_lines.append(parse_goal_line(goal_line))
+        
+        if self.score_cache is not None:
+            score_matrices = self.score_cache.get_batch(home_xg, away_xg, max_goals=MARKET_MAX_GOALS)
+        else:
+            score_matrices = score_matrix_batch(home_xg, away_xg, max_goals=MARKET_MAX_GOALS)
+        priced = price_markets(score_matrices, goal_lines)
+        
+        for k, idx in enumerate(rows):
+            match = matches[idx]
+            result = markets_to_dict(priced, k)
+            result['home_team'] = match['home_team']
+            result['away_team'] = match['away_team']
+            result['home_expected_goals'] = float(home_xg[k])
+            result['away_expected_goals'] = float(away_xg[k])
+            results[idx] = result
+        
+        return results
+    
+    def predict_parlay(self, matches, top_k=10):
         """预测多场比赛的串关"""
         predictions = []
         all_combinations = []
         
-        # 预测每场比赛
-        for match in matches:
-            home_team = match['home_team']
-            away_team = match['away_team']
-            home_odds = match['home_odds']
-            draw_odds = match['draw_odds']
-            away_odds = match['away_odds']
-            league_code = match.get('league_code')
-            
-            pred = self.predict_match(home_team, away_team, home_odds, draw_odds, away_odds, league_code)
-            if pred:
-                predictions.append(pred)
+        # 批量预测每场比赛
+        predictions = [pred for pred in self.predict_matches(matches) if pred]
         
         if not predictions:
             return None
@@ -157,9 +477,9 @@ class ParlayPredictor:
         
         best_parlay['expected_value'] = best_parlay['total_odds'] * best_parlay['total_prob'] - 1
         
-        # 计算所有可能的组合
+        # 惰性搜索期望值最高的组合，无需枚举全部 3^n 种串关
         all_bets = [pred['all_bets'] for pred in predictions]
-        for combo in product(*all_bets):
+        for combo in top_k_combinations(all_bets, top_k):
             parlay = {
                 'selections': [],
                 'total_odds': 1.0,
@@ -181,15 +501,35 @@ class ParlayPredictor:
             parlay['expected_value'] = parlay['total_odds'] * parlay['total_prob'] - 1
             all_combinations.append(parlay)
         
-        # 按期望值排序
-        all_combinations.sort(key=lambda x: x['expected_value'], reverse=True)
-        
         return {
             'individual_predictions': predictions,
             'best_parlay': best_parlay,
-            'all_combinations': all_combinations[:10]  # 只返回前10个最佳组合
+            'all_combinations': all_combinations  # 只返回前 top_k 个最佳组合
         }
 
+    def predict_system(self, matches, ticket):
+        """
+        预测 M串N 自由过关投注
+        
+        参数:
+            matches: 比赛列表，每场使用期望值最高的投注选项
+            ticket: 过关方式，如 "4串11"
+        """
+        predictions = [pred for pred in self.predict_matches(matches) if pred]
+        if not predictions:
+            return None
+        
+        legs = [(pred['best_odds'], pred['best_prob']) for pred in predictions]
+        result = evaluate_system_bet(legs, ticket)
+        result['selections'] = [{
+            'match': f"{pred['home_team']} vs {pred['away_team']}",
+            'pick': pred['best_bet'],
+            'odds': pred['best_odds'],
+            'prob': pred['best_prob']
+        } for pred in predictions]
+        
+        return result
+
 def format_result(result_type):
     """格式化结果类型"""
     if result_type == 'H':
@@ -203,6 +543,7 @@ def format_result(result_type):
 def main():
     parser = argparse.ArgumentParser(description='足球比赛串关预测工具')
     parser.add_argument('--matches', type=str, help='比赛信息JSON文件')
+    parser.add_argument('--system', type=str, help='M串N 过关方式，如 4串11')
     args = parser.parse_args()
     
     predictor = ParlayPredictor()
@@ -245,6 +586,30 @@ def main():
                 
             matches.append(match)
     
+    if args.system:
+        try:
+            system = predictor.predict_system(matches, args.system)
+        except ValueError as e:
+            print(f"过关方式错误: {e}")
+            return
+        
+        if not system:
+            print("无法预测串关，请检查输入的球队名称是否正确")
+            return
+        
+        print(f"\n{system['ticket']} 过关预测:")
+        print("=" * 50)
+        for i, sel in enumerate(system['selections']):
+            print(f"{i+1}. {sel['match']}: {format_result(sel['pick'])} (赔率: {sel['odds']}, 概率: {sel['prob']:.2f})")
+        print(f"注数: {system['num_bets']}, 投注金额: {system['cost']:.2f}")
+        print(f"期望回报: {system['expected_return']:.2f}, 期望盈利: {system['expected_profit']:.2f}")
+        print(f"中奖概率: {system['hit_prob']:.4f} ({system['hit_prob']*100:.2f}%)")
+        print(f"最高奖金: {system['max_payout']:.2f}")
+        print("按命中场数的奖金分布:")
+        for row in system['payout_by_hits']:
+            print(f"  命中{row['hits']}场: 概率={row['prob']:.4f}, 中奖注数={row['winning_bets']}, 期望奖金={row['expected_payout']:.2f}")
+        return
+    
     # 预测串关
     result = predictor.predict_parlay(matches)
     
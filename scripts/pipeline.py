@@ -0,0 +1,223 @@
+"""
+多联赛并行构建流水线
+每个联赛赛季为一个任务，在进程池中并行执行 数据处理 -> 球队特征 -> 模型训练，
+各阶段使用显式的输入输出路径（不依赖 config 中的 MATCHES_DATA_FILE / FEATURES_DATA_FILE），
+结束后打印每个联赛、每个阶段的耗时报告
+
+用法（在项目根目录运行）:
+    python scripts/pipeline.py --leagues PL PD SA BL1 FL1 --seasons 2024 --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+import traceback
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_LEAGUES = ['PL', 'PD', 'SA', 'BL1', 'FL1']
+DEFAULT_SEASONS = [2024]
+STAGES = ['process', 'features', 'match_features', 'train']
+STAGE_NAMES = {
+    'process': '数据处理',
+    'features': '球队特征',
+    'match_features': '时点特征',
+    'train': '模型训练'
+}
+
+
+def league_paths(league, season, data_dir="data", output_dir=None, model_dir=None):
+    """
+    单个联赛赛季的全部输入输出路径
+
+    例如 PL 2024:
+        raw_matches: data/raw_matches_PL_2024.json
+        matches:     data/matches_data_PL2024.csv
+        features:    data/features_PL2024.csv（实际写入 data/features_PL2024.fstore 列式存储）
+        model:       data/models/match_model_PL2024.pkl
+    """
+    output_dir = output_dir or data_dir
+    model_dir = model_dir or os.path.join(output_dir, 'models')
+    return {
+        'raw_matches': os.path.join(data_dir, f"raw_matches_{league}_{season}.json"),
+        'matches': os.path.join(output_dir, f"matches_data_{league}{season}.csv"),
+        'features': os.path.join(output_dir, f"features_{league}{season}.csv"),
+        'model': os.path.join(model_dir, f"match_model_{league}{season}.pkl")
+    }
+
+
+def run_league(job):
+    """
+    在工作进程中处理一个联赛赛季
+
+    参数:
+        job: 字典，包含 league、season、paths、stages、model_type、search
+
+    返回:
+        字典 league / season / timings {阶段: 秒} / status / error / log
+    """
+    import json
+
+    import pandas as pd
+
+    from data_processing import process_match_data
+    from feature_engineering import create_team_features
+    from elo import add_elo_features
+    from rolling_features import build_point_in_time_features
+
+    paths = job['paths']
+    timings = {}
+    result = {'league': job['league'], 'season': job['season'], 'timings': timings,
+              'status': 'ok', 'error': None}
+    log = io.StringIO()
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            timings[stage] = time.perf_counter() - start
+
+    try:
+        with contextlib.redirect_stdout(log):
+            # 数据处理：原始 JSON -> 比赛 CSV；没有原始数据时使用已有的比赛 CSV
+            def process():
+                if os.path.exists(paths['raw_matches']):
+                    with open(paths['raw_matches'], 'r', encoding='utf-8') as f:
+                        raw_matches = json.load(f)
+                    return process_match_data(raw_matches, output_path=paths['matches'])
+                if os.path.exists(paths['matches']):
+                    return pd.read_csv(paths['matches'])
+                return None
+
+            matches_df = timed('process', process)
+            if matches_df is None or matches_df.empty:
+                result['status'] = 'skipped'
+                result['error'] = f"缺少比赛数据: {paths['raw_matches']}"
+                return result
+
+            if 'features' in job['stages']:
+                timed('features', lambda: create_team_features(matches_df, features_path=paths['features']))
+
+            if 'train' in job['stages']:
+                from models import train_match_result_model
+
+                match_features_df, _ = timed('match_features', lambda: add_elo_features(
+                    build_point_in_time_features(matches_df)))
+                # 联赛之间已经并行，搜索在各自的工作进程内串行执行
+                model_data = timed('train', lambda: train_match_result_model(
+                    match_features_df, job['model_type'], model_path=paths['model'],
+                    search=job['search'], n_jobs=1))
+                if model_data is None:
+                    result['status'] = 'failed'
+                    result['error'] = "模型训练失败"
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+    finally:
+        result['log'] = log.getvalue()
+
+    return result
+
+
+def run_pipeline(leagues, seasons, data_dir="data", output_dir=None, model_dir=None,
+                 workers=None, model_type='rf', train=True, search='grid'):
+    """
+    并行处理所有联赛赛季
+
+    返回:
+        (各任务结果列表, 总耗时秒数)
+    """
+    stages = ['process', 'features'] + (['match_features', 'train'] if train else [])
+    jobs = [
+        {
+            'league': league,
+            'season': season,
+            'paths': league_paths(league, season, data_dir, output_dir, model_dir),
+            'stages': stages,
+            'model_type': model_type,
+            'search': search
+        }
+        for league in leagues for season in seasons
+    ]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(run_league, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"完成 {result['league']} {result['season']}: {result['status']}"
+                  + (f" ({result['error']})" if result['error'] else ""))
+
+    order = {(job['league'], job['season']): i for i, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[(result['league'], result['season'])])
+    return results, time.perf_counter() - start
+
+
+def _pad(text, width, align='>'):
+    """按显示宽度对齐（中文字符占两格）"""
+    text = str(text)
+    display = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    fill = ' ' * max(width - display, 0)
+    return fill + text if align == '>' else text + fill
+
+
+def print_timing_report(results, wall_time):
+    """打印每个联赛赛季、每个阶段的耗时（毫秒）以及并行加速比"""
+    header = (_pad('联赛', 8, '<') + _pad('赛季', 8, '<') +
+              "".join(_pad(STAGE_NAMES[stage], 12) for stage in STAGES) + _pad('合计', 12) + "  状态")
+    print("\n各阶段耗时 (ms)")
+    print(header)
+    print("-" * 80)
+
+    serial_time = 0.0
+    for result in results:
+        timings = result['timings']
+        total = sum(timings.values())
+        serial_time += total
+        cells = "".join(
+            _pad(f"{timings[stage] * 1000:.1f}" if stage in timings else '-', 12) for stage in STAGES
+        )
+        print(_pad(result['league'], 8, '<') + _pad(result['season'], 8, '<') + cells +
+              _pad(f"{total * 1000:.1f}", 12) + f"  {result['status']}")
+
+    print("-" * 80)
+    speedup = serial_time / wall_time if wall_time > 0 else 0.0
+    print(f"各任务耗时之和 {serial_time:.2f} 秒, 实际耗时 {wall_time:.2f} 秒, 并行加速 {speedup:.1f} 倍")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多联赛并行构建特征和模型')
+    parser.add_argument('--leagues', type=str, nargs='+', default=DEFAULT_LEAGUES, help='联赛代码')
+    parser.add_argument('--seasons', type=int, nargs='+', default=DEFAULT_SEASONS, help='赛季')
+    parser.add_argument('--data_dir', type=str, default='data', help='原始数据目录')
+    parser.add_argument('--output_dir', type=str, default=None, help='输出目录（默认与数据目录相同）')
+    parser.add_argument('--model_dir', type=str, default=None, help='模型目录（默认为 输出目录/models）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认为 CPU 核数）')
+    parser.add_argument('--model_type', type=str, default='rf', choices=['rf', 'gb'], help='模型类型')
+    parser.add_argument('--search', type=str, default='grid', choices=['grid', 'halving'],
+                        help='超参数搜索方式（halving 为按时间划分的逐轮淘汰，结果缓存在模型目录）')
+    parser.add_argument('--skip_train', action='store_true', help='只处理数据和特征，不训练模型')
+    parser.add_argument('--verbose', action='store_true', help='打印各任务的详细输出')
+    args = parser.parse_args()
+
+    results, wall_time = run_pipeline(
+        args.leagues, args.seasons, args.data_dir, args.output_dir, args.model_dir,
+        args.workers, args.model_type, train=not args.skip_train, search=args.search
+    )
+
+    if args.verbose:
+        for result in results:
+            print(f"\n===== {result['league']} {result['season']} =====")
+            print(result['log'])
+
+    print_timing_report(results, wall_time)
+
+
+if __name__ == "__main__":
+    main()
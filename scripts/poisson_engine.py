@@ -0,0 +1,233 @@
+"""
+泊松比分矩阵批量计算引擎
+一次调用即可为整张竞彩赛程（N场比赛）计算比分概率张量和胜平负概率
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+# 默认最大进球数（与 ParlayPredictor 原有的 6x6 网格一致）
+DEFAULT_MAX_GOALS = 5
+
+# 避免 log(0)，λ=0 时 pmf(0)=1，其余为 0
+_MIN_LAMBDA = 1e-300
+
+# 比分矩阵缓存的默认容量和 λ 量化步长
+DEFAULT_CACHE_ENTRIES = 4096
+DEFAULT_CACHE_QUANTUM = 0.005
+
+
+@lru_cache(maxsize=32)
+def _log_factorials(max_goals):
+    """预计算 log(k!)，k = 0..max_goals"""
+    table = np.array([math.lgamma(k + 1) for k in range(max_goals + 1)], dtype=np.float64)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=32)
+def _result_masks(max_goals):
+    """主胜/平局/客胜三个掩码，堆叠为 (G, G, 3) 的矩阵，便于一次 tensordot 求和"""
+    goals = np.arange(max_goals + 1)
+    diff = goals[:, None] - goals[None, :]
+    masks = np.stack([diff > 0, diff == 0, diff < 0], axis=-1).astype(np.float64)
+    masks.setflags(write=False)
+    return masks
+
+
+def poisson_pmf_rows(lambdas, max_goals=DEFAULT_MAX_GOALS):
+    """
+    计算每个 λ 对应的泊松概率行
+
+    参数:
+        lambdas: 长度为 N 的预期进球数组
+        max_goals: 最大进球数
+
+    返回:
+        (N, max_goals+1) 的概率矩阵，第 k 列为 P(X=k)
+    """
+    lam = np.maximum(np.asarray(lambdas, dtype=np.float64).reshape(-1), 0.0)
+    goals = np.arange(max_goals + 1, dtype=np.float64)
+    log_lam = np.log(np.maximum(lam, _MIN_LAMBDA))
+    log_pmf = goals[None, :] * log_lam[:, None] - lam[:, None] - _log_factorials(max_goals)[None, :]
+    return np.exp(log_pmf)
+
+
+def score_matrix_batch(home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS):
+    """
+    批量计算比分概率张量
+
+    参数:
+        home_xg: 长度为 N 的主队预期进球
+        away_xg: 长度为 N 的客队预期进球
+        max_goals: 最大进球数
+
+    返回:
+        (N, G, G) 张量，[n, i, j] 为第 n 场比赛比分 i:j 的概率（未归一化，与原实现一致）
+    """
+    home_rows = poisson_pmf_rows(home_xg, max_goals)
+    away_rows = poisson_pmf_rows(away_xg, max_goals)
+    if home_rows.shape[0] != away_rows.shape[0]:
+        raise ValueError("主客队预期进球数组长度不一致")
+    return home_rows[:, :, None] * away_rows[:, None, :]
+
+
+def outcome_probs(score_matrices):
+    """
+    从比分概率张量求胜平负概率
+
+    返回:
+        (home_win, draw, away_win) 三个长度为 N 的数组
+    """
+    score_matrices = np.asarray(score_matrices, dtype=np.float64)
+    max_goals = score_matrices.shape[-1] - 1
+    hda = np.tensordot(score_matrices, _result_masks(max_goals), axes=([-2, -1], [0, 1]))
+    return hda[..., 0], hda[..., 1], hda[..., 2]
+
+
+class ScoreMatrixCache:
+    """
+    比分矩阵的有界 LRU 缓存
+
+    以 (λ_home, λ_away, max_goals) 为键，λ 按 quantum 量化，命中时直接复用已计算的矩阵。
+    矩阵按量化后的 λ 计算，因此同一键的结果与调用顺序无关。
+
+    纯泊松网格的计算本身只需约 1 微秒/场，缓存主要用于构建代价更高的比分矩阵
+    （例如带低比分修正的模型），builder 为批量构建函数 builder(home_xg, away_xg, max_goals)。
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, quantum=DEFAULT_CACHE_QUANTUM, builder=None):
+        if max_entries <= 0:
+            raise ValueError("缓存容量必须为正数")
+        if quantum <= 0:
+            raise ValueError("量化步长必须为正数")
+        self.max_entries = max_entries
+        self.quantum = quantum
+        self.builder = builder or score_matrix_batch
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _keys(self, home_xg, away_xg, max_goals):
+        """量化后的缓存键，λ 非有限值时对应 None（不经缓存）"""
+        home = np.maximum(np.asarray(home_xg, dtype=np.float64).reshape(-1), 0.0)
+        away = np.maximum(np.asarray(away_xg, dtype=np.float64).reshape(-1), 0.0)
+        if home.shape != away.shape:
+            raise ValueError("主客队预期进球数组长度不一致")
+        finite = np.isfinite(home) & np.isfinite(away)
+        home_steps = np.rint(np.where(finite, home, 0.0) / self.quantum).astype(np.int64)
+        away_steps = np.rint(np.where(finite, away, 0.0) / self.quantum).astype(np.int64)
+        return [
+            (int(h), int(a), max_goals) if ok else None
+            for h, a, ok in zip(home_steps.tolist(), away_steps.tolist(), finite.tolist())
+        ]
+
+    def get_batch(self, home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS):
+        """
+        批量获取比分矩阵，未命中的部分一次性向量化计算后写入缓存
+
+        返回:
+            (N, G, G) 张量
+        """
+        keys = self._keys(home_xg, away_xg, max_goals)
+
+        size = max_goals + 1
+        result = np.empty((len(keys), size, size), dtype=np.float64)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key is None:
+                    result[i] = np.nan
+                    continue
+                matrix = self._entries.get(key)
+                if matrix is not None:
+                    self._entries.move_to_end(key)
+                    result[i] = matrix
+                    self.hits += 1
+                elif key in missing:
+                    # 同一批次中重复的键只计算一次
+                    missing[key].append(i)
+                    self.hits += 1
+                else:
+                    missing[key] = [i]
+                    self.misses += 1
+
+        if missing:
+            miss_keys = list(missing)
+            computed = self.builder(
+                [key[0] * self.quantum for key in miss_keys],
+                [key[1] * self.quantum for key in miss_keys],
+                max_goals
+            )
+            with self._lock:
+                for key, matrix in zip(miss_keys, np.asarray(computed, dtype=np.float64)):
+                    result[missing[key]] = matrix
+                    matrix = matrix.copy()
+                    matrix.setflags(write=False)
+                    self._entries[key] = matrix
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return result
+
+    def get(self, home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS):
+        """获取单场比赛的比分矩阵 (G, G)"""
+        return self.get_batch([home_xg], [away_xg], max_goals)[0]
+
+    def clear(self):
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """运行时统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'quantum': self.quantum,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# 进程内共享的默认缓存
+default_score_cache = ScoreMatrixCache()
+
+
+def predict_batch(home_xg, away_xg, max_goals=DEFAULT_MAX_GOALS, cache=None):
+    """
+    一次调用为整张赛程定价
+
+    参数:
+        cache: 可选的 ScoreMatrixCache，提供时比分矩阵经由缓存获取
+
+    返回:
+        字典，包含 score_probs (N, G, G) 以及 home_win / draw / away_win 三个 (N,) 数组
+    """
+    if cache is not None:
+        score_probs = cache.get_batch(home_xg, away_xg, max_goals)
+    else:
+        score_probs = score_matrix_batch(home_xg, away_xg, max_goals)
+    home_win, draw, away_win = outcome_probs(score_probs)
+    return {
+        'score_probs': score_probs,
+        'home_win': home_win,
+        'draw': draw,
+        'away_win': away_win
+    }
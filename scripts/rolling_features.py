@@ -0,0 +1,336 @@
+"""
+时点（point-in-time）滚动特征
+按日期顺序流式遍历比赛，每支球队维护固定长度的环形缓冲区（主场、客场、全部比赛），
+每场比赛先输出赛前的特征、再用赛果更新缓冲区，训练和回测不会看到未来信息。
+
+特征定义与 feature_engineering.create_team_features 相同：对全部已完成比赛处理完后，
+各球队的状态即为 create_team_features 的结果。
+"""
+
+import argparse
+import csv
+import glob
+import heapq
+import math
+import os
+
+# 球队特征列（create_team_features 的输出顺序）；feature_engineering、parlay_predictor 和回测都从这里导入
+HOME_FEATURE_COLUMNS = ['home_matches_played', 'home_goals_scored_avg', 'home_goals_conceded_avg',
+                        'home_win_rate', 'home_draw_rate', 'home_loss_rate']
+AWAY_FEATURE_COLUMNS = ['away_matches_played', 'away_goals_scored_avg', 'away_goals_conceded_avg',
+                        'away_win_rate', 'away_draw_rate', 'away_loss_rate']
+TOTAL_FEATURE_COLUMNS = ['total_matches_played', 'total_goals_scored_avg', 'total_goals_conceded_avg',
+                         'overall_win_rate', 'recent_form']
+FEATURE_COLUMNS = HOME_FEATURE_COLUMNS + AWAY_FEATURE_COLUMNS + TOTAL_FEATURE_COLUMNS
+
+MATCH_COLUMNS = ['match_id', 'home_team', 'away_team', 'match_date', 'status']
+RESULT_COLUMNS = ['home_score', 'away_score', 'result', 'half_time_home', 'half_time_away', 'half_full_result']
+
+# 输出列，与 prepare_match_features 的列布局一致
+OUTPUT_COLUMNS = (MATCH_COLUMNS + [f'home_{col}' for col in FEATURE_COLUMNS] +
+                  [f'away_{col}' for col in FEATURE_COLUMNS] + RESULT_COLUMNS)
+
+DEFAULT_LOOKBACK = 10
+RECENT_FORM_MATCHES = 5
+
+# 赛果在主队视角下对应的 (胜, 平, 负) 下标，客队视角取反
+_OUTCOME = {'H': 0, 'D': 1, 'A': 2}
+
+
+def _to_float(value):
+    """CSV 中的数字字段，空值返回 NaN"""
+    if value is None or value == '':
+        return math.nan
+    return float(value)
+
+
+class RingWindow:
+    """
+    固定长度的比赛窗口，维护进失球和胜平负的累计和，push 和读取均为 O(1)
+
+    进失球为 NaN 的比赛计入场次但不计入进失球均值（与 pandas mean 跳过缺失值一致）
+    """
+
+    __slots__ = ('size', 'scored', 'conceded', 'outcomes', 'pos', 'count',
+                 'sum_scored', 'n_scored', 'sum_conceded', 'n_conceded', 'outcome_counts')
+
+    def __init__(self, size):
+        self.size = size
+        self.scored = [0.0] * size
+        self.conceded = [0.0] * size
+        self.outcomes = [0] * size
+        self.pos = 0
+        self.count = 0
+        self.sum_scored = 0.0
+        self.n_scored = 0
+        self.sum_conceded = 0.0
+        self.n_conceded = 0
+        self.outcome_counts = [0, 0, 0]
+
+    def _add(self, scored, conceded, outcome, sign):
+        if scored == scored:
+            self.sum_scored += sign * scored
+            self.n_scored += sign
+        if conceded == conceded:
+            self.sum_conceded += sign * conceded
+            self.n_conceded += sign
+        if outcome >= 0:
+            self.outcome_counts[outcome] += sign
+
+    def push(self, scored, conceded, outcome):
+        """加入一场比赛，outcome 为球队视角的 0胜/1平/2负（-1 表示未知），窗口满时移出最早的一场"""
+        if self.count == self.size:
+            self._add(self.scored[self.pos], self.conceded[self.pos], self.outcomes[self.pos], -1)
+        else:
+            self.count += 1
+        self.scored[self.pos] = scored
+        self.conceded[self.pos] = conceded
+        self.outcomes[self.pos] = outcome
+        self._add(scored, conceded, outcome, 1)
+        self.pos = (self.pos + 1) % self.size
+
+    def stats(self):
+        """(场次, 场均进球, 场均失球, 胜率, 平局率, 负率)；窗口为空时全部为 0"""
+        if self.count == 0:
+            return [0.0] * 6
+        count = self.count
+        wins, draws, losses = self.outcome_counts
+        return [
+            float(count),
+            self.sum_scored / self.n_scored if self.n_scored else math.nan,
+            self.sum_conceded / self.n_conceded if self.n_conceded else math.nan,
+            wins / count,
+            draws / count,
+            losses / count
+        ]
+
+    def to_dict(self):
+        """按时间顺序（从早到晚）导出窗口内的比赛"""
+        start = (self.pos - self.count) % self.size
+        order = [(start + i) % self.size for i in range(self.count)]
+        return {
+            'size': self.size,
+            'scored': [self.scored[i] for i in order],
+            'conceded': [self.conceded[i] for i in order],
+            'outcomes': [self.outcomes[i] for i in order]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data['size'])
+        for scored, conceded, outcome in zip(data['scored'], data['conceded'], data['outcomes']):
+            window.push(scored, conceded, outcome)
+        return window
+
+
+class TeamState:
+    """单支球队的滚动状态：主场、客场、全部比赛三个窗口以及最近几场的积分"""
+
+    __slots__ = ('home', 'away', 'overall', 'form')
+
+    def __init__(self, lookback_matches=DEFAULT_LOOKBACK, form_matches=RECENT_FORM_MATCHES):
+        self.home = RingWindow(lookback_matches)
+        self.away = RingWindow(lookback_matches)
+        self.overall = RingWindow(lookback_matches)
+        # 近期状态取全部比赛窗口中的最后几场
+        self.form = RingWindow(min(form_matches, lookback_matches))
+
+    def push(self, is_home, scored, conceded, outcome):
+        window = self.home if is_home else self.away
+        window.push(scored, conceded, outcome)
+        self.overall.push(scored, conceded, outcome)
+        self.form.push(scored, conceded, outcome)
+
+    def features(self):
+        """按 FEATURE_COLUMNS 顺序返回当前特征"""
+        overall = self.overall.stats()
+        if self.form.count:
+            wins, draws, _ = self.form.outcome_counts
+            recent_form = (wins * 3 + draws) / (self.form.count * 3)
+        else:
+            recent_form = 0.0
+        return self.home.stats() + self.away.stats() + overall[:3] + [overall[3], recent_form]
+
+    def to_dict(self):
+        return {name: getattr(self, name).to_dict() for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data, lookback_matches=DEFAULT_LOOKBACK, form_matches=RECENT_FORM_MATCHES):
+        state = cls(lookback_matches, form_matches)
+        for name in cls.__slots__:
+            setattr(state, name, RingWindow.from_dict(data[name]))
+        return state
+
+
+class RollingFeatureBuilder:
+    """
+    流式时点特征构建器
+
+    内存为 O(球队数 × 窗口长度)，每场比赛 O(1) 更新，可以连续处理多个赛季。
+    """
+
+    def __init__(self, lookback_matches=DEFAULT_LOOKBACK, form_matches=RECENT_FORM_MATCHES):
+        self.lookback_matches = lookback_matches
+        self.form_matches = form_matches
+        self.teams = {}
+
+    def _state(self, team):
+        state = self.teams.get(team)
+        if state is None:
+            state = TeamState(self.lookback_matches, self.form_matches)
+            self.teams[team] = state
+        return state
+
+    def team_features(self, team):
+        """球队当前的特征，没有历史比赛的球队全部为 0"""
+        state = self.teams.get(team)
+        return state.features() if state is not None else [0.0] * len(FEATURE_COLUMNS)
+
+    def update(self, match):
+        """用一场比赛的赛果更新两队的缓冲区，未完成的比赛不计入"""
+        if match.get('status') != 'FINISHED':
+            return False
+        home_score = _to_float(match.get('home_score'))
+        away_score = _to_float(match.get('away_score'))
+        outcome = _OUTCOME.get(match.get('result'), -1)
+        self._state(match['home_team']).push(True, home_score, away_score, outcome)
+        self._state(match['away_team']).push(False, away_score, home_score, 2 - outcome if outcome >= 0 else -1)
+        return True
+
+    def match_row(self, match):
+        """一场比赛的赛前特征行，列布局同 prepare_match_features"""
+        row = {col: match.get(col) for col in MATCH_COLUMNS}
+        row.update(zip(OUTPUT_COLUMNS[len(MATCH_COLUMNS):], self.team_features(match['home_team']) +
+                       self.team_features(match['away_team'])))
+        if match.get('status') == 'FINISHED':
+            for col in RESULT_COLUMNS:
+                if col in match:
+                    row[col] = match[col]
+        return row
+
+    def process(self, matches):
+        """
+        按日期顺序处理比赛，逐场产出赛前特征行
+
+        同一开赛时间的比赛先全部输出特征、再统一更新，互相之间不会看到对方的赛果。
+        matches 必须已按 match_date 排序。
+        """
+        pending = []
+        current_date = None
+        for match in matches:
+            match_date = match.get('match_date')
+            if pending and match_date != current_date:
+                if match_date is not None and current_date is not None and match_date < current_date:
+                    raise ValueError(f"比赛未按日期排序: {match_date} 位于 {current_date} 之后")
+                for finished in pending:
+                    self.update(finished)
+                pending = []
+            current_date = match_date
+            yield self.match_row(match)
+            pending.append(match)
+        for finished in pending:
+            self.update(finished)
+
+    def to_dict(self):
+        """导出全部球队状态（可 JSON 序列化）"""
+        return {
+            'lookback_matches': self.lookback_matches,
+            'form_matches': self.form_matches,
+            'teams': {team: state.to_dict() for team, state in self.teams.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        builder = cls(data['lookback_matches'], data['form_matches'])
+        for team, state in data['teams'].items():
+            builder.teams[team] = TeamState.from_dict(state, builder.lookback_matches, builder.form_matches)
+        return builder
+
+    def feature_rows(self):
+        """所有球队当前的特征，{球队: 特征列表}"""
+        return {team: state.features() for team, state in self.teams.items()}
+
+    def feature_frame(self):
+        """所有球队当前的特征表（与 create_team_features 的列相同）"""
+        import pandas as pd
+
+        rows = self.feature_rows()
+        return pd.DataFrame(list(rows.values()), index=list(rows.keys()), columns=FEATURE_COLUMNS)
+
+
+def _read_matches_csv(path):
+    """逐行读取比赛 CSV"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def iter_matches(paths):
+    """
+    按日期顺序合并多个比赛 CSV（例如每个联赛赛季一个文件），逐行惰性读取，
+    不会把全部历史读入内存。每个文件需已按 match_date 排序（process_match_data 的输出即是如此）
+    """
+    return heapq.merge(*(_read_matches_csv(path) for path in paths),
+                       key=lambda row: row.get('match_date') or '')
+
+
+def build_point_in_time_features(matches_df, lookback_matches=DEFAULT_LOOKBACK):
+    """
+    为 DataFrame 中的每场比赛计算赛前特征
+
+    返回:
+        与 prepare_match_features 列布局相同的 DataFrame，按比赛日期排序
+    """
+    import pandas as pd
+
+    if matches_df is None or matches_df.empty:
+        print("无效的比赛数据")
+        return None
+
+    ordered = matches_df.sort_values('match_date', kind='stable')
+    records = ordered.to_dict('records')
+    builder = RollingFeatureBuilder(lookback_matches)
+    return pd.DataFrame(list(builder.process(records)), columns=OUTPUT_COLUMNS)
+
+
+def write_point_in_time_features(paths, output_path, lookback_matches=DEFAULT_LOOKBACK):
+    """
+    流式处理多个比赛 CSV，将每场比赛的赛前特征逐行写入 output_path
+
+    返回:
+        (写入的行数, 构建器)，构建器中保留处理完所有比赛后的球队状态
+    """
+    builder = RollingFeatureBuilder(lookback_matches)
+    directory = os.path.dirname(output_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    count = 0
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for row in builder.process(iter_matches(paths)):
+            writer.writerow(row)
+            count += 1
+    return count, builder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成无未来信息的时点滚动特征')
+    parser.add_argument('--matches', type=str, nargs='+', default=None,
+                        help='比赛 CSV 文件（默认 data/matches_data_*.csv）')
+    parser.add_argument('--output', type=str, default='data/point_in_time_features.csv', help='输出文件')
+    parser.add_argument('--lookback', type=int, default=DEFAULT_LOOKBACK, help='窗口长度（比赛场数）')
+    args = parser.parse_args()
+
+    paths = args.matches or sorted(glob.glob(os.path.join('data', 'matches_data_*.csv')))
+    if not paths:
+        print("没有找到比赛数据")
+        return
+
+    count, builder = write_point_in_time_features(paths, args.output, args.lookback)
+    print(f"已处理 {len(paths)} 个文件, {count} 场比赛, {len(builder.teams)} 支球队")
+    print(f"时点特征已保存至 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,9 +33,15 @@ logger = logging.getLogger(__name__)
 class MatchSyncManager:
     """比赛数据同步管理器"""
     
-    def __init__(self):
+    def __init__(self, odds_history_dir: str = None):
         self.spider = ChinaLotterySpider()
         self.db = prediction_db
+        # 本地赔率历史（离线使用），None 表示只记录到数据库
+        self.odds_history = None
+        if odds_history_dir:
+            # 本地赔率历史需要 numpy / pandas，只在指定目录时导入
+            from scripts.odds_history import LocalOddsHistory
+            self.odds_history = LocalOddsHistory(odds_history_dir)
     
     def sync_matches(self, days_ahead: int = 7, force_update: bool = False) -> Dict[str, int]:
         """
@@ -61,6 +67,11 @@ class MatchSyncManager:
             
             logger.info(f"✅ 成功获取 {len(matches_data)} 场比赛数据")
             
+            # 先记录到本地赔率历史，数据库不可用时也不丢失赔率变动
+            if self.odds_history is not None:
+                history_stats = self.odds_history.append(matches_data)
+                logger.info(f"📈 本地赔率历史 - 新快照: {history_stats['appended']}, 未变化: {history_stats['unchanged']}")
+            
             # 保存到数据库
             logger.info("💾 正在保存到数据库...")
             stats = self.db.save_daily_matches(matches_data)
@@ -152,11 +163,12 @@ def main():
     parser.add_argument('--stats', action='store_true', help='显示数据库统计信息')
     parser.add_argument('--test', action='store_true', help='测试数据库连接')
     parser.add_argument('--force', action='store_true', help='强制更新所有数据')
+    parser.add_argument('--odds_history', type=str, help='同时把赔率变动记录到本地目录 (如 data/odds_history)')
     
     args = parser.parse_args()
     
     # 创建同步管理器
-    sync_manager = MatchSyncManager()
+    sync_manager = MatchSyncManager(odds_history_dir=args.odds_history)
     
     print("=" * 60)
     print("🏈 每日比赛数据同步脚本")
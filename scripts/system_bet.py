@@ -0,0 +1,160 @@
+"""
+竞彩 M串N 自由过关（容错）投注计算
+使用初等对称多项式动态规划，无需枚举子组合
+"""
+
+import re
+from math import comb
+
+import numpy as np
+
+# 竞彩单注金额（元）
+DEFAULT_STAKE = 2.0
+
+# 常见 M串N 玩法对应的子串关场数
+SYSTEM_TICKETS = {
+    "3串3": (2,), "3串4": (2, 3),
+    "4串4": (3,), "4串5": (3, 4), "4串6": (2,), "4串11": (2, 3, 4),
+    "5串5": (4,), "5串6": (4, 5), "5串10": (2,), "5串16": (3, 4, 5),
+    "5串20": (2, 3), "5串26": (2, 3, 4, 5),
+    "6串6": (5,), "6串7": (5, 6), "6串15": (2,), "6串20": (3,),
+    "6串22": (4, 5, 6), "6串35": (2, 3), "6串42": (3, 4, 5, 6),
+    "6串50": (2, 3, 4), "6串57": (2, 3, 4, 5, 6),
+    "7串7": (6,), "7串8": (6, 7), "7串21": (5,), "7串35": (4,),
+    "7串120": (2, 3, 4, 5, 6, 7),
+    "8串8": (7,), "8串9": (7, 8), "8串28": (6,), "8串56": (5,),
+    "8串70": (4,), "8串247": (2, 3, 4, 5, 6, 7, 8),
+}
+
+_TICKET_PATTERN = re.compile(r"^\s*(\d+)\s*(?:串|x|X|\*)\s*(\d+)\s*$")
+
+
+def parse_system_ticket(ticket):
+    """
+    解析 M串N 玩法
+
+    参数:
+        ticket: 玩法名称，如 "4串11"、"6x57" 或 "3串1"
+
+    返回:
+        (场数 M, 子串关场数元组)
+    """
+    match = _TICKET_PATTERN.match(str(ticket))
+    if not match:
+        raise ValueError(f"无法识别的过关方式: {ticket}")
+
+    legs, bets = int(match.group(1)), int(match.group(2))
+    if bets == 1:
+        return legs, (legs,)
+
+    key = f"{legs}串{bets}"
+    if key not in SYSTEM_TICKETS:
+        raise ValueError(f"不支持的过关方式: {ticket}")
+    return legs, SYSTEM_TICKETS[key]
+
+
+def ticket_count(num_legs, sizes):
+    """M串N 中包含的注数 N"""
+    return sum(comb(num_legs, k) for k in sizes)
+
+
+def elementary_symmetric(values, max_order=None):
+    """
+    计算初等对称多项式 e_0..e_max_order
+
+    e_k 为所有 k 元子集乘积之和，例如 values 取各场 odds * prob 时，
+    e_k 即全部 k 串 1 组合的期望回报之和
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if max_order is None:
+        max_order = len(values)
+    e = np.zeros(max_order + 1)
+    e[0] = 1.0
+    for v in values:
+        e[1:] = e[1:] + v * e[:-1]
+    return e
+
+
+def _hits_by_order(odds, probs):
+    """
+    联合动态规划
+
+    返回 (n+1, n+1) 矩阵 A，A[j, k] = Σ_{|W|=j} P(恰好 W 中各场命中) · e_k(W 中各场赔率)，
+    其中 A[j, 0] 即恰好命中 j 场的概率，Σ_k A[j, k] 为命中 j 场时各 k 串 1 的奖金贡献
+    """
+    n = len(odds)
+    table = np.zeros((n + 1, n + 1))
+    table[0, 0] = 1.0
+    for o, p in zip(odds, probs):
+        updated = (1.0 - p) * table
+        updated[1:, :] += p * table[:-1, :]
+        updated[1:, 1:] += p * o * table[:-1, :-1]
+        table = updated
+    return table
+
+
+def evaluate_system_bet(legs, ticket=None, sizes=None, stake=DEFAULT_STAKE):
+    """
+    计算 M串N 投注的期望回报、中奖概率和奖金分布
+
+    参数:
+        legs: 各场所选投注的 (odds, prob) 列表
+        ticket: 玩法名称，如 "4串11"；与 sizes 二选一
+        sizes: 子串关场数，如 (2, 3, 4)
+        stake: 每注金额
+
+    返回:
+        字典，包含 ticket, num_bets, cost, expected_return, expected_profit,
+        hit_prob（至少中一注的概率）, max_payout 以及 payout_by_hits：
+        按命中场数列出的概率、条件期望奖金
+    """
+    odds = np.array([float(o) for o, _ in legs], dtype=np.float64)
+    probs = np.array([float(p) for _, p in legs], dtype=np.float64)
+    num_legs = len(legs)
+
+    if ticket is not None:
+        ticket_legs, sizes = parse_system_ticket(ticket)
+        if ticket_legs != num_legs:
+            raise ValueError(f"{ticket} 需要 {ticket_legs} 场比赛，实际提供 {num_legs} 场")
+    elif sizes is None:
+        raise ValueError("必须提供 ticket 或 sizes")
+
+    sizes = tuple(sorted(set(int(k) for k in sizes)))
+    if not sizes or sizes[0] < 1 or sizes[-1] > num_legs:
+        raise ValueError(f"子串关场数 {sizes} 与比赛场数 {num_legs} 不匹配")
+
+    num_bets = ticket_count(num_legs, sizes)
+    size_index = np.array(sizes)
+
+    table = _hits_by_order(odds, probs)
+    hit_count_probs = table[:, 0]
+    payout_mass = table[:, size_index].sum(axis=1) * stake
+
+    expected_return = float(payout_mass.sum())
+    cost = num_bets * stake
+    max_payout = float(elementary_symmetric(odds)[size_index].sum() * stake)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        conditional_payout = np.where(hit_count_probs > 0, payout_mass / hit_count_probs, 0.0)
+
+    payout_by_hits = [
+        {
+            'hits': j,
+            'prob': float(hit_count_probs[j]),
+            'winning_bets': ticket_count(j, sizes),
+            'expected_payout': float(conditional_payout[j])
+        }
+        for j in range(num_legs + 1)
+    ]
+
+    return {
+        'ticket': ticket if ticket is not None else f"{num_legs}串{num_bets}",
+        'sizes': sizes,
+        'num_bets': num_bets,
+        'cost': cost,
+        'expected_return': expected_return,
+        'expected_profit': expected_return - cost,
+        'hit_prob': float(hit_count_probs[sizes[0]:].sum()),
+        'max_payout': max_payout,
+        'payout_by_hits': payout_by_hits
+    }
@@ -0,0 +1,250 @@
+"""
+树集成模型的纯 NumPy 导出与推理
+将 models.py 训练的 RandomForestClassifier / GradientBoostingClassifier 及其 StandardScaler
+展平为几个紧凑数组（所有树的节点拼接在一起: 分裂特征、阈值、左右子节点、叶子值），保存为 .npz；
+推理时只依赖 NumPy，一批比赛同时沿所有树向下走，每层一次向量化的数组索引
+
+用法（在项目根目录运行）:
+    python scripts/tree_export.py --model data/models/match_model_PL2024.pkl
+    python scripts/tree_export.py --model data/models/match_model_PL2024.pkl --check data/matches_data_PL2024.csv
+"""
+
+import argparse
+import os
+import pickle
+
+import numpy as np
+
+EXPORT_FORMAT_VERSION = 1
+
+# 每次向下遍历的行数，使每层的工作数组留在 CPU 缓存中
+APPLY_CHUNK_ROWS = 256
+
+
+def export_path_for(model_path):
+    """data/models/match_model_PL2024.pkl -> data/models/match_model_PL2024.npz"""
+    return f"{os.path.splitext(model_path)[0]}.npz"
+
+
+def _flatten_trees(trees):
+    """
+    把多棵 sklearn 树的节点拼接为一组数组
+
+    子节点编号改为全局编号，叶子节点的左右子节点为 -1、分裂特征为 0（避免越界索引）
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+        features.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        thresholds.append(t.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, -1, t.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, t.children_right + offset).astype(np.int32))
+        values.append(t.value[:, 0, :].astype(np.float64))
+        roots.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+    return {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int32(max_depth)
+    }
+
+
+def export_tree_model(model_data, output_path):
+    """
+    导出 train_match_result_model 保存的模型数据（model / scaler / feature_cols）
+
+    返回:
+        输出路径
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+
+    model = model_data['model']
+    scaler = model_data['scaler']
+    n_features = len(model_data['feature_cols'])
+
+    if isinstance(model, RandomForestClassifier):
+        arrays = _flatten_trees(model.estimators_)
+        # 每棵树的叶子值归一化为类别概率，predict_proba 为各树概率的平均
+        arrays['value'] = arrays['value'] / arrays['value'].sum(axis=1, keepdims=True)
+        kind = 'rf'
+        extra = {}
+    elif isinstance(model, GradientBoostingClassifier):
+        # estimators_ 形状为 (阶段数, K)，按阶段展开，第 s 阶段第 k 类的树位于 s * K + k
+        arrays = _flatten_trees(model.estimators_.ravel())
+        init_raw = model._raw_predict_init(np.zeros((2, n_features), dtype=np.float32))
+        if not np.allclose(init_raw[0], init_raw[1], rtol=0, atol=0):
+            raise ValueError("只支持常数初始预测（默认的 DummyClassifier 或 init='zero'）")
+        kind = 'gb'
+        extra = {
+            'init_raw': init_raw[0].astype(np.float64),
+            'learning_rate': np.float64(model.learning_rate),
+            'n_outputs': np.int32(model.estimators_.shape[1])
+        }
+    else:
+        raise ValueError(f"不支持导出的模型类型: {type(model).__name__}")
+
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+
+    directory = os.path.dirname(output_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(output_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            format_version=np.int32(EXPORT_FORMAT_VERSION),
+            kind=np.str_(kind),
+            classes=np.asarray([str(cls) for cls in model.classes_]),
+            feature_cols=np.asarray(model_data['feature_cols']),
+            scaler_mean=np.asarray(mean, dtype=np.float64),
+            scaler_scale=np.asarray(scale, dtype=np.float64),
+            **arrays,
+            **extra
+        )
+    return output_path
+
+
+class ExportedScaler:
+    """与 StandardScaler.transform 相同的运算: (X - mean) / scale"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class TreeEnsemble:
+    """
+    导出后的树集成模型
+
+    predict_proba 接收已标准化的特征，与 sklearn 模型的接口一致，
+    因此可以替代 model_data['model'] 用于 models.predict_match 和模型注册表
+    """
+
+    def __init__(self, arrays):
+        if int(arrays['format_version']) != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"不支持的导出格式版本 {int(arrays['format_version'])}")
+        self.kind = str(arrays['kind'])
+        self.classes_ = arrays['classes']
+        self.feature_cols = [str(col) for col in arrays['feature_cols']]
+        self.feature = arrays['feature'].astype(np.intp)
+        self.threshold = arrays['threshold']
+        # 子节点交错存放: children[2 * 节点 + 是否走左边]，叶子为 -1
+        self.children = np.column_stack([arrays['right'], arrays['left']]).astype(np.intp).ravel()
+        self.value = arrays['value']
+        self.roots = arrays['roots'].astype(np.intp)
+        self.max_depth = int(arrays['max_depth'])
+        self.scaler = ExportedScaler(arrays['scaler_mean'], arrays['scaler_scale'])
+        if self.kind == 'gb':
+            self.init_raw = arrays['init_raw']
+            self.learning_rate = float(arrays['learning_rate'])
+            self.n_outputs = int(arrays['n_outputs'])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def _apply_block(self, X):
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+
+        # (行, 树) 展平为一维，只对尚未到达叶子的位置继续向下走
+        nodes = np.tile(self.roots, n_rows)
+        active = np.arange(n_rows * n_trees)
+        row_offsets = active // n_trees * n_features
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            go_left = flat_X[row_offsets + self.feature[current]] <= self.threshold[current]
+            following = self.children[2 * current + go_left]
+            internal = following >= 0
+            if not internal.all():
+                active, following = active[internal], following[internal]
+                row_offsets = row_offsets[internal]
+            nodes[active] = following
+            if active.size == 0:
+                break
+        return nodes.reshape(n_rows, n_trees)
+
+    def apply(self, X):
+        """每行在每棵树中到达的叶子节点编号，形状为 (N, 树数)"""
+        # sklearn 的树以 float32 比较特征与阈值
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) <= APPLY_CHUNK_ROWS:
+            return self._apply_block(X)
+        return np.concatenate([self._apply_block(X[start:start + APPLY_CHUNK_ROWS])
+                               for start in range(0, len(X), APPLY_CHUNK_ROWS)])
+
+    def predict_proba(self, X):
+        """X 为已标准化的 N x F 矩阵，返回 (N, 类别数) 概率"""
+        leaves = self.apply(X)
+        if self.kind == 'rf':
+            return self.value[leaves].mean(axis=1)
+
+        leaf_values = self.value[leaves, 0].reshape(len(leaves), -1, self.n_outputs)
+        raw = self.init_raw + self.learning_rate * leaf_values.sum(axis=1)
+        if self.n_outputs == 1:
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        raw = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(raw)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def model_data(self):
+        """以 train_match_result_model 返回值的形式提供（model / feature_cols / scaler）"""
+        return {'model': self, 'feature_cols': self.feature_cols, 'scaler': self.scaler}
+
+
+def load_exported_model(path):
+    """加载 .npz 导出模型，返回与 pickle 模型数据相同结构的字典"""
+    return TreeEnsemble.load(path).model_data()
+
+
+def check_export(model_data, exported, X):
+    """导出模型与 sklearn 模型在 X 上的最大概率差"""
+    expected = model_data['model'].predict_proba(model_data['scaler'].transform(X))
+    actual = exported['model'].predict_proba(exported['scaler'].transform(X))
+    return float(np.abs(expected - actual).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将树集成模型导出为纯 NumPy 格式')
+    parser.add_argument('--model', type=str, required=True, help='train_match_result_model 保存的 .pkl')
+    parser.add_argument('--output', type=str, default=None, help='输出 .npz（默认与模型同名）')
+    parser.add_argument('--check', type=str, nargs='*', default=None,
+                        help='用这些比赛 CSV 的赛前特征核对导出模型与 sklearn 的预测')
+    args = parser.parse_args()
+
+    with open(args.model, 'rb') as f:
+        model_data = pickle.load(f)
+    output_path = export_tree_model(model_data, args.output or export_path_for(args.model))
+    exported = load_exported_model(output_path)
+    print(f"已导出 {args.model} -> {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB, "
+          f"{len(exported['model'].roots)} 棵树, {len(exported['model'].feature)} 个节点)")
+
+    if args.check:
+        from model_search import load_training_frame
+
+        features_df = load_training_frame(args.check)
+        X = features_df[model_data['feature_cols']].fillna(0).to_numpy(dtype=np.float64)
+        print(f"{len(X)} 场比赛上与 sklearn 的最大概率差: {check_export(model_data, exported, X):.3e}")
+
+
+if __name__ == "__main__":
+    main()